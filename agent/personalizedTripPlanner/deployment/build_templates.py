@@ -0,0 +1,181 @@
+"""Pre-generate itinerary templates for the most popular destinations.
+
+Runs the itinerary option agent locally for every destination x duration x
+theme and writes the results, with budget-tier and theme alternatives, to the
+JSON file the backend serves from (backend/itinerary_templates.py). Existing
+templates for other combinations are kept, so runs can be incremental:
+
+    python deployment/build_templates.py --top 10 --durations 2,3,4,5
+    python deployment/build_templates.py --destinations Hampi,Goa --durations 3
+"""
+
+import asyncio
+import json
+import os
+import sys
+from datetime import datetime
+from typing import List, Literal, Optional
+
+# Add the parent directory to Python path to find personalized_trip_planner
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from absl import app, flags
+from dotenv import load_dotenv
+from google.adk.agents import Agent, SequentialAgent
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+from personalized_trip_planner.subagents.destinationSuggester.tools.catalog import DESTINATIONS
+from personalized_trip_planner.subagents.Planning import prompt
+from personalized_trip_planner.subagents.Planning.schema import Activity, Itinerary
+from pydantic import BaseModel, Field
+
+DEFAULT_OUTPUT = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))),
+    "backend", "itinerary_templates.json",
+)
+
+FLAGS = flags.FLAGS
+flags.DEFINE_integer("top", 10, "Most popular catalog destinations to cover.")
+flags.DEFINE_list("destinations", None, "Explicit destination names (overrides --top).")
+flags.DEFINE_list("durations", ["2", "3", "4", "5"], "Trip lengths in days.")
+flags.DEFINE_integer("themes_per_destination", 2, "Leading catalog tags used as themes.")
+flags.DEFINE_string("origin", "Bengaluru", "City the templates travel from and back to.")
+flags.DEFINE_string("output", DEFAULT_OUTPUT, "Template JSON file, updated in place.")
+flags.DEFINE_integer("concurrency", 4, "Templates generated at the same time.")
+
+TEMPLATE_FOCUS = (
+    "A {days}-day trip to {destination} centred on {theme}, from and back to {origin}, "
+    "at a mid-range budget of about ₹{budget} per traveler per day. Leave all dates empty, "
+    "plan for one traveler and put the journey home on the last day."
+)
+
+TEMPLATE_ALTERNATIVES_INSTR = """
+    You adapt a reusable itinerary template. Here is the template:
+    {template_itinerary}
+
+    Propose replacements for single activities, each naming the exact title it replaces:
+    - tier "budget": a cheaper stay and, where it matters, cheaper transport
+    - tier "premium": a luxury stay
+    - theme: swaps of one sightseeing activity for each of these interests: {other_themes}
+    Replacements keep the slot's timing realistic and give a cost per traveler in INR.
+    """
+
+
+class Alternative(BaseModel):
+    replaces: str = Field(description="Exact title of the template activity to replace")
+    tier: Optional[Literal["budget", "premium"]] = None
+    theme: Optional[str] = Field(default=None, description="Interest this swap serves")
+    activity: Activity
+
+
+class Alternatives(BaseModel):
+    alternatives: List[Alternative]
+
+
+def create_template_agent() -> SequentialAgent:
+    """Drafts one template, then its alternatives; both answers land in session state"""
+    return SequentialAgent(
+        name="TemplateBuilder",
+        sub_agents=[
+            Agent(
+                name="TemplateDraft",
+                model="gemini-2.5-flash",
+                instruction=prompt.ITINERARY_OPTION_INSTR.format(focus="{template_focus}"),
+                output_schema=Itinerary,
+                output_key="template_itinerary",
+            ),
+            Agent(
+                name="TemplateAlternatives",
+                model="gemini-2.5-flash",
+                instruction=TEMPLATE_ALTERNATIVES_INSTR,
+                output_schema=Alternatives,
+                output_key="template_alternatives",
+            ),
+        ],
+    )
+
+
+def select_destinations() -> List[dict]:
+    if FLAGS.destinations:
+        wanted = {name.strip().lower() for name in FLAGS.destinations}
+        return [d for d in DESTINATIONS if d["name"].lower() in wanted]
+    return sorted(DESTINATIONS, key=lambda d: d["popularity"], reverse=True)[:FLAGS.top]
+
+
+async def build_template(runner: InMemoryRunner, destination: dict, days: int, theme: str) -> Optional[dict]:
+    other_themes = [tag for tag in destination["tags"] if tag != theme]
+    focus = TEMPLATE_FOCUS.format(days=days, destination=destination["name"], theme=theme,
+                                  origin=FLAGS.origin, budget=destination["cost_per_day"])
+    session = await runner.session_service.create_session(
+        app_name=runner.app_name, user_id="templates",
+        state={"template_focus": focus, "other_themes": ", ".join(other_themes) or "none"},
+    )
+    message = types.Content(role="user", parts=[types.Part(text=f"Plan {days} days in {destination['name']}.")])
+    async for _ in runner.run_async(user_id="templates", session_id=session.id, new_message=message):
+        pass
+
+    session = await runner.session_service.get_session(
+        app_name=runner.app_name, user_id="templates", session_id=session.id
+    )
+    try:
+        itinerary = Itinerary.model_validate(session.state.get("template_itinerary"))
+    except ValueError as e:
+        print(f"❌ {destination['name']} / {days} days / {theme}: invalid itinerary ({e})")
+        return None
+    alternatives = (session.state.get("template_alternatives") or {}).get("alternatives", [])
+    print(f"✅ {destination['name']} / {days} days / {theme}: {len(itinerary.days)} days, "
+          f"{len(alternatives)} alternatives")
+    return {
+        "destination": destination["name"],
+        "origin": FLAGS.origin,
+        "days": len(itinerary.days),
+        "theme": theme,
+        "themes": [theme] + [tag for tag in other_themes if tag in destination["tags"][:3]],
+        "reference_budget_per_day": destination["cost_per_day"],
+        "itinerary": itinerary.model_dump(),
+        "alternatives": alternatives,
+    }
+
+
+async def build_all() -> int:
+    runner = InMemoryRunner(agent=create_template_agent(), app_name="itinerary_templates")
+    semaphore = asyncio.Semaphore(FLAGS.concurrency)
+    jobs = [
+        (destination, int(days), theme)
+        for destination in select_destinations()
+        for days in FLAGS.durations
+        for theme in destination["tags"][:FLAGS.themes_per_destination]
+    ]
+
+    async def limited(job):
+        async with semaphore:
+            try:
+                return await build_template(runner, *job)
+            except Exception as e:
+                print(f"❌ {job[0]['name']} / {job[1]} days / {job[2]}: {e}")
+                return None
+
+    built = [template for template in await asyncio.gather(*map(limited, jobs)) if template]
+
+    existing = []
+    if os.path.exists(FLAGS.output):
+        with open(FLAGS.output, encoding="utf-8") as f:
+            existing = json.load(f).get("templates", [])
+    key = lambda t: (t["destination"].lower(), t.get("origin", "").lower(), t["days"], t["theme"])
+    replaced = {key(template) for template in built}
+    templates = [t for t in existing if key(t) not in replaced] + built
+    with open(FLAGS.output, "w", encoding="utf-8") as f:
+        json.dump({"version": 1, "generated_at": datetime.now().isoformat(), "templates": templates},
+                  f, indent=2, ensure_ascii=False)
+    print(f"📝 {len(built)}/{len(jobs)} templates built, {len(templates)} in {FLAGS.output}")
+    return 0 if built or not jobs else 1
+
+
+def main(argv: list[str]) -> None:
+    del argv  # unused
+    load_dotenv()
+    sys.exit(asyncio.run(build_all()))
+
+
+if __name__ == "__main__":
+    app.run(main)
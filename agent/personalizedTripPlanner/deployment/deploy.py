@@ -41,6 +41,7 @@ def create() -> None:
             "reportlab (>=4.4.3,<5.0.0)",
             "google-cloud-storage (>=2.19.0)",
             "pymupdf (>=1.26.4,<2.0.0)",
+            "numpy (>=2.0.0)",
         ],
         # extra_packages=["./medical_pre_authorization"],
     )
@@ -9,15 +9,50 @@ decomposes the goal, and forms the plan.
 """
 
 from google.adk.agents import Agent
-from google.adk.tools.agent_tool import AgentTool
 
-from .subagents.destinationSuggester import destination_suggester_agent
-from .subagents.Planning import planning_agent
-from .subagents.Booking import booking_agent
-from .subagents.DataAggregator import data_aggregator_agent
-from .subagents.Optimization import optimization_agent
-from .subagents.Personalization import personalization_agent
-from .subagents.RealtimeMonitoring import realtime_monitoring_agent
+from .intent_routing import route_marked_message
+from .lazy_agent_tool import LazyAgentTool
+from .profile_sync import seed_profile_from_marker
+from .token_accounting import install_token_accounting
+
+# Sub-agents are imported on first delegation; the descriptions are what the root model sees
+SUBAGENTS = "personalized_trip_planner.subagents"
+
+destination_suggester_tool = LazyAgentTool(
+    f"{SUBAGENTS}.destinationSuggester.agent:destination_suggester_agent",
+    name="InspirationAgent",
+    description="Suggests and ranks potential travel destinations when the user has not provided one.",
+)
+planning_tool = LazyAgentTool(
+    f"{SUBAGENTS}.Planning.agent:planning_agent",
+    name="PlanningAgent",
+    description="Creates detailed, optimized itineraries for a given destination.",
+)
+booking_tool = LazyAgentTool(
+    f"{SUBAGENTS}.Booking.agent:booking_agent",
+    name="booking_agent",
+    description="Given an itinerary, complete the bookings of items by handling payment choices and processing.",
+)
+data_aggregator_tool = LazyAgentTool(
+    f"{SUBAGENTS}.DataAggregator.agent:data_aggregator_agent",
+    name="DataAggregatorAgent",
+    description="Gathers and processes travel data from various sources including weather, events, and local information.",
+)
+optimization_tool = LazyAgentTool(
+    f"{SUBAGENTS}.Optimization.agent:optimization_agent",
+    name="OptimizationAgent",
+    description="Optimizes travel itineraries based on user constraints, preferences, and real-time data.",
+)
+personalization_tool = LazyAgentTool(
+    f"{SUBAGENTS}.Personalization.agent:personalization_agent",
+    name="PersonalizationAgent",
+    description="Personalizes travel recommendations based on user profile, preferences, and past behavior.",
+)
+realtime_monitoring_tool = LazyAgentTool(
+    f"{SUBAGENTS}.RealtimeMonitoring.agent:realtime_monitoring_agent",
+    name="RealtimeMonitoringAgent",
+    description="Monitors travel conditions and provides real-time updates and recommendations during the trip.",
+)
 
 root_agent = Agent(
     model="gemini-2.5-flash",
@@ -45,12 +80,18 @@ root_agent = Agent(
     """,
 
     tools=[
-        AgentTool(agent=destination_suggester_agent),
-        AgentTool(agent=planning_agent),
-        AgentTool(agent=booking_agent),
-        AgentTool(agent=data_aggregator_agent),
-        AgentTool(agent=optimization_agent),
-        AgentTool(agent=personalization_agent),
-        AgentTool(agent=realtime_monitoring_agent)
-    ]
-)
\ No newline at end of file
+        destination_suggester_tool,
+        planning_tool,
+        booking_tool,
+        data_aggregator_tool,
+        optimization_tool,
+        personalization_tool,
+        realtime_monitoring_tool
+    ],
+    # Profiles seeded by the backend go to state first; routed messages then
+    # skip the delegation model call
+    before_model_callback=[seed_profile_from_marker, route_marked_message],
+)
+
+# Per-agent token usage in session state, and a context budget on every model call
+install_token_accounting(root_agent)
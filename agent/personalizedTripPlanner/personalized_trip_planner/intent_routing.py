@@ -0,0 +1,78 @@
+"""
+Route markers from the backend's intent router.
+
+A message starting with `[[route:<tool>]]` already has a known destination.
+For those, root_agent's before_model_callback answers its first model call
+itself with a call to that tool, which saves the model round trip spent
+deciding where to delegate. The tool result is still presented by the
+model as usual. Markers are stripped from every request, so the model
+never sees them, and unknown tool names fall back to normal handling.
+"""
+
+import re
+from typing import List, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+ROUTE_MARKER = re.compile(r"^\[\[route:([A-Za-z0-9_]+)\]\]\s*")
+
+# Earlier turns handed to a routed sub-agent, so "more destinations" or
+# "book this" keep their meaning without root_agent rewriting the request
+CONTEXT_TURNS = 4
+CONTEXT_CHARS = 1500
+
+
+def _strip_markers(llm_request: LlmRequest) -> Optional[str]:
+    """Remove route markers in place; returns the tool named by the latest user message"""
+    route = None
+    for index, content in enumerate(llm_request.contents):
+        if content.role != "user":
+            continue
+        for part in content.parts or []:
+            if not part.text:
+                continue
+            match = ROUTE_MARKER.match(part.text)
+            if match:
+                part.text = part.text[match.end():]
+                if index == len(llm_request.contents) - 1:
+                    route = match.group(1)
+    return route
+
+
+def _text(content: types.Content) -> str:
+    return " ".join(part.text for part in content.parts or [] if part.text).strip()
+
+
+def _routed_request(llm_request: LlmRequest) -> str:
+    """The latest user message, preceded by a few earlier turns for context"""
+    *earlier, latest = llm_request.contents
+    turns: List[str] = []
+    for content in reversed(earlier):
+        text = _text(content)
+        if not text:
+            continue
+        speaker = "User" if content.role == "user" else "Assistant"
+        turns.append(f"{speaker}: {text[:CONTEXT_CHARS]}")
+        if len(turns) == CONTEXT_TURNS:
+            break
+    message = _text(latest)
+    if not turns:
+        return message
+    return "Conversation so far:\n" + "\n".join(reversed(turns)) + f"\n\nCurrent request: {message}"
+
+
+def route_marked_message(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """before_model_callback: delegate marked messages without asking the model"""
+    tool = _strip_markers(llm_request)
+    if tool is None or tool not in llm_request.tools_dict:
+        return None
+    return LlmResponse(content=types.Content(
+        role="model",
+        parts=[types.Part(function_call=types.FunctionCall(
+            name=tool,
+            args={"request": _routed_request(llm_request)},
+        ))],
+    ))
@@ -0,0 +1,59 @@
+"""
+AgentTool whose sub-agent is imported and built on first use.
+
+The root agent only needs each sub-agent's name and description to tell the
+model what it can delegate to. Importing the sub-agent packages (prompts,
+tool modules, search providers, numpy) is deferred until the model actually
+calls the tool, which keeps the root agent's import and cold start cheap.
+"""
+
+import importlib
+from typing import Any, Callable, Optional
+
+from google.adk.agents import BaseAgent
+from google.adk.tools.agent_tool import AgentTool
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+
+class LazyAgentTool(BaseTool):
+    """Declares an AgentTool up front and builds its agent on the first call.
+
+    `target` is "package.module:attribute". Sub-agents loaded this way must not
+    declare an input_schema or output_schema, since the declaration is built
+    from the name and description alone. `prepare`, when set, is applied to
+    the agent once it has been imported (e.g. to attach callbacks).
+    """
+
+    def __init__(self, target: str, name: str, description: str):
+        super().__init__(name=name, description=description)
+        self.target = target
+        self.prepare: Optional[Callable[[BaseAgent], Any]] = None
+        self._agent_tool: Optional[AgentTool] = None
+
+    @property
+    def agent_tool(self) -> AgentTool:
+        if self._agent_tool is None:
+            module_name, attribute = self.target.split(":")
+            agent = getattr(importlib.import_module(module_name), attribute)
+            if agent.name != self.name:
+                raise ValueError(f"{self.target} is named {agent.name!r}, expected {self.name!r}")
+            if self.prepare is not None:
+                self.prepare(agent)
+            self._agent_tool = AgentTool(agent=agent)
+        return self._agent_tool
+
+    @property
+    def agent(self) -> BaseAgent:
+        return self.agent_tool.agent
+
+    def _get_declaration(self) -> types.FunctionDeclaration:
+        if self._agent_tool is not None:
+            return self._agent_tool._get_declaration()
+        # Same declaration AgentTool builds for a schema-less agent
+        placeholder = BaseAgent(name=self.name, description=self.description)
+        return AgentTool(agent=placeholder)._get_declaration()
+
+    async def run_async(self, *, args: dict[str, Any], tool_context: ToolContext) -> Any:
+        return await self.agent_tool.run_async(args=args, tool_context=tool_context)
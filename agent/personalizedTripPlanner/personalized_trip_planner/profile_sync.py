@@ -0,0 +1,52 @@
+"""
+Personalization profiles handed over by the backend.
+
+Agent sessions are shared through the backend's session pool, so the agent
+cannot tell end users apart by its own user id, and `user:` state would mix
+everyone's profiles. The profile is therefore session-scoped
+(state["personalization_profile"]) and the backend owns the per-user copy:
+- it saves every profile state delta under the end user's id
+- on the first message to a new agent session it prefixes
+  `[[profile:<base64 JSON>]]`, which the callback below writes to state
+  and strips from every request, so the model never sees it
+"""
+
+import base64
+import binascii
+import json
+import re
+from typing import Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+PROFILE_KEY = "personalization_profile"
+
+PROFILE_MARKER = re.compile(r"\[\[profile:([A-Za-z0-9_=-]*)\]\]\s*")
+
+
+def decode_profile(encoded: str) -> Optional[dict]:
+    try:
+        profile = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")))
+    except (binascii.Error, ValueError):
+        return None
+    return profile if isinstance(profile, dict) else None
+
+
+def seed_profile_from_marker(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """before_model_callback: store a profile marker in state and strip markers from the request"""
+    latest = len(llm_request.contents) - 1
+    for index, content in enumerate(llm_request.contents):
+        if content.role != "user":
+            continue
+        for part in content.parts or []:
+            if not part.text or "[[profile:" not in part.text:
+                continue
+            match = PROFILE_MARKER.search(part.text)
+            if match and index == latest:
+                profile = decode_profile(match.group(1))
+                if profile is not None:
+                    callback_context.state[PROFILE_KEY] = profile
+            part.text = PROFILE_MARKER.sub("", part.text)
+    return None
@@ -1,48 +1,74 @@
+"""Booking agent, handling the confirmation and payment of bookable events."""
 
-
-"""Booking agent and sub-agents, handling the confirmation and payment of bookable events."""
+import os
 
 from google.adk.agents import Agent
 from google.adk.tools.agent_tool import AgentTool
 from google.genai.types import GenerateContentConfig
 
 from personalized_trip_planner.subagents.Booking import prompt
+from personalized_trip_planner.subagents.Booking.tools.tools import (
+    book_itinerary_tool,
+    create_reservation_tool,
+    payment_choice_tool,
+    process_payment_tool,
+)
 
+# "direct" calls the deterministic booking tools from the booking agent itself;
+# "agents" keeps the LLM sub-agents that simulate reservation, payment choice and payment.
+BOOKING_EXECUTION_MODE = os.getenv("BOOKING_EXECUTION_MODE", "direct")
 
-create_reservation = Agent(
-    model="gemini-2.5-flash",
-    name="create_reservation",
-    description="""Create a reservation for the selected item.""",
-    instruction=prompt.CONFIRM_RESERVATION_INSTR,
-)
 
+def create_booking_sub_agents() -> list:
+    """Model-backed reservation and payment steps, each wrapped as an AgentTool."""
+    create_reservation = Agent(
+        model="gemini-2.5-flash",
+        name="create_reservation",
+        description="""Create a reservation for the selected item.""",
+        instruction=prompt.CONFIRM_RESERVATION_INSTR,
+    )
 
-payment_choice = Agent(
-    model="gemini-2.5-flash",
-    name="payment_choice",
-    description="""Show the users available payment choices.""",
-    instruction=prompt.PAYMENT_CHOICE_INSTR,
-)
+    payment_choice = Agent(
+        model="gemini-2.5-flash",
+        name="payment_choice",
+        description="""Show the users available payment choices.""",
+        instruction=prompt.PAYMENT_CHOICE_INSTR,
+    )
 
-process_payment = Agent(
-    model="gemini-2.5-flash",
-    name="process_payment",
-    description="""Given a selected payment choice, processes the payment, completing the transaction.""",
-    instruction=prompt.PROCESS_PAYMENT_INSTR,
-)
+    process_payment = Agent(
+        model="gemini-2.5-flash",
+        name="process_payment",
+        description="""Given a selected payment choice, processes the payment, completing the transaction.""",
+        instruction=prompt.PROCESS_PAYMENT_INSTR,
+    )
+
+    return [
+        AgentTool(agent=create_reservation),
+        AgentTool(agent=payment_choice),
+        AgentTool(agent=process_payment),
+    ]
+
+
+if BOOKING_EXECUTION_MODE == "agents":
+    booking_tools = create_booking_sub_agents()
+    booking_instruction = prompt.BOOKING_AGENT_INSTR + prompt.BOOKING_AGENT_TOOLS_INSTR
+else:
+    # No nested model calls: reservations, the static payment choices and
+    # payments are plain functions that return in microseconds
+    booking_tools = [create_reservation_tool, payment_choice_tool, process_payment_tool]
+    booking_instruction = prompt.BOOKING_AGENT_INSTR + prompt.BOOKING_DIRECT_TOOLS_INSTR
 
 
 booking_agent = Agent(
     model="gemini-2.5-flash",
     name="booking_agent",
     description="Given an itinerary, complete the bookings of items by handling payment choices and processing.",
-    instruction=prompt.BOOKING_AGENT_INSTR,
+    instruction=booking_instruction,
     tools=[
-        AgentTool(agent=create_reservation),
-        AgentTool(agent=payment_choice),
-        AgentTool(agent=process_payment),
+        *booking_tools,
+        book_itinerary_tool,
     ],
     generate_content_config=GenerateContentConfig(
         temperature=0.0, top_p=0.5
     )
-)
\ No newline at end of file
+)
@@ -0,0 +1,228 @@
+"""
+Batch reservation engine: book a whole itinerary in one call.
+
+All items are validated up front, reserved concurrently (so checkout time
+follows the slowest supplier rather than the number of items), totalled
+once and paid with a single aggregated charge. Bookings are all-or-nothing:
+if any reservation or the payment fails, every hold that was placed is
+released again.
+
+Suppliers are simulated by SimulatedReservationBackend; a real integration
+implements the same reserve / confirm / release coroutines.
+"""
+
+import asyncio
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+BOOKING_TYPES = {"hotel", "flight", "train", "bus", "tour", "restaurant", "activity", "transport", "event", "other"}
+
+# Demo payment gateway behaviour, shared with process_payment_tool_impl
+PAYMENT_SCENARIOS = {
+    "apple_pay": (False, "Apple Pay transaction declined", "declined"),
+    "google_pay": (True, "Google Pay transaction approved", "approved"),
+    "credit_card": (True, "Credit Card transaction approved", "approved"),
+}
+
+
+def authorize_payment(payment_method: str) -> Tuple[bool, str, str]:
+    """(success, message, status) for a payment method in the demo gateway"""
+    return PAYMENT_SCENARIOS.get(payment_method, (False, "Invalid payment method", "error"))
+
+
+class ReservationError(Exception):
+    """A supplier could not reserve an item"""
+
+
+class ReservationBackend(ABC):
+    """Supplier side of a booking: hold, confirm and release inventory"""
+
+    @abstractmethod
+    async def reserve(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        """Hold one normalized item; raises ReservationError when unavailable"""
+
+    @abstractmethod
+    async def confirm(self, reservation: Dict[str, Any]) -> None:
+        """Turn a hold into a booking"""
+
+    @abstractmethod
+    async def release(self, reservation: Dict[str, Any]) -> None:
+        """Drop a hold; releasing an unknown or expired hold is a no-op"""
+
+
+class SimulatedReservationBackend(ReservationBackend):
+    """In-memory supplier with a configurable per-call latency
+
+    Only open holds are tracked: confirmed and released ones are dropped,
+    and holds nobody confirms expire after hold_ttl seconds, so the map
+    stays bounded by the checkouts in flight.
+    """
+
+    def __init__(self, latency_ms: Optional[float] = None, unavailable: Optional[set] = None,
+                 hold_ttl: Optional[float] = None):
+        if latency_ms is None:
+            latency_ms = float(os.getenv("BOOKING_SIMULATED_LATENCY_MS", "0"))
+        self.latency = latency_ms / 1000.0
+        self.hold_ttl = hold_ttl if hold_ttl is not None else float(os.getenv("BOOKING_HOLD_TTL_SECONDS", "900"))
+        # Item names that always fail, to exercise rollback
+        self.unavailable = {name.lower() for name in (unavailable or set())}
+        # reservation_id -> expiry on the time.monotonic() clock, oldest first
+        self.holds: Dict[str, float] = {}
+
+    def _expire_holds(self) -> None:
+        now = time.monotonic()
+        # Insertion order is expiry order, since every hold gets the same TTL
+        for reservation_id, expires in list(self.holds.items()):
+            if expires > now:
+                break
+            del self.holds[reservation_id]
+
+    async def _call(self) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    async def reserve(self, item: Dict[str, Any]) -> Dict[str, Any]:
+        await self._call()
+        self._expire_holds()
+        if item["item_name"].lower() in self.unavailable:
+            raise ReservationError(f"{item['item_name']} is not available")
+        reservation_id = str(uuid.uuid4())[:8].upper()
+        reservation = {
+            **item,
+            "reservation_id": reservation_id,
+            "confirmation_number": f"BK{reservation_id}",
+            "status": "held",
+            "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        self.holds[reservation_id] = time.monotonic() + self.hold_ttl
+        return reservation
+
+    async def confirm(self, reservation: Dict[str, Any]) -> None:
+        await self._call()
+        self._expire_holds()
+        if self.holds.pop(reservation["reservation_id"], None) is None:
+            raise ReservationError(f"Hold for {reservation['item_name']} expired")
+        reservation["status"] = "confirmed"
+
+    async def release(self, reservation: Dict[str, Any]) -> None:
+        await self._call()
+        self.holds.pop(reservation["reservation_id"], None)
+        reservation["status"] = "released"
+
+
+def normalize_item(item: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate one bookable item; raises ValueError with a readable reason"""
+    name = str(item.get("item_name") or item.get("title") or item.get("name") or "").strip()
+    if not name:
+        raise ValueError("item without a name")
+    item_type = str(item.get("item_type") or item.get("booking_type") or item.get("type") or "other").lower()
+    if item_type not in BOOKING_TYPES:
+        item_type = "other"
+    try:
+        cost = float(item.get("cost", 0) or 0)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name}: cost is not a number")
+    if cost < 0:
+        raise ValueError(f"{name}: cost cannot be negative")
+    quantity = int(item.get("quantity", 1) or 1)
+    if quantity < 1:
+        raise ValueError(f"{name}: quantity must be at least 1")
+    return {
+        "item_name": name,
+        "item_type": item_type,
+        "date": str(item.get("date", "")),
+        "time": str(item.get("time", "")),
+        "duration": str(item.get("duration", "")),
+        "cost": cost,
+        "quantity": quantity,
+    }
+
+
+class BatchReservationEngine:
+    """Validate, reserve concurrently, pay once, roll back on any failure"""
+
+    def __init__(self, backend: Optional[ReservationBackend] = None,
+                 max_concurrency: Optional[int] = None):
+        self.backend = backend or SimulatedReservationBackend()
+        self.max_concurrency = max_concurrency or int(os.getenv("BOOKING_MAX_CONCURRENCY", "16"))
+
+    async def _gather(self, func, items: List[Dict[str, Any]]) -> List[Any]:
+        """Run func over items concurrently, bounded, collecting exceptions"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(item):
+            async with semaphore:
+                return await func(item)
+
+        return await asyncio.gather(*(bounded(item) for item in items), return_exceptions=True)
+
+    async def _rollback(self, reservations: List[Dict[str, Any]]) -> None:
+        await self._gather(self.backend.release, reservations)
+
+    async def book(self, items: List[Dict[str, Any]], payment_method: str) -> Dict[str, Any]:
+        # 1. Validate everything before touching any supplier
+        normalized, errors = [], []
+        for item in items or []:
+            try:
+                normalized.append(normalize_item(item))
+            except ValueError as e:
+                errors.append(str(e))
+        if errors or not normalized:
+            return {
+                "success": False,
+                "message": "Invalid booking items" if errors else "No items to book",
+                "errors": errors,
+            }
+
+        # 2. Reserve all items concurrently
+        results = await self._gather(self.backend.reserve, normalized)
+        reservations = [r for r in results if isinstance(r, dict)]
+        failures = [str(r) for r in results if isinstance(r, BaseException)]
+        if failures:
+            await self._rollback(reservations)
+            return {
+                "success": False,
+                "message": "Some items could not be reserved; nothing was booked",
+                "errors": failures,
+            }
+
+        # 3. One aggregated payment for the whole batch
+        total = sum(r["cost"] * r["quantity"] for r in reservations)
+        batch_id = str(uuid.uuid4())[:12].upper()
+        success, message, status = authorize_payment(payment_method)
+        payment_result = {
+            "transaction_id": batch_id,
+            "payment_method": payment_method,
+            "amount": total,
+            "reservation_ids": [r["reservation_id"] for r in reservations],
+            "status": status,
+            "processed_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "order_id": f"ORD{batch_id}" if success else None,
+        }
+        if not success:
+            await self._rollback(reservations)
+            return {
+                "success": False,
+                "message": f"{message}; all reservations were released",
+                "payment_result": payment_result,
+            }
+
+        # 4. Confirm the holds now that the money is in
+        confirmed = await self._gather(self.backend.confirm, reservations)
+        result = {
+            "success": True,
+            "message": f"Booked {len(reservations)} items",
+            "reservations": reservations,
+            "total_amount": total,
+            "payment_result": payment_result,
+        }
+        unconfirmed = [r["item_name"] for r, outcome in zip(reservations, confirmed)
+                       if isinstance(outcome, BaseException)]
+        if unconfirmed:
+            # Paid and held; the supplier will be retried out of band
+            result["warnings"] = [f"Confirmation pending for {name}" for name in unconfirmed]
+        return result
@@ -3,9 +3,16 @@ Booking tools implementation for the booking agent.
 """
 
 from google.adk.tools import FunctionTool
+from google.adk.tools.tool_context import ToolContext
+import copy
 import uuid
 from datetime import datetime
 
+from .reservations import BatchReservationEngine, authorize_payment
+
+# Shared by every booking in the process
+_reservation_engine = BatchReservationEngine()
+
 def create_reservation_tool_impl(item_name: str, item_type: str, date: str, time: str, duration: str, cost: float) -> dict:
     """
     Create a reservation for a bookable item.
@@ -43,43 +50,46 @@ def create_reservation_tool_impl(item_name: str, item_type: str, date: str, time
         "reservation_details": reservation_details
     }
 
-def payment_choice_tool_impl() -> dict:
+# The choices never change, so they are built once rather than per request
+_PAYMENT_OPTIONS = {
+    "options": [
+        {
+            "id": "apple_pay",
+            "name": "Apple Pay",
+            "description": "Pay with Apple Pay",
+            "available": True
+        },
+        {
+            "id": "google_pay", 
+            "name": "Google Pay",
+            "description": "Pay with Google Pay",
+            "available": True
+        },
+        {
+            "id": "credit_card",
+            "name": "Credit Card",
+            "description": "Pay with Credit Card on file",
+            "available": True
+        }
+    ]
+}
+
+def payment_choice_tool_impl(tool_context: ToolContext) -> dict:
     """
     Present payment options to the user.
     
     Returns:
-        dict: Available payment options
+        dict: Available payment options, and the method used last in this session
     """
-    payment_options = {
-        "options": [
-            {
-                "id": "apple_pay",
-                "name": "Apple Pay",
-                "description": "Pay with Apple Pay",
-                "available": True
-            },
-            {
-                "id": "google_pay", 
-                "name": "Google Pay",
-                "description": "Pay with Google Pay",
-                "available": True
-            },
-            {
-                "id": "credit_card",
-                "name": "Credit Card",
-                "description": "Pay with Credit Card on file",
-                "available": True
-            }
-        ]
-    }
-    
     return {
         "success": True,
         "message": "Payment options presented",
-        "payment_options": payment_options
+        "payment_options": copy.deepcopy(_PAYMENT_OPTIONS),
+        "previous_choice": tool_context.state.get("payment_method")
     }
 
-def process_payment_tool_impl(payment_method: str, amount: float, reservation_id: str) -> dict:
+def process_payment_tool_impl(payment_method: str, amount: float, reservation_id: str,
+                              tool_context: ToolContext) -> dict:
     """
     Process payment for a reservation.
     
@@ -95,22 +105,9 @@ def process_payment_tool_impl(payment_method: str, amount: float, reservation_id
     current_time = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     
     # Simulate payment processing based on method
-    if payment_method == "apple_pay":
-        success = False
-        message = "Apple Pay transaction declined"
-        status = "declined"
-    elif payment_method == "google_pay":
-        success = True
-        message = "Google Pay transaction approved"
-        status = "approved"
-    elif payment_method == "credit_card":
-        success = True
-        message = "Credit Card transaction approved"
-        status = "approved"
-    else:
-        success = False
-        message = "Invalid payment method"
-        status = "error"
+    success, message, status = authorize_payment(payment_method)
+    if success:
+        tool_context.state["payment_method"] = payment_method
     
     payment_result = {
         "transaction_id": transaction_id,
@@ -128,18 +125,34 @@ def process_payment_tool_impl(payment_method: str, amount: float, reservation_id
         "payment_result": payment_result
     }
 
+async def book_itinerary_tool_impl(items: list[dict], payment_method: str, tool_context: ToolContext) -> dict:
+    """
+    Reserve and pay for all bookable items of an itinerary in one step.
+    
+    Every item is validated first, then all items are reserved concurrently and
+    charged as a single payment. If any reservation or the payment fails, nothing
+    is booked and all holds are released.
+    
+    Args:
+        items: Bookable items. Each needs "item_name", "item_type" (hotel, flight,
+            train, bus, tour, restaurant, ...) and "cost" (INR); optional keys are
+            "date", "time", "duration" and "quantity" (default 1)
+        payment_method: Selected payment method (apple_pay, google_pay, credit_card)
+    
+    Returns:
+        dict: Confirmed reservations, the total amount and the payment result,
+        or the reasons nothing was booked
+    """
+    result = await _reservation_engine.book(items, payment_method)
+    if result["success"]:
+        tool_context.state["payment_method"] = payment_method
+    return result
+
 # Create the function tools
-create_reservation_tool = FunctionTool(
-    impl=create_reservation_tool_impl,
-    name="create_reservation_tool"
-)
+create_reservation_tool = FunctionTool(create_reservation_tool_impl)
+
+payment_choice_tool = FunctionTool(payment_choice_tool_impl)
 
-payment_choice_tool = FunctionTool(
-    impl=payment_choice_tool_impl,
-    name="payment_choice_tool"
-)
+process_payment_tool = FunctionTool(process_payment_tool_impl)
 
-process_payment_tool = FunctionTool(
-    impl=process_payment_tool_impl,
-    name="process_payment_tool"
-)
+book_itinerary_tool = FunctionTool(book_itinerary_tool_impl)
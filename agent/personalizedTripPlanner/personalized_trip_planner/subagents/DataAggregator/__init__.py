@@ -1,3 +1,3 @@
-from .agent import data_aggregator_agent
+from .agent import create_research_agent, data_aggregator_agent
 
-__all__ = ["data_aggregator_agent"]
+__all__ = ["create_research_agent", "data_aggregator_agent"]
@@ -3,29 +3,36 @@ Data Aggregator Agent: Gathers and processes travel data from various sources.
 """
 
 from google.adk.agents import Agent
-from google.adk.tools import google_search
+from personalized_trip_planner.subagents.DataAggregator import prompt
+from personalized_trip_planner.subagents.DataAggregator.tools.tools import travel_search_tool
 
 
 data_aggregator_agent = Agent(
     name="DataAggregatorAgent",
     model="gemini-2.5-flash",
     description="Gathers and processes travel data from various sources including weather, events, and local information.",
-    instruction="""
-    You are a travel data aggregation specialist. Your role is to collect comprehensive information about destinations to help create better itineraries.
-    
-    When called, gather the following information for the specified destination:
-    1. Weather conditions and forecasts for the travel dates
-    2. Local events, festivals, or special occasions during the travel period
-    3. Transportation options (flights, trains, buses, local transport)
-    4. Current travel advisories or restrictions
-    5. Popular attractions, restaurants, and activities
-    6. Cultural norms, local customs, and practical travel tips
-    7. Safety information and areas to avoid
-    8. Currency, language, and communication details
-    
-    Use the Google Search tool to gather current, accurate information.
-    Present the data in a structured format that can be used by the planning agent.
-    Focus on information that directly impacts itinerary planning and booking decisions.
-    """,
-    tools=[google_search]
+    instruction=prompt.DATA_AGGREGATOR_INSTR,
+    tools=[travel_search_tool]
 )
+
+
+def create_research_agent(name: str, topics: dict[str, str], output_key: str) -> Agent:
+    """
+    Build a data aggregator focused on a subset of topics.
+
+    `topics` maps each topic description to its search category. Several of
+    these run side by side in a ParallelAgent so that independent searches
+    (weather, transport, attractions, ...) overlap instead of queuing.
+    The findings are written to session state under `output_key`.
+    """
+    return Agent(
+        name=name,
+        model="gemini-2.5-flash",
+        description=f"Gathers destination data on: {', '.join(topics)}.",
+        instruction=prompt.RESEARCH_BRANCH_INSTR.format(
+            topics="\n".join(f"{i}. {topic}" for i, topic in enumerate(topics, 1)),
+            categories=", ".join(dict.fromkeys(topics.values())),
+        ),
+        tools=[travel_search_tool],
+        output_key=output_key,
+    )
@@ -0,0 +1,206 @@
+"""
+Cached, coalesced web search for the data aggregator.
+
+Destination research repeats itself: the same city's weather, transport or
+currency details are looked up for every plan. Results are cached per
+(category, query) with a TTL that matches how fast that kind of data goes
+stale, and concurrent lookups for the same key share a single in-flight
+request instead of each hitting the search backend.
+
+Providers:
+- GeminiSearchProvider: Gemini with Google Search grounding (default)
+- StubSearchProvider:   canned local results for tests and offline runs
+"""
+
+import os
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Any, Dict, Optional, Tuple
+
+# How long a result stays fresh, per research category
+CATEGORY_TTLS = {
+    "currency": 3 * 24 * 3600,
+    "customs": 7 * 24 * 3600,
+    "attractions": 3 * 24 * 3600,
+    "safety": 24 * 3600,
+    "transport": 6 * 3600,
+    "events": 6 * 3600,
+    "weather": 3 * 3600,
+    "advisories": 30 * 60,
+    "general": 6 * 3600,
+}
+
+# Query template per category. Only time-sensitive categories mention the
+# travel period, so e.g. currency details are shared across all dates.
+CATEGORY_QUERIES = {
+    "weather": "weather conditions and forecast in {destination} {when}",
+    "events": "local events and festivals in {destination} {when}",
+    "advisories": "current travel advisories and restrictions for {destination}",
+    "safety": "safety information and areas to avoid in {destination}",
+    "transport": "flights, trains, buses and local transport options for {destination}",
+    "attractions": "popular attractions, restaurants and activities in {destination}",
+    "customs": "cultural norms, local customs and practical travel tips for {destination}",
+    "currency": "currency, language and communication details for {destination}",
+    "general": "{destination} travel information {when}",
+}
+
+CATEGORIES = list(CATEGORY_TTLS)
+
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace/punctuation-insensitive cache key for a query"""
+    return " ".join(re.findall(r"[a-z0-9]+", query.lower()))
+
+
+def build_query(category: str, destination: str, when: str = "", details: str = "") -> str:
+    """Canonical query for a category so equivalent requests share a cache entry"""
+    template = CATEGORY_QUERIES.get(category, CATEGORY_QUERIES["general"])
+    query = template.format(destination=destination.strip(), when=when.strip()).strip()
+    return f"{query} {details.strip()}".strip()
+
+
+class SearchProvider(ABC):
+    """Backend that answers a search query with a summary and its sources"""
+
+    name = "base"
+
+    @abstractmethod
+    def search(self, query: str, category: str) -> Dict[str, Any]:
+        """Return {"summary": str, "sources": [{"title", "url"}]}, plus "usage"
+        ({"input_tokens", "output_tokens", "cached_tokens"}) when a model answered"""
+
+
+class StubSearchProvider(SearchProvider):
+    """Deterministic local results; counts calls so tests can assert on cache hits"""
+
+    name = "stub"
+
+    def __init__(self, results: Optional[Dict[str, str]] = None, delay: float = 0.0):
+        self.results = {normalize_query(k): v for k, v in (results or {}).items()}
+        self.delay = delay
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query: str, category: str) -> Dict[str, Any]:
+        with self._lock:
+            self.calls += 1
+        if self.delay:
+            time.sleep(self.delay)
+        summary = self.results.get(normalize_query(query), f"[stub {category}] No live data for: {query}")
+        return {"summary": summary, "sources": []}
+
+
+class GeminiSearchProvider(SearchProvider):
+    """Gemini answer grounded on Google Search results"""
+
+    name = "gemini"
+
+    def __init__(self, model: Optional[str] = None):
+        self.model = model or os.getenv("SEARCH_MODEL", "gemini-2.5-flash")
+        self._client = None
+
+    def _get_client(self):
+        if self._client is None:
+            from google import genai
+            self._client = genai.Client()
+        return self._client
+
+    def search(self, query: str, category: str) -> Dict[str, Any]:
+        from google.genai import types
+
+        response = self._get_client().models.generate_content(
+            model=self.model,
+            contents=f"Search the web and summarise current, factual {category} information: {query}",
+            config=types.GenerateContentConfig(tools=[types.Tool(google_search=types.GoogleSearch())]),
+        )
+        sources = []
+        candidate = response.candidates[0] if response.candidates else None
+        metadata = getattr(candidate, "grounding_metadata", None)
+        for chunk in (getattr(metadata, "grounding_chunks", None) or []):
+            if chunk.web:
+                sources.append({"title": chunk.web.title, "url": chunk.web.uri})
+        result = {"summary": response.text or "", "sources": sources}
+        usage = response.usage_metadata
+        if usage is not None:
+            # Not a call of any agent's model flow, so the caller accounts for it
+            result["usage"] = {
+                "input_tokens": usage.prompt_token_count or 0,
+                "output_tokens": (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0),
+                "cached_tokens": usage.cached_content_token_count or 0,
+            }
+        return result
+
+
+class SearchCache:
+    """TTL cache in front of a provider with request coalescing
+
+    Thread-safe: tool calls from concurrent sessions may run on different
+    threads, so in-flight lookups are shared through concurrent.futures.Future.
+    """
+
+    def __init__(self, provider: SearchProvider, max_entries: int = 2000,
+                 ttls: Optional[Dict[str, int]] = None):
+        self.provider = provider
+        self.max_entries = max_entries
+        self.ttls = dict(CATEGORY_TTLS, **(ttls or {}))
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "coalesced": 0, "errors": 0}
+
+    def search(self, query: str, category: str = "general") -> Dict[str, Any]:
+        category = category if category in self.ttls else "general"
+        key = (category, normalize_query(query))
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.time():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return dict(entry[1], cached=True)
+
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = Future()
+                self._in_flight[key] = future
+                self.stats["misses"] += 1
+            else:
+                self.stats["coalesced"] += 1
+
+        if not owner:
+            return dict(future.result(), cached=True)
+
+        try:
+            result = self.provider.search(query, category)
+        except Exception as e:
+            with self._lock:
+                self._in_flight.pop(key, None)
+                self.stats["errors"] += 1
+            # Waiters see the same failure; nothing is cached
+            future.set_exception(e)
+            raise
+
+        with self._lock:
+            self._entries[key] = (time.time() + self.ttls[category], result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._in_flight.pop(key, None)
+        future.set_result(result)
+        return dict(result, cached=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+def create_search_provider() -> SearchProvider:
+    """Provider selected by SEARCH_PROVIDER ("gemini" or "stub")"""
+    if os.getenv("SEARCH_PROVIDER", "gemini").lower() == "stub":
+        return StubSearchProvider()
+    return GeminiSearchProvider()
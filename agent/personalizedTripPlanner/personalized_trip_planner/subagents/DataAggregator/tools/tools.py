@@ -0,0 +1,207 @@
+"""
+Data aggregation tools: cached destination search and precomputed travel
+distances between points of interest.
+
+Search results go through the SearchCache in search.py (per-category TTLs,
+request coalescing); SEARCH_PROVIDER=stub swaps in canned local results.
+
+Pairwise road-distance estimates (haversine x road factor) are stored per
+city as a NumPy matrix on disk and opened memory-mapped, so repeated trips
+to the same city reuse the matrix without recomputation. When new POIs show
+up only their rows/columns are computed and the matrix is extended.
+
+Layout of the cache directory, per city:
+- <city>.json              index: POI keys, coordinates and current matrix file
+- <city>.<version>.npy     float32 road-km matrix in index order
+"""
+
+import asyncio
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import Dict, List, Optional
+
+import numpy as np
+from google.adk.tools import FunctionTool, ToolContext
+from personalized_trip_planner.token_accounting import record_nested_usage
+
+from .search import CATEGORIES, SearchCache, build_query, create_search_provider
+
+EARTH_RADIUS_KM = 6371.0
+
+# Roads are rarely straight: scale great-circle distance to a road estimate
+ROAD_FACTOR = 1.3
+
+
+def haversine_km(lat_a: np.ndarray, lon_a: np.ndarray, lat_b: np.ndarray, lon_b: np.ndarray) -> np.ndarray:
+    """Great-circle distances (len(a) x len(b)) in km"""
+    lat_a, lon_a, lat_b, lon_b = map(np.radians, (lat_a, lon_a, lat_b, lon_b))
+    dlat = lat_a[:, None] - lat_b[None, :]
+    dlon = lon_a[:, None] - lon_b[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat_a[:, None]) * np.cos(lat_b[None, :]) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def _slug(city: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", city.lower()).strip("-") or "unknown"
+
+
+class _CityMatrix:
+    """In-memory view of one city's cached matrix"""
+
+    def __init__(self, keys: List[str], coords: np.ndarray, matrix: np.ndarray, version: int):
+        self.keys = keys
+        self.rows = {key: i for i, key in enumerate(keys)}
+        self.coords = coords
+        self.matrix = matrix
+        self.version = version
+
+
+class DistanceMatrixStore:
+    """Per-city road-distance matrices persisted as memory-mapped .npy files"""
+
+    def __init__(self, cache_dir: Optional[str] = None, road_factor: float = ROAD_FACTOR):
+        self.cache_dir = cache_dir or os.getenv(
+            "DISTANCE_MATRIX_CACHE_DIR",
+            os.path.join(tempfile.gettempdir(), "trip_planner_distance_matrix"),
+        )
+        self.road_factor = road_factor
+        self._cities: Dict[str, _CityMatrix] = {}
+        self._lock = threading.Lock()
+        self.stats = {"lookups": 0, "computed_pois": 0}
+
+    @staticmethod
+    def poi_key(poi: Dict) -> str:
+        """Identity of a POI: its name plus rounded coordinates"""
+        return f"{str(poi['name']).strip().lower()}@{float(poi['lat']):.5f},{float(poi['lon']):.5f}"
+
+    def _index_path(self, slug: str) -> str:
+        return os.path.join(self.cache_dir, f"{slug}.json")
+
+    def _load(self, slug: str) -> Optional[_CityMatrix]:
+        """Open a city's matrix from disk, memory-mapped"""
+        try:
+            with open(self._index_path(slug)) as f:
+                index = json.load(f)
+            matrix = np.load(os.path.join(self.cache_dir, index["matrix_file"]), mmap_mode="r")
+        except (OSError, ValueError, KeyError):
+            return None
+        return _CityMatrix(index["keys"], np.array(index["coords"], dtype=np.float64).reshape(-1, 2),
+                           matrix, index["version"])
+
+    def _extend(self, slug: str, current: Optional[_CityMatrix], new_keys: List[str],
+                new_coords: np.ndarray) -> _CityMatrix:
+        """Compute rows/columns for new POIs only and persist the extended matrix"""
+        old_n = len(current.keys) if current else 0
+        coords = np.vstack([current.coords, new_coords]) if current else new_coords
+        n = len(coords)
+
+        matrix = np.empty((n, n), dtype=np.float32)
+        if current:
+            matrix[:old_n, :old_n] = current.matrix
+        block = haversine_km(coords[:, 0], coords[:, 1], new_coords[:, 0], new_coords[:, 1]) * self.road_factor
+        matrix[:, old_n:] = block
+        matrix[old_n:, :] = block.T
+
+        version = (current.version + 1) if current else 1
+        keys = (current.keys if current else []) + new_keys
+        matrix_file = f"{slug}.{version}.npy"
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+        fd, tmp_matrix = tempfile.mkstemp(dir=self.cache_dir, suffix=".npy.tmp")
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, matrix)
+        os.replace(tmp_matrix, os.path.join(self.cache_dir, matrix_file))
+
+        fd, tmp_index = tempfile.mkstemp(dir=self.cache_dir, suffix=".json.tmp")
+        with os.fdopen(fd, "w") as f:
+            json.dump({"keys": keys, "coords": coords.tolist(), "matrix_file": matrix_file,
+                       "version": version}, f)
+        os.replace(tmp_index, self._index_path(slug))
+
+        # Readers that still map the previous version keep their inode alive
+        if current:
+            try:
+                os.remove(os.path.join(self.cache_dir, f"{slug}.{current.version}.npy"))
+            except OSError:
+                pass
+
+        self.stats["computed_pois"] += len(new_keys)
+        return _CityMatrix(keys, coords, np.load(os.path.join(self.cache_dir, matrix_file), mmap_mode="r"),
+                           version)
+
+    def road_km(self, city: str, pois: List[Dict]) -> np.ndarray:
+        """Road-distance matrix (len(pois) x len(pois)) in km, reusing cached rows"""
+        slug = _slug(city)
+        keys = [self.poi_key(poi) for poi in pois]
+
+        with self._lock:
+            self.stats["lookups"] += 1
+            entry = self._cities.get(slug)
+            # Another process may have extended the city since we last looked
+            if entry is None or any(key not in entry.rows for key in keys):
+                entry = self._load(slug) or entry
+
+            missing = {}
+            for key, poi in zip(keys, pois):
+                if (entry is None or key not in entry.rows) and key not in missing:
+                    missing[key] = (float(poi["lat"]), float(poi["lon"]))
+            if missing:
+                entry = self._extend(slug, entry, list(missing), np.array(list(missing.values())))
+            self._cities[slug] = entry
+
+            rows = np.array([entry.rows[key] for key in keys])
+            return np.asarray(entry.matrix[np.ix_(rows, rows)], dtype=np.float64)
+
+    def travel_minutes(self, city: str, pois: List[Dict], speed_kmph: float) -> np.ndarray:
+        """Travel-time matrix in minutes at an average speed"""
+        return self.road_km(city, pois) / speed_kmph * 60.0
+
+
+# Shared by every tool call in the process
+distance_matrix_store = DistanceMatrixStore()
+
+
+# Shared by every research branch and session in the process
+search_cache = SearchCache(
+    create_search_provider(),
+    max_entries=int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "2000")),
+)
+
+# Token accounting source of the provider's own model calls
+SEARCH_USAGE_SOURCE = "travel_search"
+
+async def travel_search_tool_impl(destination: str, category: str, tool_context: ToolContext,
+                                  when: str = "", details: str = "") -> dict:
+    """
+    Searches the web for current travel information about a destination.
+    Results are cached per category, so call it once per category you need.
+
+    Args:
+        destination: City or region being researched (e.g. "Jaipur, Rajasthan")
+        category: One of weather, events, advisories, safety, transport,
+            attractions, customs, currency or general
+        when: Travel dates or month; only used for weather, events and general
+        details: Optional extra keywords (e.g. "from Bangalore", "vegetarian food")
+
+    Returns:
+        dict: summary text, sources and whether the result came from the cache
+    """
+    if category not in CATEGORIES:
+        category = "general"
+    query = build_query(category, destination, when, details)
+    print(f"TOOL: Searching {category} for {destination}...")
+    try:
+        # Blocking provider call runs off the event loop so parallel branches overlap
+        result = await asyncio.to_thread(search_cache.search, query, category)
+    except Exception as e:
+        return {"success": False, "message": f"Search failed: {e}"}
+    usage = result.pop("usage", None)
+    # Cached and coalesced results were paid for by the lookup that fetched them
+    if usage and not result.get("cached"):
+        record_nested_usage(tool_context, SEARCH_USAGE_SOURCE, usage)
+    return {"success": True, "category": category, **result}
+
+travel_search_tool = FunctionTool(travel_search_tool_impl)
@@ -4,6 +4,8 @@ Optimization Agent: Optimizes itineraries based on constraints and preferences.
 
 from google.adk.agents import Agent
 
+from .tools.tools import optimize_itinerary_tool
+
 
 optimization_agent = Agent(
     name="OptimizationAgent",
@@ -12,7 +14,17 @@ optimization_agent = Agent(
     instruction="""
     You are a travel itinerary optimization specialist. Your role is to analyze and improve proposed itineraries.
     
-    When given an itinerary, optimize it by considering:
+    **Scheduling is done by the `optimize_itinerary_tool_impl` tool, not by you.** Whenever the itinerary's
+    activities can be placed on a map:
+    1. Build the list of candidate activities with name, approximate latitude/longitude, visit duration,
+       cost, opening hours, a priority (higher for activities that match the user's interests) and any
+       booking requirements. Mark activities the user insisted on with "must_visit": true.
+    2. Call `optimize_itinerary_tool_impl` once with the number of days, the daily time window, the budget
+       and the hotel location when known.
+    3. Present the returned plan as-is: keep its day assignment, order and times, and mention any
+       unscheduled activities. Do not reorder or reschedule activities yourself.
+    
+    Beyond the schedule, review the itinerary for:
     1. **Time Efficiency**: Minimize travel time between locations, group nearby activities
     2. **Cost Optimization**: Balance quality with budget, suggest cost-effective alternatives
     3. **User Preferences**: Prioritize activities that match stated interests and themes
@@ -29,5 +41,6 @@ optimization_agent = Agent(
     - Suggest alternatives for activities that might not be available
     
     Present your optimizations with clear explanations of the changes made and their benefits.
-    """
+    """,
+    tools=[optimize_itinerary_tool]
 )
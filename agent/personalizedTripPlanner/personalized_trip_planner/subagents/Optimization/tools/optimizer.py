@@ -0,0 +1,319 @@
+"""
+Itinerary optimizer: a time-windowed team orienteering solver.
+
+Activities (points of interest) carry a location, a visit duration, a cost,
+opening hours and a priority. Each day is a route that starts and ends at
+the traveler's base (hotel). The solver maximises the total priority of the
+scheduled activities subject to opening hours, the daily time window, a
+budget cap and per-day pacing limits (activities and travel minutes).
+
+1. Construction: best-ratio insertion (priority / added minutes). Every
+   route keeps per-stop wait and max-shift values, so each insertion
+   candidate is checked in O(1).
+2. Improvement: 2-opt and or-opt moves per day to cut travel time, then a
+   re-insertion pass that fills the time freed up.
+
+Travel times come from the DataAggregator distance-matrix cache when the
+city is known, so repeated trips to a city skip the pairwise computation.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from personalized_trip_planner.subagents.DataAggregator.tools.tools import (
+    ROAD_FACTOR,
+    distance_matrix_store,
+    haversine_km,
+)
+
+
+def parse_clock(value: Any, default: int) -> int:
+    """'HH:MM' (or minutes as a number) to minutes after midnight"""
+    if value is None or value == "":
+        return default
+    if isinstance(value, (int, float)):
+        return int(value)
+    hours, _, minutes = str(value).strip().partition(":")
+    return int(hours) * 60 + int(minutes or 0)
+
+
+def format_clock(minutes: float) -> str:
+    minutes = int(round(minutes))
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def travel_time_matrix(activities: List[Dict[str, Any]], base_lat: float, base_lon: float,
+                       speed_kmph: float, city: str = "") -> np.ndarray:
+    """Travel minutes between the base (index 0) and the activities (1..n)
+
+    With a city, activity-to-activity distances come from the shared on-disk
+    matrix cache; only the base row, which differs per traveler, is computed.
+    """
+    lat = np.array([float(a["lat"]) for a in activities])
+    lon = np.array([float(a["lon"]) for a in activities])
+    km = np.zeros((len(activities) + 1, len(activities) + 1))
+    if city:
+        km[1:, 1:] = distance_matrix_store.road_km(city, activities)
+    else:
+        km[1:, 1:] = haversine_km(lat, lon, lat, lon) * ROAD_FACTOR
+    base_row = haversine_km(np.array([base_lat]), np.array([base_lon]), lat, lon)[0] * ROAD_FACTOR
+    km[0, 1:] = base_row
+    km[1:, 0] = base_row
+    return km / speed_kmph * 60.0
+
+
+@dataclass
+class Problem:
+    """Activities indexed 1..n; index 0 is the base the traveler returns to each day"""
+    names: List[str]
+    duration: np.ndarray
+    cost: np.ndarray
+    opens: np.ndarray
+    latest_start: np.ndarray
+    priority: np.ndarray
+    allowed_day: np.ndarray  # -1 = any day
+    travel: np.ndarray
+    num_days: int
+    day_start: int
+    day_end: int
+    budget: float
+    max_per_day: int
+    max_travel_per_day: float
+    extras: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class Route:
+    """One day's route with the bookkeeping needed for O(1) insertion checks"""
+
+    def __init__(self, problem: Problem, day: int, stops: Optional[List[int]] = None):
+        self.p = problem
+        self.day = day
+        self.stops = stops or []
+        self.update()
+
+    def update(self) -> None:
+        """Recompute schedule, waits and max shifts after the stop list changed"""
+        p, stops = self.p, self.stops
+        k = len(stops)
+        self.start = np.zeros(k)
+        self.wait = np.zeros(k)
+        self.max_shift = np.zeros(k + 1)  # last entry: return to base
+        self.travel_minutes = 0.0
+
+        t, prev = float(p.day_start), 0
+        for i, s in enumerate(stops):
+            leg = p.travel[prev, s]
+            self.travel_minutes += leg
+            arrive = t + leg
+            self.start[i] = max(arrive, p.opens[s])
+            self.wait[i] = self.start[i] - arrive
+            t = self.start[i] + p.duration[s]
+            prev = s
+        back = p.travel[prev, 0]
+        self.travel_minutes += back
+        self.end = t + back
+
+        self.max_shift[k] = p.day_end - self.end
+        for i in range(k - 1, -1, -1):
+            s = stops[i]
+            self.max_shift[i] = min(p.latest_start[s] - self.start[i], self.wait_after(i) + self.max_shift[i + 1])
+
+    def wait_after(self, i: int) -> float:
+        return self.wait[i + 1] if i + 1 < len(self.stops) else 0.0
+
+    def feasible(self) -> bool:
+        if self.end > self.p.day_end + 1e-6:
+            return False
+        if self.travel_minutes > self.p.max_travel_per_day + 1e-6:
+            return False
+        return all(self.start[i] <= self.p.latest_start[s] + 1e-6 for i, s in enumerate(self.stops))
+
+    def best_insertion(self, j: int):
+        """Cheapest feasible position for activity j as (added_minutes, position), or None"""
+        p, stops = self.p, self.stops
+        if len(stops) >= p.max_per_day or (p.allowed_day[j] >= 0 and p.allowed_day[j] != self.day):
+            return None
+
+        best = None
+        prev, prev_end = 0, float(p.day_start)
+        for pos in range(len(stops) + 1):
+            nxt = stops[pos] if pos < len(stops) else 0
+            detour = p.travel[prev, j] + p.travel[j, nxt] - p.travel[prev, nxt]
+            if self.travel_minutes + detour <= p.max_travel_per_day:
+                start_j = max(prev_end + p.travel[prev, j], p.opens[j])
+                if start_j <= p.latest_start[j]:
+                    shift = start_j - prev_end - p.travel[prev, j] + detour + p.duration[j]
+                    slack = (self.wait[pos] + self.max_shift[pos]) if pos < len(stops) else self.max_shift[pos]
+                    if shift <= slack and (best is None or shift < best[0]):
+                        best = (shift, pos)
+            if pos < len(stops):
+                prev = stops[pos]
+                prev_end = self.start[pos] + p.duration[prev]
+        return best
+
+    def insert(self, j: int, pos: int) -> None:
+        self.stops.insert(pos, j)
+        self.update()
+
+    def try_stops(self, stops: List[int]) -> bool:
+        """Adopt a new stop order if it is feasible and saves travel time"""
+        candidate = Route(self.p, self.day, stops)
+        if candidate.feasible() and candidate.travel_minutes < self.travel_minutes - 1e-6:
+            self.stops = candidate.stops
+            self.update()
+            return True
+        return False
+
+
+class ItineraryOptimizer:
+    """Greedy insertion followed by local search"""
+
+    def __init__(self, problem: Problem, max_rounds: int = 20):
+        self.p = problem
+        self.max_rounds = max_rounds
+        self.routes = [Route(problem, day) for day in range(problem.num_days)]
+        self.unvisited = set(range(1, len(problem.names) + 1))
+        self.spent = 0.0
+
+    def _affordable(self, j: int) -> bool:
+        return self.p.budget <= 0 or self.spent + self.p.cost[j] <= self.p.budget + 1e-6
+
+    def insert_greedy(self) -> None:
+        """Insert activities by best priority per added minute until nothing fits"""
+        # Best insertion per (activity, day), refreshed only for the day that changed
+        cache = {(j, r.day): r.best_insertion(j) for j in self.unvisited for r in self.routes}
+        while True:
+            best = None
+            for j in self.unvisited:
+                if not self._affordable(j):
+                    continue
+                for r in self.routes:
+                    option = cache.get((j, r.day))
+                    if option is None:
+                        continue
+                    ratio = self.p.priority[j] ** 2 / (option[0] + 1.0)
+                    if best is None or ratio > best[0]:
+                        best = (ratio, j, r, option[1])
+            if best is None:
+                return
+            _, j, route, pos = best
+            route.insert(j, pos)
+            self.unvisited.discard(j)
+            self.spent += self.p.cost[j]
+            for k in self.unvisited:
+                cache[(k, route.day)] = route.best_insertion(k)
+
+    @staticmethod
+    def _two_opt(route: Route) -> bool:
+        stops = route.stops
+        for i in range(len(stops) - 1):
+            for k in range(i + 1, len(stops)):
+                if route.try_stops(stops[:i] + stops[i:k + 1][::-1] + stops[k + 1:]):
+                    return True
+        return False
+
+    @staticmethod
+    def _or_opt(route: Route) -> bool:
+        stops = route.stops
+        for seg_len in (1, 2, 3):
+            for i in range(len(stops) - seg_len + 1):
+                segment = stops[i:i + seg_len]
+                rest = stops[:i] + stops[i + seg_len:]
+                for pos in range(len(rest) + 1):
+                    if pos == i:
+                        continue
+                    if route.try_stops(rest[:pos] + segment + rest[pos:]):
+                        return True
+        return False
+
+    def improve(self) -> None:
+        """Shorten every day with 2-opt/or-opt, then refill the freed time"""
+        for _ in range(self.max_rounds):
+            improved = False
+            for route in self.routes:
+                while self._two_opt(route) or self._or_opt(route):
+                    improved = True
+            before = len(self.unvisited)
+            self.insert_greedy()
+            if not improved and len(self.unvisited) == before:
+                return
+
+    def solve(self) -> Dict[str, Any]:
+        started = time.perf_counter()
+        self.insert_greedy()
+        self.improve()
+        return self.to_plan((time.perf_counter() - started) * 1000)
+
+    def to_plan(self, solve_ms: float) -> Dict[str, Any]:
+        p = self.p
+        days = []
+        for route in self.routes:
+            stops, prev = [], 0
+            for i, s in enumerate(route.stops):
+                stop = {
+                    "name": p.names[s - 1],
+                    "travel_minutes": round(float(p.travel[prev, s])),
+                    "start": format_clock(route.start[i]),
+                    "end": format_clock(route.start[i] + p.duration[s]),
+                    "cost": float(p.cost[s]),
+                }
+                stop.update(p.extras[s - 1])
+                stops.append(stop)
+                prev = s
+            days.append({
+                "day": route.day + 1,
+                "stops": stops,
+                "return_to_base": format_clock(route.end) if route.stops else None,
+                "travel_minutes": round(route.travel_minutes),
+                "cost": float(sum(p.cost[s] for s in route.stops)),
+            })
+        return {
+            "days": days,
+            "unscheduled": [p.names[j - 1] for j in sorted(self.unvisited)],
+            "total_cost": float(self.spent),
+            "total_travel_minutes": sum(d["travel_minutes"] for d in days),
+            "solve_ms": round(solve_ms, 2),
+        }
+
+
+# Activity keys copied verbatim into the plan
+PASSTHROUGH_KEYS = ("booking_required", "booking_type", "type", "description")
+
+
+def build_problem(activities: List[Dict[str, Any]], num_days: int, day_start: str, day_end: str,
+                  budget: float, max_activities_per_day: int, max_travel_minutes_per_day: float,
+                  base: Optional[Dict[str, float]], speed_kmph: float, city: str = "") -> Problem:
+    """Convert activity dicts into solver arrays (index 0 is the base)"""
+    if base and "lat" in base and "lon" in base:
+        base_lat, base_lon = float(base["lat"]), float(base["lon"])
+    else:
+        base_lat = float(np.mean([float(a["lat"]) for a in activities]))
+        base_lon = float(np.mean([float(a["lon"]) for a in activities]))
+
+    travel = travel_time_matrix(activities, base_lat, base_lon, speed_kmph, city)
+
+    duration = np.r_[0.0, [float(a.get("duration_minutes", 60)) for a in activities]]
+    opens = np.r_[0.0, [parse_clock(a.get("opens"), 0) for a in activities]]
+    closes = np.r_[24 * 60.0, [parse_clock(a.get("closes"), 24 * 60 - 1) for a in activities]]
+
+    return Problem(
+        names=[str(a["name"]) for a in activities],
+        duration=duration,
+        cost=np.r_[0.0, [float(a.get("cost", 0) or 0) for a in activities]],
+        opens=opens,
+        latest_start=closes - duration,
+        priority=np.r_[0.0, [float(a.get("priority", 1.0)) + (10.0 if a.get("must_visit") else 0.0)
+                             for a in activities]],
+        allowed_day=np.r_[-1, [int(a["day"]) - 1 if a.get("day") else -1 for a in activities]].astype(int),
+        travel=travel,
+        num_days=max(int(num_days), 1),
+        day_start=parse_clock(day_start, 9 * 60),
+        day_end=parse_clock(day_end, 20 * 60),
+        budget=float(budget or 0),
+        max_per_day=max(int(max_activities_per_day), 1),
+        max_travel_per_day=float(max_travel_minutes_per_day) if max_travel_minutes_per_day else float("inf"),
+        extras=[{k: a[k] for k in PASSTHROUGH_KEYS if k in a} for a in activities],
+    )
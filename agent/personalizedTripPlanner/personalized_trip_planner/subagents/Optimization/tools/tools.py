@@ -0,0 +1,71 @@
+"""
+Optimization tools implementation for the optimization agent.
+"""
+
+from google.adk.tools import FunctionTool
+
+from .optimizer import ItineraryOptimizer, build_problem
+
+def optimize_itinerary_tool_impl(
+    activities: list[dict],
+    num_days: int,
+    city: str = "",
+    day_start: str = "09:00",
+    day_end: str = "20:00",
+    budget: float = 0,
+    max_activities_per_day: int = 6,
+    max_travel_minutes_per_day: int = 240,
+    base_lat: float = 0,
+    base_lon: float = 0,
+    speed_kmph: float = 25,
+) -> dict:
+    """
+    Schedule activities into an optimized day-by-day plan.
+
+    Picks and orders activities to maximise their total priority while respecting
+    opening hours, visit durations, the daily time window, the budget cap and
+    per-day pacing limits, and minimising travel between locations.
+
+    Args:
+        activities: Candidate activities. Each needs "name", "lat" and "lon"; optional
+            keys are "duration_minutes" (default 60), "cost" (INR), "opens" and "closes"
+            ("HH:MM"), "priority" (default 1.0), "must_visit" (bool), "day" (pin to a
+            1-based day), "booking_required", "booking_type", "type" and "description".
+        num_days: Number of days in the trip
+        city: City the activities are in; enables the shared travel-time cache
+        day_start: Time the traveler leaves the base each day ("HH:MM")
+        day_end: Time the traveler must be back at the base ("HH:MM")
+        budget: Maximum total spend on activities in INR (0 = no cap)
+        max_activities_per_day: Pacing limit on activities per day
+        max_travel_minutes_per_day: Pacing limit on travel per day
+        base_lat: Latitude of the hotel/base (0 = centre of the activities)
+        base_lon: Longitude of the hotel/base (0 = centre of the activities)
+        speed_kmph: Average local travel speed
+
+    Returns:
+        dict: Plan with per-day stops (start/end times, travel minutes, cost),
+        unscheduled activities, totals and the solve time in milliseconds
+    """
+    if not activities:
+        return {"success": False, "message": "No activities to optimize"}
+
+    try:
+        problem = build_problem(
+            activities,
+            num_days=num_days,
+            day_start=day_start,
+            day_end=day_end,
+            budget=budget,
+            max_activities_per_day=max_activities_per_day,
+            max_travel_minutes_per_day=max_travel_minutes_per_day,
+            base={"lat": base_lat, "lon": base_lon} if base_lat or base_lon else None,
+            speed_kmph=speed_kmph,
+            city=city,
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        return {"success": False, "message": f"Invalid activity data: {e}"}
+
+    plan = ItineraryOptimizer(problem).solve()
+    return {"success": True, "message": "Itinerary optimized", "plan": plan}
+
+optimize_itinerary_tool = FunctionTool(optimize_itinerary_tool_impl)
@@ -4,10 +4,18 @@ Personalization Agent: Personalizes recommendations based on user profile and pr
 
 from google.adk.agents import Agent
 
+from . import prompt
+from .tools.tools import rank_candidates_tool, record_feedback_tool, update_user_profile_tool
+
 
 personalization_agent = Agent(
     name="PersonalizationAgent",
     model="gemini-2.5-flash",
     description="Personalizes travel recommendations based on user profile, preferences, and past behavior.",
-    instruction="Analyze the user's profile, interests, and preferences to personalize travel recommendations, activities, and experiences that match their unique travel style and interests."
+    instruction=prompt.PERSONALIZATION_AGENT_INSTR,
+    tools=[
+        update_user_profile_tool,
+        rank_candidates_tool,
+        record_feedback_tool,
+    ]
 )
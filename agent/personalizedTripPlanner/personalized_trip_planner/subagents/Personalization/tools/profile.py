@@ -0,0 +1,103 @@
+"""
+User-profile feature store for personalization.
+
+Each user's profile lives in session state under PROFILE_KEY. Agent
+sessions come from a shared pool, so the backend keeps the per-user copy
+and seeds it into new sessions (see personalized_trip_planner.profile_sync):
+- interests: catalog tag -> weight; stated interests start at 1.0 and
+  accepted/rejected suggestions move the weights of their tags
+- budget_per_day / budget_band: spend per traveler per day in INR and the
+  band it falls in (budget, mid, premium)
+- past_trips: destinations already visited
+- accepted / rejected: latest suggestions the user took up or turned down,
+  with the tags that drive the feedback similarity feature
+- weights: the user's scoring weights, learned from that feedback
+"""
+
+from typing import Any, Dict, List, Optional
+
+from personalized_trip_planner.profile_sync import PROFILE_KEY
+
+# Upper bound of each band's spend per traveler per day in INR
+BUDGET_BANDS = {"budget": 2500, "mid": 6000, "premium": 15000}
+
+# Feedback kept per list; older entries stop influencing the scores
+MAX_FEEDBACK = 50
+MAX_PAST_TRIPS = 50
+
+# How much one accepted or rejected suggestion moves its tags' interest weights
+ACCEPT_INTEREST_STEP = 0.2
+REJECT_INTEREST_STEP = 0.1
+
+
+def budget_band(budget_per_day: float) -> str:
+    for band, ceiling in BUDGET_BANDS.items():
+        if budget_per_day <= ceiling:
+            return band
+    return "premium"
+
+
+def empty_profile() -> Dict[str, Any]:
+    return {
+        "interests": {},
+        "budget_per_day": 0,
+        "budget_band": "",
+        "past_trips": [],
+        "accepted": [],
+        "rejected": [],
+        "weights": {},
+    }
+
+
+def load_profile(state) -> Dict[str, Any]:
+    """A copy of the stored profile; save_profile() must be called for changes to persist"""
+    stored = state.get(PROFILE_KEY) or {}
+    profile = empty_profile()
+    profile.update({key: value for key, value in stored.items() if key in profile})
+    for key in ("interests", "weights"):
+        profile[key] = dict(profile[key])
+    for key in ("past_trips", "accepted", "rejected"):
+        profile[key] = list(profile[key])
+    return profile
+
+
+def save_profile(state, profile: Dict[str, Any]) -> None:
+    # Assign a new dict so the change is recorded in the event's state delta
+    state[PROFILE_KEY] = dict(profile)
+
+
+def update_profile(profile: Dict[str, Any], interests: Optional[List[str]] = None,
+                   budget_per_day: float = 0, budget_band_name: str = "",
+                   past_trips: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Merge explicitly stated preferences into a profile (interests already resolved to tags)"""
+    for tag in interests or []:
+        profile["interests"][tag] = max(profile["interests"].get(tag, 0.0), 1.0)
+    if budget_per_day and budget_per_day > 0:
+        profile["budget_per_day"] = float(budget_per_day)
+        profile["budget_band"] = budget_band(budget_per_day)
+    elif budget_band_name in BUDGET_BANDS:
+        profile["budget_band"] = budget_band_name
+    for trip in past_trips or []:
+        if trip and trip not in profile["past_trips"]:
+            profile["past_trips"].append(trip)
+    profile["past_trips"] = profile["past_trips"][-MAX_PAST_TRIPS:]
+    return profile
+
+
+def add_feedback(profile: Dict[str, Any], name: str, tags: List[str], accepted: bool) -> Dict[str, Any]:
+    """Record an accepted or rejected suggestion and shift interest weights towards or away from it"""
+    kept, dropped = ("accepted", "rejected") if accepted else ("rejected", "accepted")
+    # Repeating the same answer does not move the interests again
+    repeated = any(entry["name"] == name for entry in profile[kept])
+    # A later answer about the same suggestion replaces the earlier one
+    profile[dropped] = [entry for entry in profile[dropped] if entry["name"] != name]
+    profile[kept] = [entry for entry in profile[kept] if entry["name"] != name]
+    profile[kept] = (profile[kept] + [{"name": name, "tags": tags}])[-MAX_FEEDBACK:]
+
+    for tag in [] if repeated else tags:
+        weight = profile["interests"].get(tag, 0.0)
+        if accepted:
+            profile["interests"][tag] = min(weight + ACCEPT_INTEREST_STEP, 2.0)
+        else:
+            profile["interests"][tag] = max(weight - REJECT_INTEREST_STEP, 0.0)
+    return profile
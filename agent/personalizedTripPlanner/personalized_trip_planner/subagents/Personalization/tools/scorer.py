@@ -0,0 +1,211 @@
+"""
+Vectorized re-ranking of candidate destinations and activities for a user.
+
+Candidates and the user profile are embedded in the destination catalog's
+interest-tag space, and a whole batch of candidates is scored with one
+matrix product of its feature matrix and the user's weights over:
+interest (cosine similarity of candidate tags and profile interests),
+budget fit, feedback (similarity to accepted minus rejected suggestions),
+novelty (not a past trip) and popularity.
+
+Weights start at DEFAULT_WEIGHTS and are learned per user: every accepted
+or rejected suggestion is one logistic-regression step on its features.
+"""
+
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from personalized_trip_planner.subagents.destinationSuggester.tools.catalog import (
+    DESTINATIONS, INTEREST_SYNONYMS, INTEREST_TAGS,
+)
+
+from .profile import BUDGET_BANDS
+
+# Order matches the columns built in PersonalizationScorer.features
+FEATURES = ["interest", "budget", "feedback", "novelty", "popularity"]
+
+DEFAULT_WEIGHTS = {
+    "interest": 0.45,
+    "budget": 0.20,
+    "feedback": 0.15,
+    "novelty": 0.10,
+    "popularity": 0.10,
+}
+
+# Words in activity titles and descriptions that signal a catalog tag
+ACTIVITY_KEYWORDS = {
+    "fort": "heritage", "palace": "heritage", "church": "heritage", "ruins": "history",
+    "museum": "history", "temple": "spiritual", "monastery": "spiritual", "ghat": "spiritual",
+    "market": "shopping", "bazaar": "shopping", "hike": "trekking", "waterfall": "nature",
+    "falls": "nature", "garden": "nature", "lake": "nature", "plantation": "nature",
+    "spa": "relaxation", "cruise": "relaxation", "houseboat": "backwaters", "rafting": "adventure",
+    "scuba": "adventure", "dive": "adventure", "paragliding": "adventure", "bouldering": "adventure",
+    "club": "nightlife", "pub": "nightlife", "thali": "food", "food walk": "food", "cafe": "food",
+    "sunset": "photography", "viewpoint": "photography", "dunes": "desert", "camel": "desert",
+}
+
+# Share of a day's budget a single activity may take before it counts as expensive
+ACTIVITY_BUDGET_SHARE = 0.35
+
+LEARNING_RATE = 0.1
+# Steepness of the logistic link between score and acceptance
+LOGIT_SCALE = 6.0
+MIN_WEIGHT = 0.01
+
+
+_NUMBER = re.compile(r"-?\d[\d,]*(?:\.\d+)?")
+
+
+def _number(value: Any) -> float:
+    """A number the model filled in: 4.5, "4.5", "₹1,500"; NaN when there is none"""
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _NUMBER.search(value) if isinstance(value, str) else None
+    return float(match.group().replace(",", "")) if match else np.nan
+
+
+def _unit_rows(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+
+class PersonalizationScorer:
+    """Feature extraction and batched scoring of candidates against a profile"""
+
+    def __init__(self, destinations: List[Dict] = DESTINATIONS):
+        self._tag_columns = {tag: j for j, tag in enumerate(INTEREST_TAGS)}
+        self._catalog = {d["name"].lower(): d for d in destinations}
+
+        keywords = {tag: tag for tag in INTEREST_TAGS}
+        keywords.update(INTEREST_SYNONYMS)
+        keywords.update(ACTIVITY_KEYWORDS)
+        self._keywords = keywords
+        # Longest first, so "street food" wins over "food"; prefixes match plurals
+        self._keyword_pattern = re.compile(
+            r"\b(" + "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + r")"
+        )
+        # Candidate texts repeat across requests (same activities, same places)
+        self._text_tags = lru_cache(maxsize=4096)(self._extract_tags)
+
+    def _extract_tags(self, text: str) -> Tuple[str, ...]:
+        return tuple(dict.fromkeys(self._keywords[k] for k in self._keyword_pattern.findall(text.lower())))
+
+    def resolve_tags(self, values: List[str]) -> List[str]:
+        """Catalog tags for free-form interests or candidate tags"""
+        if isinstance(values, str):
+            values = [values]
+        elif not isinstance(values, (list, tuple)):
+            values = []
+        tags = []
+        for value in values:
+            text = str(value).lower().strip()
+            tag = self._keywords.get(text)
+            if tag is None:
+                match = self._keyword_pattern.search(text)
+                tag = self._keywords[match.group(1)] if match else None
+            if tag and tag not in tags:
+                tags.append(tag)
+        return tags
+
+    def candidate_tags(self, candidate: Dict[str, Any]) -> List[str]:
+        """Tags given with the candidate, else the catalog's, else keywords in its text"""
+        if candidate.get("tags"):
+            return self.resolve_tags(candidate["tags"])
+        known = self._catalog.get(str(candidate.get("name", "")).lower())
+        if known:
+            return list(known["tags"])
+        get = candidate.get
+        return list(self._text_tags(f"{get('name') or ''} {get('title') or ''} {get('description') or ''} {get('type') or ''}"))
+
+    def tag_matrix(self, tag_lists: List[List[str]]) -> np.ndarray:
+        matrix = np.zeros((len(tag_lists), len(INTEREST_TAGS)))
+        rows = [i for i, tags in enumerate(tag_lists) for _ in tags]
+        columns = [self._tag_columns[tag] for tags in tag_lists for tag in tags]
+        matrix[rows, columns] = 1.0
+        return matrix
+
+    def _feedback_centroid(self, entries: List[Dict[str, Any]]) -> np.ndarray:
+        if not entries:
+            return np.zeros(len(INTEREST_TAGS))
+        return _unit_rows(_unit_rows(self.tag_matrix([e.get("tags", []) for e in entries])).mean(axis=0))
+
+    def features(self, candidates: List[Dict[str, Any]], profile: Dict[str, Any]) -> Tuple[np.ndarray, List[List[str]]]:
+        """Feature matrix (candidates x FEATURES), every column in [0, 1], and each candidate's tags"""
+        n = len(candidates)
+        tag_lists = [self.candidate_tags(candidate) for candidate in candidates]
+        tags = _unit_rows(self.tag_matrix(tag_lists))
+
+        interests = np.zeros(len(INTEREST_TAGS))
+        for tag, weight in profile.get("interests", {}).items():
+            if tag in self._tag_columns:
+                interests[self._tag_columns[tag]] = weight
+        interest = tags @ _unit_rows(interests) if interests.any() else np.full(n, 0.5)
+
+        accepted = self._feedback_centroid(profile.get("accepted", []))
+        rejected = self._feedback_centroid(profile.get("rejected", []))
+        feedback = np.clip(0.5 + 0.5 * (tags @ accepted - tags @ rejected), 0.0, 1.0)
+
+        # One pass over the candidates for the per-item fields, then array math only
+        visited = {str(trip).lower() for trip in profile.get("past_trips", [])}
+        daily, single, novelty, popularity = np.full((4, n), np.nan)
+        for i, candidate in enumerate(candidates):
+            name = str(candidate.get("name", "")).lower()
+            known = self._catalog.get(name, {})
+            # Model-filled fields may be missing, null or text such as "₹1,500"
+            daily[i] = _number(candidate.get("cost_per_day"))
+            if np.isnan(daily[i]):
+                daily[i] = known.get("cost_per_day", np.nan)
+            single[i] = _number(candidate.get("cost"))
+            novelty[i] = name not in visited
+            popularity[i] = _number(candidate.get("popularity"))
+            if np.isnan(popularity[i]):
+                popularity[i] = _number(candidate.get("rating")) / 5.0
+            if np.isnan(popularity[i]):
+                popularity[i] = known.get("popularity", 0.5)
+
+        # Destinations are compared per day, activities against a share of the day
+        budget_per_day = profile.get("budget_per_day") or BUDGET_BANDS.get(profile.get("budget_band", ""), 0)
+        if budget_per_day:
+            ratio = np.where(np.isnan(daily), single / (budget_per_day * ACTIVITY_BUDGET_SHARE), daily / budget_per_day)
+            budget = np.where(ratio <= 1.0, 1.0, np.clip(1.0 - 2.0 * (ratio - 1.0), 0.0, 1.0))
+            budget = np.where(np.isnan(ratio), 0.5, budget)
+        else:
+            budget = np.full(n, 0.5)
+
+        return np.column_stack([interest, budget, feedback, novelty, np.clip(popularity, 0.0, 1.0)]), tag_lists
+
+    @staticmethod
+    def weights(profile: Dict[str, Any]) -> np.ndarray:
+        weights = dict(DEFAULT_WEIGHTS)
+        weights.update({k: float(v) for k, v in (profile.get("weights") or {}).items() if k in weights})
+        return np.array([weights[f] for f in FEATURES])
+
+    def rank(self, candidates: List[Dict[str, Any]], profile: Dict[str, Any],
+             limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Candidates best first, each with its score and the profile interests it matches"""
+        candidates = [c for c in candidates if isinstance(c, dict) and c.get("name")]
+        if not candidates:
+            return []
+        features, tag_lists = self.features(candidates, profile)
+        scores = features @ self.weights(profile)
+        order = np.argsort(-scores, kind="stable")[:limit]
+        interests = profile.get("interests", {})
+        return [
+            {**candidates[i], "score": round(float(scores[i]), 4),
+             "matched_interests": [tag for tag in tag_lists[i] if interests.get(tag, 0) > 0]}
+            for i in order
+        ]
+
+    def learn(self, profile: Dict[str, Any], candidate: Dict[str, Any], accepted: bool) -> Dict[str, float]:
+        """One logistic-regression step on the user's weights for a piece of feedback"""
+        features = self.features([candidate], profile)[0][0]
+        weights = self.weights(profile)
+        predicted = 1.0 / (1.0 + np.exp(-LOGIT_SCALE * (features @ weights - 0.5)))
+        # Centered features: what the candidate had more of than average gains or loses weight
+        weights = weights + LEARNING_RATE * (float(accepted) - predicted) * (features - 0.5)
+        weights = np.maximum(weights, MIN_WEIGHT)
+        weights = weights / weights.sum()
+        return {feature: round(float(w), 4) for feature, w in zip(FEATURES, weights)}
@@ -0,0 +1,76 @@
+"""
+Personalization tools: the user's profile feature store and the re-ranker.
+"""
+
+from google.adk.tools import FunctionTool
+from google.adk.tools.tool_context import ToolContext
+
+from .profile import add_feedback, load_profile, save_profile, update_profile
+from .scorer import PersonalizationScorer
+
+# Built once per process; re-ranking is a single batched matrix product
+_scorer = PersonalizationScorer()
+
+def update_user_profile_tool_impl(interests: list[str], budget_per_day: float, budget_band: str,
+                                  past_trips: list[str], tool_context: ToolContext) -> dict:
+    """
+    Store what the user has said about themselves in their personalization profile.
+    The profile is kept across the user's sessions.
+
+    Args:
+        interests: Interests or travel styles the user mentioned (heritage, beach, food, ...); [] if none
+        budget_per_day: Spend per traveler per day in INR; 0 if unknown
+        budget_band: "budget", "mid" or "premium" when only a rough level is known; "" otherwise
+        past_trips: Destinations the user has already visited; [] if none
+    """
+    profile = update_profile(
+        load_profile(tool_context.state),
+        interests=_scorer.resolve_tags(interests),
+        budget_per_day=budget_per_day,
+        budget_band_name=budget_band,
+        past_trips=past_trips,
+    )
+    save_profile(tool_context.state, profile)
+    return {"profile": profile}
+
+update_user_profile_tool = FunctionTool(update_user_profile_tool_impl)
+
+def rank_candidates_tool_impl(candidates: list[dict], limit: int, tool_context: ToolContext) -> dict:
+    """
+    Re-rank candidate destinations or activities for this user, best first.
+
+    Args:
+        candidates: Items to rank, each with a "name" and optionally "tags", "description",
+            "type", "cost" (per traveler, INR), "cost_per_day" and "rating" (0-5)
+        limit: Maximum number of items to return; 0 returns all
+
+    Returns:
+        dict: ranked items with a "score" and the "matched_interests" behind it
+    """
+    profile = load_profile(tool_context.state)
+    try:
+        ranked = _scorer.rank(candidates, profile, limit=int(limit) or None)
+    except Exception as e:
+        return {"success": False, "error": f"Could not rank the candidates: {e}"}
+    return {"ranked": ranked, "budget_band": profile["budget_band"]}
+
+rank_candidates_tool = FunctionTool(rank_candidates_tool_impl)
+
+def record_feedback_tool_impl(candidate: dict, accepted: bool, tool_context: ToolContext) -> dict:
+    """
+    Record that the user accepted or rejected a suggestion, so future rankings adapt.
+
+    Args:
+        candidate: The suggestion as it was ranked (at least its "name")
+        accepted: True if the user liked or chose it, False if they turned it down
+    """
+    if not candidate.get("name"):
+        return {"success": False, "message": "The candidate needs a name"}
+    profile = load_profile(tool_context.state)
+    # Learn from the features the suggestion had when it was made
+    profile["weights"] = _scorer.learn(profile, candidate, accepted)
+    add_feedback(profile, candidate["name"], _scorer.candidate_tags(candidate), accepted)
+    save_profile(tool_context.state, profile)
+    return {"success": True, "weights": profile["weights"], "interests": profile["interests"]}
+
+record_feedback_tool = FunctionTool(record_feedback_tool_impl)
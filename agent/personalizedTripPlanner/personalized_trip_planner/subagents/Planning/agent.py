@@ -3,46 +3,153 @@
 3. Takes a confirmed destination and generates multiple optimal itinerary candidates using 
 data aggregation and constraint optimization.
 """
-from google.adk.agents import Agent
+import os
+
+from google.adk.agents import Agent, ParallelAgent, SequentialAgent
+from google.adk.agents.callback_context import CallbackContext
 from google.adk.tools.agent_tool import AgentTool
-from personalized_trip_planner.subagents.DataAggregator import data_aggregator_agent
+from personalized_trip_planner.subagents.DataAggregator import create_research_agent, data_aggregator_agent
 from personalized_trip_planner.subagents.Optimization import optimization_agent
+from personalized_trip_planner.subagents.Planning import prompt
+from personalized_trip_planner.subagents.Planning.optimize import optimize_option
+from personalized_trip_planner.subagents.Planning.schema import Itinerary, json_candidates
+from pydantic import ValidationError
+
+# "parallel" fans research and option drafting out concurrently;
+# "sequential" keeps the single agent that calls its helpers one at a time.
+PLANNING_EXECUTION_MODE = os.getenv("PLANNING_EXECUTION_MODE", "parallel")
+
+# Focus of each itinerary option drafted side by side
+ITINERARY_OPTION_FOCUSES = [
+    "The closest match to the user's stated interests and theme.",
+    "Best value: the most experiences for the budget, favouring free and low-cost highlights.",
+    "A contrasting theme (e.g. food, adventure or relaxation) that still fits the user's constraints.",
+]
+
+# Where the sequential planner's reply is kept until its options are collected
+PLANNING_REPLY_KEY = "temp:planning_reply"
+
 
+def optimize_itinerary_options(callback_context: CallbackContext) -> None:
+    """Run the route optimizer over every drafted option before it is presented."""
+    for i in range(1, len(ITINERARY_OPTION_FOCUSES) + 1):
+        option = callback_context.state.get(f"itinerary_option_{i}")
+        if isinstance(option, dict):
+            callback_context.state[f"itinerary_option_{i}"] = optimize_option(option)
 
-planning_agent = Agent(
-    name="PlanningAgent",
-    model="gemini-2.5-flash",
-    description="Creates detailed, optimized itineraries for a given destination.",
-    instruction="""
-    You are a travel planning expert. Generate detailed, day-by-day itineraries for the user's chosen destination.
-    
-    Your response should include:
-    1. Multiple itinerary options (2-3) with different focuses (heritage, food, adventure, etc.)
-    2. Each itinerary should be structured with:
-       - Day-by-day breakdown
-       - Specific activities with time slots
-       - Estimated costs for each activity
-       - Booking requirements (mark activities that need advance booking)
-       - Transportation details
-       - Accommodation suggestions
-       - Restaurant recommendations
-    
-    3. For each activity that requires booking, mark it with 'booking_required: true' and provide:
-       - Activity name
-       - Date and time
-       - Duration
-       - Estimated cost
-       - Booking type (hotel, flight, tour, restaurant reservation, etc.)
-    
-    4. Present the itineraries in a clear, numbered format for easy selection.
-    5. Include a total budget estimate for each itinerary option.
-    
-    Make sure the itineraries are realistic, well-paced, and align with the user's stated preferences, budget, and travel dates.
-    
-    Use the data_aggregator_agent to gather relevant information about the destination, and the optimization_agent to refine the itineraries.
-    """,
-    tools=[
-        AgentTool(agent=data_aggregator_agent),
-        AgentTool(agent=optimization_agent),
+
+def collect_itinerary_options(callback_context: CallbackContext) -> None:
+    """Publish the structured options as state["itinerary"] for booking and the backend."""
+    options = [
+        callback_context.state.get(f"itinerary_option_{i}")
+        for i in range(1, len(ITINERARY_OPTION_FOCUSES) + 1)
     ]
-)
+    callback_context.state["itinerary"] = {"options": [o for o in options if isinstance(o, dict)]}
+
+
+def collect_planned_itineraries(callback_context: CallbackContext) -> None:
+    """Publish the options in the sequential planner's JSON block as state["itinerary"]."""
+    options = []
+    for candidate in json_candidates(str(callback_context.state.get(PLANNING_REPLY_KEY) or "")):
+        if isinstance(candidate, dict):
+            candidate = candidate.get("options", [candidate])
+        if not isinstance(candidate, list):
+            continue
+        for item in candidate:
+            try:
+                options.append(Itinerary.model_validate(item).model_dump(exclude_none=True))
+            except ValidationError:
+                continue
+        if options:
+            break
+    callback_context.state["itinerary"] = {"options": options}
+
+
+def create_sequential_planning_agent() -> Agent:
+    """Single planning agent that calls data aggregation and optimization in turn."""
+    return Agent(
+        name="PlanningAgent",
+        model="gemini-2.5-flash",
+        description="Creates detailed, optimized itineraries for a given destination.",
+        instruction=prompt.PLANNING_AGENT_INSTR,
+        tools=[
+            AgentTool(agent=data_aggregator_agent),
+            AgentTool(agent=optimization_agent),
+        ],
+        output_key=PLANNING_REPLY_KEY,
+        after_agent_callback=collect_planned_itineraries,
+    )
+
+
+def create_parallel_planning_agent() -> SequentialAgent:
+    """
+    Planning pipeline whose independent branches run concurrently:
+    1. destination research split into parallel branches over the cached search tool
+    2. itinerary options drafted in parallel from the shared research, each
+       constrained to the Itinerary schema
+    3. the route optimizer re-ordering each option's sightseeing (no model call)
+    4. a final agent merging the options into one numbered answer; the
+       structured options are kept in state["itinerary"]
+    Wall-clock time follows the slowest branch of each stage, not the sum.
+    """
+    research = ParallelAgent(
+        name="DestinationResearch",
+        sub_agents=[
+            create_research_agent(
+                "ConditionsResearch",
+                {"Weather conditions and forecasts for the travel dates": "weather",
+                 "Local events, festivals, or special occasions during the travel period": "events",
+                 "Current travel advisories or restrictions": "advisories",
+                 "Safety information and areas to avoid": "safety"},
+                output_key="research_conditions",
+            ),
+            create_research_agent(
+                "LogisticsResearch",
+                {"Transportation options (flights, trains, buses, local transport)": "transport",
+                 "Currency, language, and communication details": "currency"},
+                output_key="research_logistics",
+            ),
+            create_research_agent(
+                "AttractionsResearch",
+                {"Popular attractions, restaurants, and activities": "attractions",
+                 "Cultural norms, local customs, and practical travel tips": "customs"},
+                output_key="research_attractions",
+            ),
+        ],
+    )
+
+    options = ParallelAgent(
+        name="ItineraryOptions",
+        sub_agents=[
+            Agent(
+                name=f"ItineraryOption{i}",
+                model="gemini-2.5-flash",
+                description=f"Drafts itinerary option {i}.",
+                instruction=prompt.ITINERARY_OPTION_INSTR.format(focus=focus),
+                output_schema=Itinerary,
+                output_key=f"itinerary_option_{i}",
+            )
+            for i, focus in enumerate(ITINERARY_OPTION_FOCUSES, 1)
+        ],
+    )
+
+    merger = Agent(
+        name="ItineraryPresenter",
+        model="gemini-2.5-flash",
+        description="Merges the drafted itinerary options into a numbered list.",
+        instruction=prompt.ITINERARY_MERGER_INSTR,
+        before_agent_callback=optimize_itinerary_options,
+        after_agent_callback=collect_itinerary_options,
+    )
+
+    return SequentialAgent(
+        name="PlanningAgent",
+        description="Creates detailed, optimized itineraries for a given destination.",
+        sub_agents=[research, options, merger],
+    )
+
+
+if PLANNING_EXECUTION_MODE == "sequential":
+    planning_agent = create_sequential_planning_agent()
+else:
+    planning_agent = create_parallel_planning_agent()
@@ -0,0 +1,87 @@
+"""
+Deterministic route optimization of drafted itinerary options.
+
+The parallel pipeline drafts options without a model round trip to
+OptimizationAgent; instead each day's sightseeing stops that carry
+coordinates are re-ordered with the same solver (2-opt / or-opt from the
+drafted order, so a day never gets longer). The re-ordered stops take
+over the day's existing sightseeing time slots, leaving transport,
+accommodation and meals where the draft put them.
+"""
+
+import re
+from typing import Any, Dict, List
+
+from personalized_trip_planner.subagents.Optimization.tools.optimizer import (
+    ItineraryOptimizer, Route, build_problem,
+)
+
+# Savings below this are not worth re-ordering a drafted day for
+MIN_SAVED_MINUTES = 5
+
+_HOURS = re.compile(r"(\d+(?:\.\d+)?)\s*(?:hours?|hrs?|h)(?![a-z])")
+_MINUTES = re.compile(r"(\d+(?:\.\d+)?)\s*(?:minutes?|mins?|m)(?![a-z])")
+
+
+def duration_minutes(value: str, default: int = 60) -> int:
+    """'2h 30m', '90 min', '1.5 hrs' or '2 hours and 15 minutes' in minutes"""
+    text = str(value or "").lower()
+    hours, minutes = _HOURS.search(text), _MINUTES.search(text)
+    if not hours and not minutes:
+        return default
+    return round(float(hours.group(1) if hours else 0) * 60 + float(minutes.group(1) if minutes else 0))
+
+
+def _located_stops(day: Dict[str, Any]) -> List[int]:
+    return [
+        index for index, activity in enumerate(day.get("activities", []))
+        if activity.get("type") == "activity"
+        and isinstance(activity.get("lat"), (int, float)) and isinstance(activity.get("lon"), (int, float))
+    ]
+
+
+def optimize_day(day: Dict[str, Any], city: str = "") -> int:
+    """Re-order a day's located sightseeing stops in place; returns travel minutes saved"""
+    indexes = _located_stops(day)
+    if len(indexes) < 3:
+        return 0
+    activities = day["activities"]
+    stops = [
+        {"name": activities[i]["title"], "lat": activities[i]["lat"], "lon": activities[i]["lon"],
+         "duration_minutes": duration_minutes(activities[i].get("duration")), "must_visit": True}
+        for i in indexes
+    ]
+    # One day with no time window or pacing limits: only the order is optimized
+    problem = build_problem(stops, num_days=1, day_start="00:00", day_end="23:59", budget=0,
+                            max_activities_per_day=len(stops), max_travel_minutes_per_day=0,
+                            base=None, speed_kmph=25, city=city)
+    optimizer = ItineraryOptimizer(problem)
+    drafted = Route(problem, 0, list(range(1, len(stops) + 1)))
+    if not drafted.feasible():
+        return 0
+    optimizer.routes = [drafted]
+    optimizer.unvisited.clear()
+    before = drafted.travel_minutes
+    optimizer.improve()
+    saved = before - optimizer.routes[0].travel_minutes
+    if saved < MIN_SAVED_MINUTES:
+        return 0
+
+    # The drafted slots stay put; the stops move between them
+    slots = [activities[i]["time"] for i in indexes]
+    reordered = [activities[indexes[stop - 1]] for stop in optimizer.routes[0].stops]
+    for i, activity, slot in zip(indexes, reordered, slots):
+        activities[i] = {**activity, "time": slot}
+    return round(saved)
+
+
+def optimize_option(option: Dict[str, Any]) -> Dict[str, Any]:
+    """A copy of an itinerary option with every day's sightseeing in the shortest order found"""
+    option = {**option, "days": [{**day, "activities": list(day.get("activities", []))}
+                                 for day in option.get("days", [])]}
+    saved = sum(optimize_day(day, option.get("destination", "")) for day in option["days"])
+    if saved:
+        option["notes"] = list(option.get("notes", [])) + [
+            f"Sightseeing re-ordered to save about {saved} minutes of travel"
+        ]
+    return option
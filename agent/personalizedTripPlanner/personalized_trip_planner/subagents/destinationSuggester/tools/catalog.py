@@ -0,0 +1,186 @@
+"""
+Compact catalog of Indian destinations used by the local filter/ranking engine.
+
+Each destination records:
+- cost_per_day: typical mid-range spend per traveler per day in INR
+  (stay, food, local transport and entry fees)
+- seasons: one character per month, January first
+  'B' = best time to visit, 'O' = fine, 'X' = avoid (monsoon, extreme heat/cold)
+- tags: interests the destination is known for
+- popularity: 0-1 prior used as the collaborative signal in hybrid ranking
+"""
+
+INTEREST_TAGS = [
+    "heritage", "history", "architecture", "culture", "spiritual", "beach",
+    "nightlife", "adventure", "trekking", "mountains", "nature", "wildlife",
+    "food", "shopping", "relaxation", "photography", "backwaters", "desert",
+]
+
+# Common synonyms users type, mapped to catalog tags
+INTEREST_SYNONYMS = {
+    "historical": "history",
+    "forts": "heritage",
+    "palaces": "heritage",
+    "temples": "spiritual",
+    "religious": "spiritual",
+    "pilgrimage": "spiritual",
+    "beaches": "beach",
+    "party": "nightlife",
+    "parties": "nightlife",
+    "hiking": "trekking",
+    "trek": "trekking",
+    "hills": "mountains",
+    "hill station": "mountains",
+    "snow": "mountains",
+    "scenic": "nature",
+    "safari": "wildlife",
+    "cuisine": "food",
+    "foodie": "food",
+    "street food": "food",
+    "markets": "shopping",
+    "relax": "relaxation",
+    "wellness": "relaxation",
+    "yoga": "spiritual",
+    "art": "culture",
+    "camping": "adventure",
+    "rafting": "adventure",
+    "diving": "adventure",
+}
+
+DESTINATIONS = [
+    {"name": "Hampi", "state": "Karnataka", "lat": 15.335, "lon": 76.460, "cost_per_day": 2200,
+     "seasons": "BBOXXXXXOBBB", "tags": ["heritage", "history", "architecture", "photography", "culture"],
+     "popularity": 0.78},
+    {"name": "Mysore", "state": "Karnataka", "lat": 12.296, "lon": 76.639, "cost_per_day": 2500,
+     "seasons": "BBOOOOOOOBBB", "tags": ["heritage", "history", "architecture", "culture", "food", "shopping"],
+     "popularity": 0.80},
+    {"name": "Coorg", "state": "Karnataka", "lat": 12.337, "lon": 75.806, "cost_per_day": 3500,
+     "seasons": "BBBOOXXXOBBB", "tags": ["nature", "mountains", "trekking", "relaxation", "adventure", "food"],
+     "popularity": 0.82},
+    {"name": "Gokarna", "state": "Karnataka", "lat": 14.548, "lon": 74.319, "cost_per_day": 2300,
+     "seasons": "BBBOXXXXOBBB", "tags": ["beach", "spiritual", "relaxation", "trekking"],
+     "popularity": 0.62},
+    {"name": "Chikmagalur", "state": "Karnataka", "lat": 13.316, "lon": 75.772, "cost_per_day": 3200,
+     "seasons": "BBBOOXXXOBBB", "tags": ["nature", "mountains", "trekking", "relaxation", "photography"],
+     "popularity": 0.66},
+    {"name": "Pondicherry", "state": "Puducherry", "lat": 11.934, "lon": 79.830, "cost_per_day": 3000,
+     "seasons": "BBBOXXOOOOBB", "tags": ["beach", "culture", "food", "architecture", "relaxation", "spiritual"],
+     "popularity": 0.76},
+    {"name": "Ooty", "state": "Tamil Nadu", "lat": 11.410, "lon": 76.695, "cost_per_day": 3000,
+     "seasons": "OOBBBBOOOOOO", "tags": ["mountains", "nature", "relaxation", "photography"],
+     "popularity": 0.72},
+    {"name": "Madurai", "state": "Tamil Nadu", "lat": 9.925, "lon": 78.119, "cost_per_day": 2200,
+     "seasons": "BBBOXXOOOBBB", "tags": ["spiritual", "heritage", "architecture", "culture", "food"],
+     "popularity": 0.60},
+    {"name": "Munnar", "state": "Kerala", "lat": 10.089, "lon": 77.060, "cost_per_day": 3300,
+     "seasons": "BBBOOXXXBBBB", "tags": ["mountains", "nature", "trekking", "relaxation", "photography"],
+     "popularity": 0.79},
+    {"name": "Alleppey", "state": "Kerala", "lat": 9.498, "lon": 76.339, "cost_per_day": 4200,
+     "seasons": "BBBOXXXOOBBB", "tags": ["backwaters", "nature", "relaxation", "food", "photography"],
+     "popularity": 0.77},
+    {"name": "Kochi", "state": "Kerala", "lat": 9.931, "lon": 76.267, "cost_per_day": 3000,
+     "seasons": "BBBOXXXOOBBB", "tags": ["heritage", "culture", "food", "history", "shopping"],
+     "popularity": 0.70},
+    {"name": "Varkala", "state": "Kerala", "lat": 8.733, "lon": 76.716, "cost_per_day": 2800,
+     "seasons": "BBBOXXXXOBBB", "tags": ["beach", "relaxation", "spiritual", "food"],
+     "popularity": 0.61},
+    {"name": "Wayanad", "state": "Kerala", "lat": 11.685, "lon": 76.132, "cost_per_day": 3100,
+     "seasons": "BBBOOXXXOBBB", "tags": ["nature", "wildlife", "trekking", "adventure", "mountains"],
+     "popularity": 0.64},
+    {"name": "Goa", "state": "Goa", "lat": 15.300, "lon": 74.124, "cost_per_day": 4000,
+     "seasons": "BBBOXXXXOBBB", "tags": ["beach", "nightlife", "food", "relaxation", "adventure", "heritage"],
+     "popularity": 0.95},
+    {"name": "Mumbai", "state": "Maharashtra", "lat": 19.076, "lon": 72.878, "cost_per_day": 4500,
+     "seasons": "BBBOOXXXOBBB", "tags": ["nightlife", "food", "shopping", "culture", "history"],
+     "popularity": 0.80},
+    {"name": "Lonavala", "state": "Maharashtra", "lat": 18.753, "lon": 73.406, "cost_per_day": 3000,
+     "seasons": "OOOOOOBBBBOO", "tags": ["nature", "trekking", "mountains", "relaxation"],
+     "popularity": 0.58},
+    {"name": "Aurangabad", "state": "Maharashtra", "lat": 19.876, "lon": 75.343, "cost_per_day": 2300,
+     "seasons": "BBOXXXOOOBBB", "tags": ["heritage", "history", "architecture", "spiritual"],
+     "popularity": 0.57},
+    {"name": "Hyderabad", "state": "Telangana", "lat": 17.385, "lon": 78.487, "cost_per_day": 3200,
+     "seasons": "BBOXXOOOOBBB", "tags": ["heritage", "history", "food", "shopping", "architecture"],
+     "popularity": 0.71},
+    {"name": "Jaipur", "state": "Rajasthan", "lat": 26.912, "lon": 75.787, "cost_per_day": 3200,
+     "seasons": "BBBOXXOOOBBB", "tags": ["heritage", "history", "architecture", "culture", "shopping", "food"],
+     "popularity": 0.90},
+    {"name": "Udaipur", "state": "Rajasthan", "lat": 24.585, "lon": 73.712, "cost_per_day": 3800,
+     "seasons": "BBBOXXOBBBBB", "tags": ["heritage", "architecture", "culture", "relaxation", "photography"],
+     "popularity": 0.86},
+    {"name": "Jodhpur", "state": "Rajasthan", "lat": 26.238, "lon": 73.024, "cost_per_day": 3000,
+     "seasons": "BBBOXXXOOBBB", "tags": ["heritage", "history", "architecture", "culture", "food"],
+     "popularity": 0.74},
+    {"name": "Jaisalmer", "state": "Rajasthan", "lat": 26.915, "lon": 70.908, "cost_per_day": 3200,
+     "seasons": "BBOXXXXXOBBB", "tags": ["desert", "heritage", "adventure", "culture", "photography"],
+     "popularity": 0.73},
+    {"name": "Agra", "state": "Uttar Pradesh", "lat": 27.176, "lon": 78.008, "cost_per_day": 2800,
+     "seasons": "BBBOXXOOOBBB", "tags": ["heritage", "history", "architecture", "photography"],
+     "popularity": 0.88},
+    {"name": "Varanasi", "state": "Uttar Pradesh", "lat": 25.318, "lon": 82.974, "cost_per_day": 2200,
+     "seasons": "BBBOXXXOOBBB", "tags": ["spiritual", "culture", "heritage", "food", "photography"],
+     "popularity": 0.84},
+    {"name": "Delhi", "state": "Delhi", "lat": 28.614, "lon": 77.209, "cost_per_day": 3500,
+     "seasons": "BBBOXXOOOBBO", "tags": ["history", "heritage", "food", "shopping", "nightlife", "culture"],
+     "popularity": 0.82},
+    {"name": "Amritsar", "state": "Punjab", "lat": 31.634, "lon": 74.872, "cost_per_day": 2400,
+     "seasons": "OBBBOXXOOBBO", "tags": ["spiritual", "history", "food", "culture"],
+     "popularity": 0.75},
+    {"name": "Rishikesh", "state": "Uttarakhand", "lat": 30.087, "lon": 78.268, "cost_per_day": 2500,
+     "seasons": "OBBBBOXXBBBO", "tags": ["spiritual", "adventure", "trekking", "nature", "mountains", "relaxation"],
+     "popularity": 0.83},
+    {"name": "Manali", "state": "Himachal Pradesh", "lat": 32.240, "lon": 77.189, "cost_per_day": 3300,
+     "seasons": "OOBBBBXXBBOO", "tags": ["mountains", "adventure", "trekking", "nature", "nightlife"],
+     "popularity": 0.87},
+    {"name": "Shimla", "state": "Himachal Pradesh", "lat": 31.105, "lon": 77.173, "cost_per_day": 3200,
+     "seasons": "OOBBBBXXBBOO", "tags": ["mountains", "nature", "heritage", "relaxation", "shopping"],
+     "popularity": 0.76},
+    {"name": "Dharamshala", "state": "Himachal Pradesh", "lat": 32.219, "lon": 76.323, "cost_per_day": 2700,
+     "seasons": "OOBBBBXXBBBO", "tags": ["mountains", "spiritual", "trekking", "culture", "nature"],
+     "popularity": 0.68},
+    {"name": "Leh Ladakh", "state": "Ladakh", "lat": 34.152, "lon": 77.577, "cost_per_day": 4500,
+     "seasons": "XXXXBBBBBOXX", "tags": ["mountains", "adventure", "trekking", "photography", "spiritual"],
+     "popularity": 0.85},
+    {"name": "Darjeeling", "state": "West Bengal", "lat": 27.041, "lon": 88.266, "cost_per_day": 3000,
+     "seasons": "OOBBBOXXOBBO", "tags": ["mountains", "nature", "heritage", "photography", "relaxation"],
+     "popularity": 0.72},
+    {"name": "Gangtok", "state": "Sikkim", "lat": 27.339, "lon": 88.607, "cost_per_day": 3400,
+     "seasons": "OOBBBOXXOBBO", "tags": ["mountains", "nature", "spiritual", "adventure", "trekking"],
+     "popularity": 0.70},
+    {"name": "Kolkata", "state": "West Bengal", "lat": 22.573, "lon": 88.364, "cost_per_day": 2600,
+     "seasons": "BBOXXXXOOBBB", "tags": ["culture", "food", "heritage", "history", "shopping"],
+     "popularity": 0.66},
+    {"name": "Andaman", "state": "Andaman and Nicobar", "lat": 11.623, "lon": 92.726, "cost_per_day": 5500,
+     "seasons": "BBBBOXXXOBBB", "tags": ["beach", "adventure", "nature", "relaxation", "photography"],
+     "popularity": 0.81},
+    {"name": "Ranthambore", "state": "Rajasthan", "lat": 26.017, "lon": 76.503, "cost_per_day": 5000,
+     "seasons": "OBBBBXXXXBBO", "tags": ["wildlife", "nature", "photography", "heritage"],
+     "popularity": 0.63},
+    {"name": "Khajuraho", "state": "Madhya Pradesh", "lat": 24.832, "lon": 79.920, "cost_per_day": 2400,
+     "seasons": "BBBOXXXOOBBB", "tags": ["heritage", "architecture", "history", "culture"],
+     "popularity": 0.58},
+]
+
+# Cities travelers commonly start from
+ORIGIN_CITIES = {
+    "Bangalore": (12.972, 77.594),
+    "Bengaluru": (12.972, 77.594),
+    "Mumbai": (19.076, 72.878),
+    "Delhi": (28.614, 77.209),
+    "New Delhi": (28.614, 77.209),
+    "Chennai": (13.083, 80.271),
+    "Hyderabad": (17.385, 78.487),
+    "Kolkata": (22.573, 88.364),
+    "Pune": (18.520, 73.857),
+    "Ahmedabad": (23.023, 72.571),
+    "Jaipur": (26.912, 75.787),
+    "Kochi": (9.931, 76.267),
+    "Lucknow": (26.847, 80.947),
+    "Chandigarh": (30.733, 76.779),
+    "Goa": (15.300, 74.124),
+    "Mysore": (12.296, 76.639),
+    "Coimbatore": (11.017, 76.956),
+    "Bhopal": (23.260, 77.413),
+    "Indore": (22.720, 75.858),
+    "Guwahati": (26.144, 91.736),
+}
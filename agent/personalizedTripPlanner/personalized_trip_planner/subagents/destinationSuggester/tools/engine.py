@@ -0,0 +1,230 @@
+"""
+In-process destination filter and ranking engine.
+
+The catalog is loaded once into NumPy arrays with inverted indexes per
+interest tag and per travel month, so filtering is a couple of index
+lookups and ranking is a single weighted matrix product over:
+interest fit, seasonality, budget fit, distance from origin, popularity
+and similarity to destinations the user liked before.
+"""
+
+import re
+from datetime import datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .catalog import DESTINATIONS, INTEREST_SYNONYMS, INTEREST_TAGS, ORIGIN_CITIES
+
+SEASON_SCORES = {"B": 1.0, "O": 0.6, "X": 0.0}
+
+EARTH_RADIUS_KM = 6371.0
+
+# Order matches the columns built in DestinationEngine._features
+FEATURES = ["interest", "season", "budget", "distance", "popularity", "similarity"]
+
+DEFAULT_WEIGHTS = {
+    "interest": 0.35,
+    "season": 0.20,
+    "budget": 0.20,
+    "distance": 0.10,
+    "popularity": 0.10,
+    "similarity": 0.05,
+}
+
+MONTHS = {
+    name: index + 1
+    for index, names in enumerate([
+        ("jan", "january"), ("feb", "february"), ("mar", "march"), ("apr", "april"),
+        ("may",), ("jun", "june"), ("jul", "july"), ("aug", "august"),
+        ("sep", "sept", "september"), ("oct", "october"), ("nov", "november"), ("dec", "december"),
+    ])
+    for name in names
+}
+
+
+def haversine_km(lat1, lon1, lat2, lon2) -> np.ndarray:
+    """Great-circle distance in km; broadcasts over NumPy arrays"""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+def estimate_travel_cost(distance_km: np.ndarray) -> np.ndarray:
+    """Rough round-trip fare per traveler in INR: road/rail below 500 km, flights above"""
+    return np.where(distance_km < 500, distance_km * 2 * 2.5, 2 * (3500 + distance_km * 2.2))
+
+
+def parse_month(start_date: str) -> Optional[int]:
+    """Extract the travel month from an ISO/Indian date or a month name"""
+    if not start_date:
+        return None
+    for fmt in ("%Y-%m-%d", "%d/%m/%Y", "%d-%m-%Y", "%Y/%m/%d"):
+        try:
+            return datetime.strptime(start_date.strip(), fmt).month
+        except ValueError:
+            continue
+    for word in re.findall(r"[a-z]+", start_date.lower()):
+        if word in MONTHS:
+            return MONTHS[word]
+    return None
+
+
+class DestinationEngine:
+    """Vectorized filter and hybrid ranker over the destination catalog"""
+
+    def __init__(self, destinations: List[Dict] = DESTINATIONS, origins: Dict = ORIGIN_CITIES):
+        self.names = [d["name"] for d in destinations]
+        self._positions = {name.lower(): i for i, name in enumerate(self.names)}
+        self._tag_columns = {tag: j for j, tag in enumerate(INTEREST_TAGS)}
+
+        self.cost_per_day = np.array([d["cost_per_day"] for d in destinations], dtype=np.float64)
+        self.popularity = np.array([d["popularity"] for d in destinations], dtype=np.float64)
+        self.lat = np.array([d["lat"] for d in destinations])
+        self.lon = np.array([d["lon"] for d in destinations])
+
+        self.tags = np.zeros((len(destinations), len(INTEREST_TAGS)), dtype=np.float64)
+        for i, d in enumerate(destinations):
+            self.tags[i, [self._tag_columns[tag] for tag in d["tags"]]] = 1.0
+        self.tag_unit = self.tags / np.linalg.norm(self.tags, axis=1, keepdims=True)
+
+        self.seasons = np.array([[SEASON_SCORES[c] for c in d["seasons"]] for d in destinations])
+
+        # Inverted indexes: interest tag -> destinations, month -> visitable destinations
+        self.interest_index = {tag: np.flatnonzero(self.tags[:, j]) for tag, j in self._tag_columns.items()}
+        self.month_index = {month: np.flatnonzero(self.seasons[:, month - 1] > 0) for month in range(1, 13)}
+
+        # Origin x destination distance matrix
+        self._origin_positions = {name.lower(): i for i, name in enumerate(origins)}
+        origin_coords = np.array(list(origins.values()))
+        self.origin_distance = haversine_km(
+            origin_coords[:, :1], origin_coords[:, 1:], self.lat[None, :], self.lon[None, :]
+        )
+
+    def resolve_interests(self, interests: List[str]) -> List[str]:
+        """Map free-form interests onto catalog tags"""
+        resolved = []
+        for interest in interests or []:
+            text = str(interest).lower().strip()
+            if not text:
+                continue
+            tag = INTEREST_SYNONYMS.get(text, text)
+            if tag not in self._tag_columns:
+                tag = next((t for t in INTEREST_TAGS if t in text or text in t), None)
+            if tag and tag not in resolved:
+                resolved.append(tag)
+        return resolved
+
+    def origin_distances(self, origin: str) -> Optional[np.ndarray]:
+        """Distances from a known origin city (or a catalog destination) to every destination"""
+        key = (origin or "").lower().strip()
+        if key in self._origin_positions:
+            return self.origin_distance[self._origin_positions[key]]
+        if key in self._positions:
+            i = self._positions[key]
+            return haversine_km(self.lat[i], self.lon[i], self.lat, self.lon)
+        return None
+
+    def estimate_cost(self, indices: np.ndarray, duration: int, distances: Optional[np.ndarray]) -> np.ndarray:
+        """Estimated trip cost per traveler in INR"""
+        cost = self.cost_per_day[indices] * max(int(duration or 1), 1)
+        if distances is not None:
+            cost = cost + estimate_travel_cost(distances[indices])
+        return cost
+
+    def _features(self, indices: np.ndarray, budget: float, duration: int, month: Optional[int],
+                  tags: List[str], distances: Optional[np.ndarray],
+                  liked: Optional[np.ndarray] = None) -> np.ndarray:
+        """Feature matrix (candidates x FEATURES), every column in [0, 1]"""
+        n = len(indices)
+
+        if tags:
+            interest = self.tags[np.ix_(indices, [self._tag_columns[t] for t in tags])].mean(axis=1)
+        else:
+            interest = np.full(n, 0.5)
+
+        season = self.seasons[indices, month - 1] if month else np.full(n, 0.6)
+
+        if budget and budget > 0:
+            ratio = self.estimate_cost(indices, duration, distances) / budget
+            budget_fit = np.where(ratio <= 1.0, 0.7 + 0.3 * ratio, np.clip(1.0 - 2.0 * (ratio - 1.0), 0.0, 1.0))
+        else:
+            budget_fit = np.full(n, 0.5)
+
+        if distances is not None:
+            distance_fit = 1.0 / (1.0 + distances[indices] / (250.0 * max(int(duration or 1), 1)))
+        else:
+            distance_fit = np.full(n, 0.5)
+
+        if liked is not None and len(liked):
+            similarity = (self.tag_unit[indices] @ self.tag_unit[liked].T).mean(axis=1)
+        else:
+            similarity = np.zeros(n)
+
+        return np.column_stack([interest, season, budget_fit, distance_fit, self.popularity[indices], similarity])
+
+    @staticmethod
+    def _weights(overrides: Optional[Dict[str, float]] = None) -> np.ndarray:
+        weights = dict(DEFAULT_WEIGHTS)
+        weights.update({k: float(v) for k, v in (overrides or {}).items() if k in weights})
+        return np.array([weights[f] for f in FEATURES])
+
+    def filter(self, origin: str, budget: float, start_date: str, duration: int,
+               interests: List[str], limit: int = 8, budget_tolerance: float = 0.1) -> List[str]:
+        """Destinations matching interests, season and budget, best first"""
+        tags = self.resolve_interests(interests)
+        if tags:
+            candidates = np.unique(np.concatenate([self.interest_index[t] for t in tags]))
+        else:
+            candidates = np.arange(len(self.names))
+
+        month = parse_month(start_date)
+        if month:
+            candidates = np.intersect1d(candidates, self.month_index[month], assume_unique=True)
+        if not len(candidates):
+            return []
+
+        distances = self.origin_distances(origin)
+        if budget and budget > 0:
+            cost = self.estimate_cost(candidates, duration, distances)
+            affordable = candidates[cost <= budget * (1 + budget_tolerance)]
+            # Nothing fits: offer the cheapest options rather than nothing
+            candidates = affordable if len(affordable) else candidates[np.argsort(cost)[:limit]]
+
+        scores = self._features(candidates, budget, duration, month, tags, distances) @ self._weights()
+        order = np.argsort(-scores, kind="stable")[:limit]
+        return [self.names[i] for i in candidates[order]]
+
+    def rank(self, candidates: List[str], user_profile: Dict) -> List[str]:
+        """Order candidates from best to worst fit for the user profile
+
+        Recognised profile keys: interests, budget, duration, start_date,
+        origin, liked_destinations, visited_destinations and weights.
+        Unknown candidate names keep their relative order after known ones.
+        """
+        user_profile = user_profile or {}
+        known = [c for c in candidates if str(c).lower() in self._positions]
+        unknown = [c for c in candidates if str(c).lower() not in self._positions]
+        if not known:
+            return list(candidates)
+
+        indices = np.array([self._positions[str(c).lower()] for c in known])
+        liked = np.array([self._positions[str(d).lower()] for d in user_profile.get("liked_destinations", [])
+                          if str(d).lower() in self._positions], dtype=int)
+        visited = {str(d).lower() for d in user_profile.get("visited_destinations", [])}
+
+        features = self._features(
+            indices,
+            budget=float(user_profile.get("budget") or 0),
+            duration=int(user_profile.get("duration") or 1),
+            month=parse_month(str(user_profile.get("start_date") or "")),
+            tags=self.resolve_interests(user_profile.get("interests", [])),
+            distances=self.origin_distances(str(user_profile.get("origin") or "")),
+            liked=liked,
+        )
+        scores = features @ self._weights(user_profile.get("weights"))
+        # Places the user has already been to drop behind fresh ones
+        scores = scores * np.where([str(c).lower() in visited for c in known], 0.5, 1.0)
+
+        order = np.argsort(-scores, kind="stable")
+        return [known[i] for i in order] + unknown
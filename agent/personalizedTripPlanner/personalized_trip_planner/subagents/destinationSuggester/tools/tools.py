@@ -1,32 +1,58 @@
+from typing import Optional
 
-from google.adk.tools import FunctionTool
+from google.adk.tools import FunctionTool, ToolContext
 
-def destination_filter_tool_impl(origin: str, budget: float, start_date: str, duration: int, interests: list) -> list:
-    """
-    Filters potential Indian destinations based on budget, travel dates (seasonality), and interests.
-    Returns a list of viable destination candidates as an array.
-    """
-    print("TOOL: Filtering destinations...")
-    # This tool would contain the logic for:
-    # 1. Budget filtering (estimating travel/stay costs)
-    # 2. Seasonal filtering (matching dates to appropriate climates)
-    # 3. Interest mapping (matching 'heritage' to Jaipur, 'beach' to Goa, etc.)
-    # Example output:
-    return ["Jaipur", "Goa", "Varanasi", "Hampi", "Mysore"]
+from .engine import DestinationEngine
 
-destination_filter_tool = FunctionTool(destination_filter_tool_impl)
+# Built once per process; every call is a sub-millisecond lookup
+_engine = DestinationEngine()
 
-def destination_ranking_tool_impl(candidates: list, user_profile: dict) -> list:
-    """
-    Ranks a list of candidate destinations based on a user's detailed profile
-    using content-based and collaborative filtering models.
-    Returns a ranked list of destinations as an array.
-    """
-    print("TOOL: Ranking destinations...")
-    # This tool would contain the hybrid recommendation logic. [3, 4]
-    # Example output:
-    return ["Hampi", "Mysore", "Coorg", "Pondicherry"]
+# Destinations taken from the filter into the personal ranking
+SUGGESTION_LIMIT = 5
 
-destination_ranking_tool = FunctionTool(destination_ranking_tool_impl)
+# Ranking of the current invocation, for the agent's final answer
+RANKED_KEY = "ranked_destinations"
+TURN_RANKED_KEY = "temp:ranked_destinations"
 
+def suggest_destinations_tool_impl(
+    origin: str,
+    budget: float,
+    start_date: str,
+    duration: int,
+    interests: list[str],
+    tool_context: ToolContext,
+    liked_destinations: Optional[list[str]] = None,
+    visited_destinations: Optional[list[str]] = None,
+) -> list[str]:
+    """
+    Finds Indian destinations that fit the user's budget, travel dates (seasonality)
+    and interests, and ranks them for the user with content-based and
+    collaborative filtering. Returns the ranked destinations as an array, best first.
+
+    Args:
+        origin: City the traveler starts from (e.g. "Bangalore"), "" if unknown
+        budget: Total trip budget per traveler in INR, including travel; 0 if unknown
+        start_date: Trip start date (YYYY-MM-DD) or month name, "" if unknown
+        duration: Trip duration in days
+        interests: Interests or themes (heritage, beach, adventure, food, ...)
+        liked_destinations: Places the user said they enjoyed before
+        visited_destinations: Places the user has already been to
+    """
+    print("TOOL: Suggesting destinations...")
+    candidates = _engine.filter(origin, budget, start_date, duration, interests, limit=SUGGESTION_LIMIT)
+    ranked = _engine.rank(candidates, {
+        "interests": interests,
+        "budget": budget,
+        "duration": duration,
+        "start_date": start_date,
+        "origin": origin,
+        "liked_destinations": liked_destinations or [],
+        "visited_destinations": visited_destinations or [],
+    })
+    tool_context.state[RANKED_KEY] = ranked
+    tool_context.state[TURN_RANKED_KEY] = ranked
+    # The ranking is the answer; no model call to restate it
+    tool_context.actions.skip_summarization = True
+    return ranked
 
+suggest_destinations_tool = FunctionTool(suggest_destinations_tool_impl)
@@ -0,0 +1,151 @@
+"""
+Token accounting and context budgets for every model call.
+
+- record_token_usage (after_model_callback) adds each response's usage
+  metadata to state["token_usage:<agent name>"]. Sub-agents run by AgentTool
+  share state with their caller, so the totals of every agent in a turn reach
+  the backend as event state deltas.
+  Each agent key is written by one agent at a time: the branches of a
+  ParallelAgent are distinct agents.
+- record_nested_usage accounts model calls a tool makes itself (e.g.
+  grounded search). Tools run concurrently, in parallel branches or side by
+  side in one response, so each call gets its own record,
+  state["token_usage:<source>#<function call id>"], instead of a shared
+  running total that concurrent calls would overwrite.
+- enforce_context_budget (before_model_callback) drops the oldest history
+  from a request whose estimated size is over AGENT_CONTEXT_TOKEN_BUDGET.
+  The current turn is always kept, and a tool call is never separated from
+  its response.
+
+install_token_accounting() attaches both callbacks to an agent tree,
+including sub-agents that LazyAgentTool builds later.
+"""
+
+import json
+import os
+from typing import Any, Dict, Optional
+
+from google.adk.agents import BaseAgent, LlmAgent
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools.agent_tool import AgentTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from .lazy_agent_tool import LazyAgentTool
+
+USAGE_KEY_PREFIX = "token_usage:"
+# Separates a nested usage source from the tool call it was recorded for
+CALL_SEPARATOR = "#"
+# Rough size of a Gemini token in characters, for budgeting before the call
+CHARS_PER_TOKEN = 4
+# Estimated input tokens allowed per model call (0 disables trimming)
+CONTEXT_TOKEN_BUDGET = int(os.getenv("AGENT_CONTEXT_TOKEN_BUDGET", "32000"))
+
+
+def _add_usage(callback_context: CallbackContext, amounts: Dict[str, int],
+               latest: Optional[Dict[str, Any]] = None) -> None:
+    key = USAGE_KEY_PREFIX + callback_context.agent_name
+    # Assign a new dict so the change is recorded in the event's state delta
+    totals = dict(callback_context.state.get(key) or {})
+    for name, amount in amounts.items():
+        totals[name] = totals.get(name, 0) + amount
+    totals.update(latest or {})
+    callback_context.state[key] = totals
+
+
+def record_token_usage(callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+    """after_model_callback: accumulate input/output tokens per agent"""
+    usage = llm_response.usage_metadata
+    if usage is None or llm_response.partial:
+        return None
+    input_tokens = usage.prompt_token_count or 0
+    _add_usage(callback_context, {
+        "calls": 1,
+        "input_tokens": input_tokens,
+        "output_tokens": (usage.candidates_token_count or 0) + (usage.thoughts_token_count or 0),
+        "cached_tokens": usage.cached_content_token_count or 0,
+    }, latest={"last_input_tokens": input_tokens})
+    return None
+
+
+def record_nested_usage(context: ToolContext, source: str, usage: Dict[str, int]) -> None:
+    """Account a model call made by a tool, as a record of its own for this tool call"""
+    call_id = context.function_call_id or context.invocation_id
+    context.state[f"{USAGE_KEY_PREFIX}{source}{CALL_SEPARATOR}{call_id}"] = {
+        "calls": 1,
+        "input_tokens": usage.get("input_tokens", 0),
+        "output_tokens": usage.get("output_tokens", 0),
+        "cached_tokens": usage.get("cached_tokens", 0),
+        "last_input_tokens": usage.get("input_tokens", 0),
+    }
+
+
+def _content_tokens(content: types.Content) -> int:
+    chars = 0
+    for part in content.parts or []:
+        if part.text:
+            chars += len(part.text)
+        elif part.function_call:
+            chars += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+        elif part.function_response:
+            chars += len(json.dumps(part.function_response.response or {}, default=str))
+    return chars // CHARS_PER_TOKEN + 1
+
+
+def _is_user_text(content: types.Content) -> bool:
+    return content.role == "user" and any(part.text for part in content.parts or [])
+
+
+def estimate_request_tokens(llm_request: LlmRequest) -> int:
+    """Approximate input tokens of a request: instruction plus history"""
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    return len(str(instruction or "")) // CHARS_PER_TOKEN + sum(map(_content_tokens, llm_request.contents))
+
+
+def enforce_context_budget(callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+    """before_model_callback: trim the oldest history once the request is over budget"""
+    if CONTEXT_TOKEN_BUDGET <= 0:
+        return None
+    total = estimate_request_tokens(llm_request)
+    if total <= CONTEXT_TOKEN_BUDGET:
+        return None
+
+    contents = llm_request.contents
+    current_turn = max((i for i, content in enumerate(contents) if _is_user_text(content)), default=0)
+    drop = 0
+    while drop < current_turn and total > CONTEXT_TOKEN_BUDGET:
+        total -= _content_tokens(contents[drop])
+        drop += 1
+    # Resume on a user message, never on a model reply or a tool response
+    while drop < current_turn and not _is_user_text(contents[drop]):
+        total -= _content_tokens(contents[drop])
+        drop += 1
+    if drop:
+        trimmed = estimate_request_tokens(llm_request) - total
+        llm_request.contents = contents[drop:]
+        _add_usage(callback_context, {"trimmed_contents": drop, "trimmed_tokens": trimmed})
+    return None
+
+
+def _append_callback(agent: LlmAgent, field: str, callback) -> None:
+    current = getattr(agent, field)
+    callbacks = list(current) if isinstance(current, list) else ([current] if current else [])
+    if callback not in callbacks:
+        setattr(agent, field, callbacks + [callback])
+
+
+def install_token_accounting(agent: BaseAgent) -> BaseAgent:
+    """Add the accounting and budget callbacks to an agent and everything it delegates to"""
+    if isinstance(agent, LlmAgent):
+        _append_callback(agent, "before_model_callback", enforce_context_budget)
+        _append_callback(agent, "after_model_callback", record_token_usage)
+        for tool in agent.tools:
+            if isinstance(tool, LazyAgentTool):
+                tool.prepare = install_token_accounting
+            elif isinstance(tool, AgentTool):
+                install_token_accounting(tool.agent)
+    for sub_agent in agent.sub_agents:
+        install_token_accounting(sub_agent)
+    return agent
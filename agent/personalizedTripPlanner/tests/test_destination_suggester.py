@@ -0,0 +1,61 @@
+"""Destination suggestions cost one model round trip and keep the array reply format."""
+
+import ast
+from typing import AsyncGenerator, List
+
+import pytest
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from personalized_trip_planner.subagents.destinationSuggester import destination_suggester_agent
+from personalized_trip_planner.subagents.destinationSuggester.tools.engine import DestinationEngine
+
+
+class SuggestingLlm(BaseLlm):
+    """Calls the suggestion tool when asked for ideas, otherwise asks a question"""
+
+    model: str = "scripted"
+    requests: List[LlmRequest] = []
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        self.requests.append(llm_request)
+        if "ideas" in (llm_request.contents[-1].parts[0].text or ""):
+            part = types.Part(function_call=types.FunctionCall(
+                name="suggest_destinations_tool_impl",
+                args={"origin": "Bangalore", "budget": 30000, "start_date": "December",
+                      "duration": 4, "interests": ["heritage", "beach"]},
+            ))
+        else:
+            part = types.Part(text="Which month are you travelling in?")
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+async def _ask(runner, session_id, text):
+    replies = []
+    async for event in runner.run_async(user_id="u", session_id=session_id,
+                                        new_message=types.Content(role="user", parts=[types.Part(text=text)])):
+        replies.extend(part.text for part in (event.content.parts if event.content else []) if part.text)
+    return replies
+
+
+@pytest.mark.asyncio
+async def test_one_model_call_per_suggestion(monkeypatch):
+    llm = SuggestingLlm(requests=[])
+    monkeypatch.setattr(destination_suggester_agent, "model", llm)
+    runner = InMemoryRunner(agent=destination_suggester_agent, app_name="suggest")
+    session = await runner.session_service.create_session(app_name="suggest", user_id="u")
+
+    replies = await _ask(runner, session.id, "Give me ideas for December")
+    assert len(llm.requests) == 1
+    destinations = ast.literal_eval(replies[-1])
+    assert 3 <= len(destinations) <= 5 and all(isinstance(name, str) for name in destinations)
+
+    # A turn without a suggestion does not replay the previous ranking
+    assert await _ask(runner, session.id, "Hmm") == ["Which month are you travelling in?"]
+
+
+def test_blank_interests_are_ignored():
+    assert DestinationEngine().resolve_interests(["", "  ", "beach"]) == ["beach"]
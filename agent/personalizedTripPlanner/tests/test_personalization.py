@@ -0,0 +1,95 @@
+"""Personalization profiles stay per user even though agent sessions share one owner id."""
+
+import base64
+import json
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from personalized_trip_planner.profile_sync import PROFILE_KEY, seed_profile_from_marker
+from personalized_trip_planner.subagents.Personalization import personalization_agent
+from personalized_trip_planner.subagents.Personalization.tools.tools import _scorer, rank_candidates_tool_impl
+
+# Agent sessions handed out by the backend's pool all belong to this user id
+POOLED_USER = "pooled-user"
+
+
+class ProfileUpdatingLlm(BaseLlm):
+    """Stores the interest named in the user's message, then replies"""
+
+    model: str = "scripted"
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        last = llm_request.contents[-1].parts[0]
+        if last.function_response:
+            part = types.Part(text="Saved.")
+        else:
+            part = types.Part(function_call=types.FunctionCall(
+                name="update_user_profile_tool_impl",
+                args={"interests": [last.text], "budget_per_day": 0, "budget_band": "", "past_trips": []},
+            ))
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+
+async def _tell(runner: InMemoryRunner, session_id: str, text: str) -> None:
+    message = types.Content(role="user", parts=[types.Part(text=text)])
+    async for _ in runner.run_async(user_id=POOLED_USER, session_id=session_id, new_message=message):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_two_users_on_pooled_sessions_keep_separate_profiles():
+    agent = personalization_agent.clone(update={"model": ProfileUpdatingLlm()})
+    runner = InMemoryRunner(agent=agent, app_name="personalization")
+    first = await runner.session_service.create_session(app_name="personalization", user_id=POOLED_USER)
+    second = await runner.session_service.create_session(app_name="personalization", user_id=POOLED_USER)
+
+    await _tell(runner, first.id, "beach")
+    await _tell(runner, second.id, "heritage")
+
+    first = await runner.session_service.get_session(app_name="personalization", user_id=POOLED_USER, session_id=first.id)
+    second = await runner.session_service.get_session(app_name="personalization", user_id=POOLED_USER, session_id=second.id)
+    assert first.state[PROFILE_KEY]["interests"] == {"beach": 1.0}
+    assert second.state[PROFILE_KEY]["interests"] == {"heritage": 1.0}
+    assert not any(key.startswith("user:") for key in {**first.state, **second.state})
+
+
+class _Context:
+    def __init__(self):
+        self.state = {}
+
+
+def test_profile_marker_seeds_state_and_is_stripped():
+    profile = {"interests": {"food": 1.0}}
+    encoded = base64.urlsafe_b64encode(json.dumps(profile).encode()).decode()
+    request = LlmRequest(contents=[
+        types.Content(role="user", parts=[types.Part(text=f"[[route:PlanningAgent]] [[profile:{encoded}]] Plan Goa")]),
+    ])
+    context = _Context()
+
+    assert seed_profile_from_marker(context, request) is None
+    assert context.state[PROFILE_KEY] == profile
+    assert request.contents[0].parts[0].text == "[[route:PlanningAgent]] Plan Goa"
+
+
+def test_model_filled_fields_are_coerced():
+    profile = {"interests": {"beach": 1.0}, "budget_per_day": 4000}
+    ranked = _scorer.rank([
+        {"name": "Baga", "tags": "beach", "rating": None, "cost": "₹1,500"},
+        {"name": "Fort Aguada", "tags": ["heritage"], "rating": "4.5", "cost": "free"},
+    ], profile)
+
+    assert [item["name"] for item in ranked] == ["Baga", "Fort Aguada"]
+    assert ranked[0]["matched_interests"] == ["beach"]
+    assert all(isinstance(item["score"], float) and item["score"] == item["score"] for item in ranked)
+
+
+def test_rank_tool_reports_bad_arguments():
+    context = _Context()
+    result = rank_candidates_tool_impl([{"name": "Baga"}], "three", context)
+    assert result["success"] is False and "error" in result
@@ -0,0 +1,59 @@
+"""Drafted itinerary options are route-optimized without a model call."""
+
+import pytest
+
+from personalized_trip_planner.subagents.DataAggregator.tools.tools import distance_matrix_store
+from personalized_trip_planner.subagents.Planning.optimize import duration_minutes, optimize_option
+
+
+@pytest.fixture(autouse=True)
+def matrix_cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(distance_matrix_store, "cache_dir", str(tmp_path))
+
+
+def _stop(time, title, lat, lon):
+    return {"time": time, "title": title, "type": "activity", "duration": "1h 30m", "lat": lat, "lon": lon}
+
+
+def _option(activities):
+    return {"title": "Pink City", "destination": "Jaipur", "total_cost": 0,
+            "days": [{"day": 1, "title": "Forts", "activities": activities}]}
+
+
+def test_sightseeing_is_reordered_into_the_drafted_slots():
+    drafted = [
+        {"time": "08:00", "title": "Breakfast", "type": "dining"},
+        _stop("09:00", "Amber Fort", 26.9855, 75.8513),
+        _stop("11:00", "Albert Hall Museum", 26.9116, 75.8195),
+        {"time": "13:00", "title": "Lunch at LMB", "type": "dining"},
+        _stop("14:30", "Nahargarh Fort", 26.9373, 75.8155),
+        _stop("16:30", "Hawa Mahal", 26.9239, 75.8267),
+        _stop("18:00", "Jal Mahal", 26.9535, 75.8462),
+    ]
+    option = _option([dict(activity) for activity in drafted])
+
+    optimized = optimize_option(option)
+    activities = optimized["days"][0]["activities"]
+
+    assert [a["time"] for a in activities] == [a["time"] for a in drafted]
+    assert activities[0]["title"] == "Breakfast" and activities[3]["title"] == "Lunch at LMB"
+    assert sorted(a["title"] for a in activities) == sorted(a["title"] for a in drafted)
+    assert [a["title"] for a in activities] != [a["title"] for a in drafted]
+    assert optimized["notes"][-1].startswith("Sightseeing re-ordered")
+    # The drafted option is left as it was
+    assert [a["title"] for a in option["days"][0]["activities"]] == [a["title"] for a in drafted]
+
+
+def test_days_without_coordinates_are_untouched():
+    option = _option([
+        {"time": "09:00", "title": "City Palace", "type": "activity"},
+        {"time": "12:00", "title": "Jantar Mantar", "type": "activity"},
+        {"time": "15:00", "title": "Bapu Bazaar", "type": "activity"},
+    ])
+    assert optimize_option(option) == option
+
+
+def test_durations_in_hours_minutes_and_decimals():
+    durations = ["90 min", "2 hours", "1.5 hrs", "2h 30m", "1h30m", "45m", "about 2 hours and 15 minutes"]
+    assert [duration_minutes(d) for d in durations] == [90, 120, 90, 150, 90, 45, 135]
+    assert duration_minutes("") == duration_minutes("a while") == 60
@@ -0,0 +1,48 @@
+"""The sequential planning mode publishes its options in state like the parallel pipeline."""
+
+import json
+from typing import AsyncGenerator
+
+import pytest
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from personalized_trip_planner.subagents.Planning.agent import create_sequential_planning_agent
+
+OPTION = {
+    "title": "Heritage Jaipur", "destination": "Jaipur", "travelers": 2, "total_cost": 14000,
+    "days": [{"day": 1, "title": "Forts", "activities": [
+        {"time": "09:00", "title": "Amber Fort", "type": "activity", "cost": 500},
+        {"time": "20:00", "title": "Hotel Pearl Palace", "type": "accommodation", "cost": 3000,
+         "booking_required": True, "booking_type": "hotel"},
+    ]}],
+}
+
+
+class PlanningLlm(BaseLlm):
+    """Answers with a numbered plan followed by its JSON block"""
+
+    model: str = "scripted"
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        text = f"1. Heritage Jaipur\n\n```json\n{json.dumps({'options': [OPTION, {'title': 'No days'}]})}\n```"
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=text)]))
+
+
+@pytest.mark.asyncio
+async def test_reply_options_are_written_to_state():
+    agent = create_sequential_planning_agent().clone(update={"model": PlanningLlm()})
+    runner = InMemoryRunner(agent=agent, app_name="planning")
+    session = await runner.session_service.create_session(app_name="planning", user_id="u")
+    message = types.Content(role="user", parts=[types.Part(text="Plan 1 day in Jaipur")])
+    async for _ in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+        pass
+
+    session = await runner.session_service.get_session(app_name="planning", user_id="u", session_id=session.id)
+    options = session.state["itinerary"]["options"]
+    assert [option["title"] for option in options] == ["Heritage Jaipur"]
+    assert options[0]["days"][0]["activities"][1]["booking_required"] is True
+    assert not any(key.startswith("temp:") for key in session.state)
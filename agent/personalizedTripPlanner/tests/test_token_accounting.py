@@ -0,0 +1,75 @@
+"""Token usage of concurrent branches and tool calls adds up instead of overwriting each other."""
+
+import time
+from typing import AsyncGenerator, List
+
+import pytest
+from google.adk.agents import Agent, ParallelAgent
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from personalized_trip_planner.subagents.DataAggregator.tools import tools
+from personalized_trip_planner.subagents.DataAggregator.tools.search import StubSearchProvider
+from personalized_trip_planner.token_accounting import USAGE_KEY_PREFIX, install_token_accounting
+
+
+class MeteredProvider(StubSearchProvider):
+    """Stub results that report the tokens they cost; the first search requested finishes last"""
+
+    DELAYS = {"weather": 0.2, "events": 0.0, "transport": 0.1}
+
+    def search(self, query: str, category: str) -> dict:
+        time.sleep(self.DELAYS[category])
+        return {**super().search(query, category), "usage": {"input_tokens": 100, "output_tokens": 40}}
+
+
+class SearchingLlm(BaseLlm):
+    """Searches its categories in one response, then answers"""
+
+    model: str = "scripted"
+    categories: List[str] = []
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        if llm_request.contents[-1].parts[0].function_response:
+            parts = [types.Part(text="Done.")]
+        else:
+            parts = [
+                types.Part(function_call=types.FunctionCall(
+                    name="travel_search_tool_impl", args={"destination": "Jaipur", "category": category},
+                ))
+                for category in self.categories
+            ]
+        usage = types.GenerateContentResponseUsageMetadata(prompt_token_count=10, candidates_token_count=5)
+        yield LlmResponse(content=types.Content(role="model", parts=parts), usage_metadata=usage)
+
+
+def _branch(name, categories):
+    return Agent(name=name, model=SearchingLlm(categories=categories), tools=[tools.travel_search_tool])
+
+
+@pytest.mark.asyncio
+async def test_parallel_branches_keep_every_search_call(monkeypatch):
+    monkeypatch.setattr(tools.search_cache, "provider", MeteredProvider())
+    tools.search_cache.clear()
+    research = install_token_accounting(ParallelAgent(name="Research", sub_agents=[
+        _branch("ConditionsResearch", ["weather", "events"]),
+        _branch("LogisticsResearch", ["transport"]),
+    ]))
+    runner = InMemoryRunner(agent=research, app_name="accounting")
+    session = await runner.session_service.create_session(app_name="accounting", user_id="u")
+    message = types.Content(role="user", parts=[types.Part(text="Research Jaipur")])
+
+    # What the backend sees: the latest value of every usage key across event state deltas
+    usage = {}
+    async for event in runner.run_async(user_id="u", session_id=session.id, new_message=message):
+        for key, value in event.actions.state_delta.items():
+            if key.startswith(USAGE_KEY_PREFIX):
+                usage[key[len(USAGE_KEY_PREFIX):]] = value
+
+    searches = [value for key, value in usage.items() if key.startswith(tools.SEARCH_USAGE_SOURCE)]
+    assert sum(search["calls"] for search in searches) == 3
+    assert sum(search["input_tokens"] for search in searches) == 300
+    assert usage["ConditionsResearch"]["calls"] == usage["LogisticsResearch"]["calls"] == 2
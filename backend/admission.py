@@ -0,0 +1,189 @@
+"""
+Admission Control
+Backpressure in front of the agent so overload degrades into fast 429s.
+
+- global concurrency limit on in-flight agent calls
+- per-user token buckets (sustained rate + burst)
+- bounded FIFO wait queue; waiters give up after a deadline
+- rejections carry a Retry-After estimate from the recent service time
+
+Cached answers never reach the agent and are not admitted through here.
+"""
+
+import asyncio
+import math
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+
+class AdmissionRejected(Exception):
+    """The request cannot be served now; retry after `retry_after` seconds"""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def is_quota_error(error: BaseException) -> bool:
+    """Whether an agent error is Vertex pushing back (HTTP 429 / RESOURCE_EXHAUSTED)"""
+    code = getattr(error, "code", None)
+    if code == 429 or getattr(code, "value", None) == 429:
+        return True
+    text = str(error)
+    return "RESOURCE_EXHAUSTED" in text or "Quota exceeded" in text or re.search(r"\b429\b", text) is not None
+
+
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of `burst`"""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> float:
+        """Consume a token; return 0 on success or the seconds until one is available"""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionTicket:
+    """A held concurrency slot; release() is idempotent"""
+
+    def __init__(self, controller: "AdmissionController"):
+        self._controller = controller
+        self._started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self._controller._release(time.monotonic() - self._started)
+
+
+class AdmissionController:
+    """Concurrency semaphore + per-user token buckets + bounded queue with deadlines"""
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float,
+                 user_rate_per_minute: float, user_burst: int, max_users: int = 10000):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.user_rate = user_rate_per_minute / 60.0
+        self.user_burst = user_burst
+        self.max_users = max_users
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._buckets: "OrderedDict[str, TokenBucket]" = OrderedDict()
+        # Smoothed duration of an agent call, for Retry-After estimates
+        self._service_time = 5.0
+        self._stats = {"admitted": 0, "queued": 0, "rate_limited": 0, "overloaded": 0, "timed_out": 0}
+
+    def _check_rate(self, user_id: str) -> None:
+        if self.user_rate <= 0:
+            return
+        bucket = self._buckets.get(user_id)
+        if bucket is None:
+            bucket = self._buckets[user_id] = TokenBucket(self.user_rate, self.user_burst)
+            if len(self._buckets) > self.max_users:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(user_id)
+        wait = bucket.take()
+        if wait:
+            self._stats["rate_limited"] += 1
+            raise AdmissionRejected("rate_limited", wait)
+
+    def _queue_delay(self) -> float:
+        """Expected wait for a new arrival given the queue ahead of it"""
+        return self._service_time * (len(self._waiters) + 1) / max(self.max_concurrent, 1)
+
+    async def acquire(self, user_id: str) -> AdmissionTicket:
+        """Admit a request or raise AdmissionRejected"""
+        self._check_rate(user_id)
+
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self._stats["admitted"] += 1
+            return AdmissionTicket(self)
+
+        if len(self._waiters) >= self.max_queue:
+            self._stats["overloaded"] += 1
+            raise AdmissionRejected("overloaded", self._queue_delay())
+
+        # Wait for a released slot; release() hands it over without decrementing
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._stats["queued"] += 1
+        try:
+            await asyncio.wait({waiter}, timeout=self.queue_timeout)
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self._release(None)
+            else:
+                self._abandon(waiter)
+            raise
+
+        if not waiter.done():
+            self._abandon(waiter)
+            self._stats["timed_out"] += 1
+            raise AdmissionRejected("queue_timeout", self._queue_delay())
+
+        self._stats["admitted"] += 1
+        return AdmissionTicket(self)
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        waiter.cancel()
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    def _release(self, duration) -> None:
+        if duration is not None:
+            self._service_time = 0.8 * self._service_time + 0.2 * duration
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    @asynccontextmanager
+    async def slot(self, user_id: str):
+        ticket = await self.acquire(user_id)
+        try:
+            yield ticket
+        finally:
+            ticket.release()
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            **self._stats,
+            "active": self._active,
+            "waiting": len(self._waiters),
+            "max_concurrent": self.max_concurrent,
+            "service_time_seconds": round(self._service_time, 3),
+        }
+
+
+def create_admission_controller() -> AdmissionController:
+    """Build the controller from the ADMISSION_* environment variables"""
+    return AdmissionController(
+        max_concurrent=int(os.getenv("ADMISSION_MAX_CONCURRENT", "32")),
+        max_queue=int(os.getenv("ADMISSION_MAX_QUEUE", "64")),
+        queue_timeout=float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", "10")),
+        user_rate_per_minute=float(os.getenv("ADMISSION_USER_RATE_PER_MINUTE", "20")),
+        user_burst=int(os.getenv("ADMISSION_USER_BURST", "5")),
+    )
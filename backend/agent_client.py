@@ -0,0 +1,114 @@
+"""
+Async Agent Client
+Keeps the FastAPI event loop free while the Vertex AI Agent Engine is working.
+
+The remote agent only exposes a synchronous `stream_query` generator, so each
+stream is driven from a bounded thread pool and its events are handed back to
+the awaiting coroutine through an asyncio queue. When the agent exposes a
+native `async_stream_query`, that is used directly instead.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Dict, List
+
+# Markers pushed through the queue by the producer thread
+_DONE = object()
+
+
+class _StreamError:
+    """Wraps an exception raised inside the producer thread"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+def extract_text_parts(event: Dict[str, Any]) -> List[str]:
+    """Return the text parts carried by a single agent event"""
+    content = event.get("content") or {}
+    return [part["text"] for part in content.get("parts") or [] if "text" in part]
+
+
+class AsyncAgentClient:
+    """Async facade over a (synchronous) Agent Engine handle"""
+
+    def __init__(self, agent: Any, max_workers: int = None, use_native_async: bool = None):
+        self.agent = agent
+        self.max_workers = max_workers or int(os.getenv("AGENT_MAX_WORKERS", "32"))
+        if use_native_async is None:
+            use_native_async = os.getenv("AGENT_USE_NATIVE_ASYNC", "true").lower() == "true"
+        self.use_native_async = use_native_async and hasattr(agent, "async_stream_query")
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="agent-stream",
+        )
+
+    async def _run(self, func, *args, **kwargs):
+        """Run a blocking agent call on the pool without blocking the loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    async def create_session(self, user_id: str) -> Dict[str, Any]:
+        """Create a remote agent session"""
+        return await self._run(self.agent.create_session, user_id=user_id)
+
+    async def delete_session(self, user_id: str, session_id: str) -> None:
+        """Delete a remote agent session"""
+        await self._run(self.agent.delete_session, user_id=user_id, session_id=session_id)
+
+    async def get_session(self, user_id: str, session_id: str) -> Dict[str, Any]:
+        """Fetch a remote agent session, including its state"""
+        if self.use_native_async and hasattr(self.agent, "async_get_session"):
+            return await self.agent.async_get_session(user_id=user_id, session_id=session_id)
+        return await self._run(self.agent.get_session, user_id=user_id, session_id=session_id)
+
+    async def stream_query(self, user_id: str, session_id: str, message: str) -> AsyncIterator[Dict[str, Any]]:
+        """Yield agent events as they arrive without blocking the event loop"""
+        if self.use_native_async:
+            async for event in self.agent.async_stream_query(
+                user_id=user_id,
+                session_id=session_id,
+                message=message,
+            ):
+                yield event
+            return
+
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        cancelled = threading.Event()
+
+        def produce():
+            try:
+                for event in self.agent.stream_query(
+                    user_id=user_id,
+                    session_id=session_id,
+                    message=message,
+                ):
+                    if cancelled.is_set():
+                        break
+                    loop.call_soon_threadsafe(queue.put_nowait, event)
+            except BaseException as e:  # surfaced to the consumer below
+                loop.call_soon_threadsafe(queue.put_nowait, _StreamError(e))
+            finally:
+                loop.call_soon_threadsafe(queue.put_nowait, _DONE)
+
+        loop.run_in_executor(self._executor, produce)
+
+        try:
+            while True:
+                item = await queue.get()
+                if item is _DONE:
+                    break
+                if isinstance(item, _StreamError):
+                    raise item.error
+                yield item
+        finally:
+            # Lets the producer thread stop early if the consumer went away
+            cancelled.set()
+
+    def close(self) -> None:
+        """Release the worker threads"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
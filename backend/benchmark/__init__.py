@@ -0,0 +1,8 @@
+"""
+Offline benchmark suite for the backend.
+
+Drives the FastAPI app over HTTP, SSE and WebSocket against a fake Agent
+Engine that replays recorded agent event streams, so latency and
+throughput regressions in main.py show up without Vertex AI credentials.
+See `python -m benchmark --help`.
+"""
@@ -0,0 +1,175 @@
+"""
+Run the backend benchmark.
+
+    cd backend
+    python -m benchmark                                   # every scenario, in-process server, fake agent
+    python -m benchmark --scenarios sse --concurrency 64 --requests 1000
+    python -m benchmark --url http://localhost:8000       # an already running backend
+    python -m benchmark --scenarios checkout --concurrency 64 --requests 2000   # ledger under contention
+    python -m benchmark --baseline benchmark/results/baseline.json   # exit 1 on regressions
+
+Results are written as JSON to benchmark/results/ (or --output).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List
+
+from benchmark.fake_agent import AsyncFakeAgentEngine, FakeAgentEngine, load_recording
+from benchmark.load import SCENARIOS, InProcessServer, peak_rss_mb, rss_mb, run_scenario
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="python -m benchmark", description="Backend load benchmark")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help="comma separated: http,sse,ws,checkout")
+    parser.add_argument("--concurrency", type=int, default=16, help="virtual users per scenario")
+    parser.add_argument("--requests", type=int, default=200, help="messages (checkouts) per scenario")
+    parser.add_argument("--inventory", type=int, default=int(os.getenv("BOOKING_DEFAULT_INVENTORY", "100")),
+                        help="units per bookable item; set for the in-process ledger, must match a --url backend")
+    parser.add_argument("--message", default="Plan a 3 day heritage trip to Jaipur for two under Rs. 50000")
+    parser.add_argument("--use-cache", action="store_true", help="send identical messages and allow cache hits")
+    parser.add_argument("--url", help="benchmark a running backend instead of an in-process one")
+    fake = parser.add_argument_group("fake agent engine (in-process only)")
+    fake.add_argument("--recording", help="recorded event stream (default: recordings/trip_planning.json)")
+    fake.add_argument("--latency-scale", type=float, default=0.25, help="multiplier for recorded event offsets")
+    fake.add_argument("--first-event-ms", type=float, help="fixed time to first event instead of the recording")
+    fake.add_argument("--event-gap-ms", type=float, help="fixed gap between events instead of the recording")
+    fake.add_argument("--chunk-chars", type=int, default=0, help="re-chunk text parts to this many characters")
+    fake.add_argument("--session-latency-ms", type=float, default=0, help="delay of create_session")
+    fake.add_argument("--native-async", action="store_true", help="expose async_stream_query (no thread pool)")
+    parser.add_argument("--output", help="result file (default: benchmark/results/benchmark-<time>.json)")
+    parser.add_argument("--baseline", help="earlier result file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed relative regression (0.2 = 20%%)")
+    return parser.parse_args(argv)
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def find_regressions(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Scenarios whose p95 latency, throughput or error rate got worse than allowed"""
+    regressions = []
+    for name, current in result["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        p95, p95_before = current["latency_ms"]["p95"], before["latency_ms"]["p95"]
+        if p95 and p95_before and p95 > p95_before * (1 + tolerance):
+            regressions.append(f"{name}: p95 latency {p95_before}ms -> {p95}ms")
+        if current["throughput_rps"] < before["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{name}: throughput {before['throughput_rps']} -> {current['throughput_rps']} rps")
+        if current["error_rate"] > before["error_rate"] + 0.01:
+            regressions.append(f"{name}: error rate {before['error_rate']} -> {current['error_rate']}")
+    return regressions
+
+
+async def run_all(base_url: str, args: argparse.Namespace) -> Dict[str, Any]:
+    scenarios = {}
+    for scenario in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+        if scenario not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario: {scenario}")
+        print(f"🚀 {scenario}: {args.requests} messages from {args.concurrency} users")
+        scenarios[scenario] = await run_scenario(
+            base_url, scenario, args.concurrency, args.requests, args.message, args.use_cache,
+            inventory=args.inventory,
+        )
+        summary = scenarios[scenario]
+        print(f"✅ {scenario}: {summary['throughput_rps']} rps, p50 {summary['latency_ms']['p50']}ms, "
+              f"p95 {summary['latency_ms']['p95']}ms, p99 {summary['latency_ms']['p99']}ms, "
+              f"errors {summary['errors'] or 0}")
+        if "checks" in summary:
+            checks = summary["checks"]
+            print(f"{'✅' if checks['passed'] else '❌'} {scenario}: {checks['bookings']} bookings for "
+                  f"{checks['keys']} keys, {checks['sold_out_keys']} sold out, "
+                  f"overbooked {checks['overbooked_skus'] or 'none'}")
+    return scenarios
+
+
+def run_in_process(args: argparse.Namespace) -> Dict[str, Any]:
+    # Keep the run self-contained: throwaway ledger, no per-user rate limit
+    scratch = tempfile.mkdtemp()
+    os.environ.setdefault("BOOKING_LEDGER_PATH", os.path.join(scratch, "bookings.db"))
+    os.environ.setdefault("PROFILE_DB_PATH", os.path.join(scratch, "profiles.db"))
+    os.environ.setdefault("SESSION_STORE", "memory")
+    os.environ.setdefault("ADMISSION_USER_RATE_PER_MINUTE", "0")
+    os.environ["BOOKING_DEFAULT_INVENTORY"] = str(args.inventory)
+
+    import main
+
+    engine_class = AsyncFakeAgentEngine if args.native_async else FakeAgentEngine
+    engine = engine_class(
+        load_recording(args.recording),
+        latency_scale=args.latency_scale,
+        first_event_ms=args.first_event_ms,
+        event_gap_ms=args.event_gap_ms,
+        chunk_chars=args.chunk_chars,
+        session_latency_ms=args.session_latency_ms,
+    )
+    # startup_event() skips Vertex AI when an agent is already set
+    main.agent = engine
+
+    with InProcessServer(main.app) as server:
+        rss_start = rss_mb()
+        scenarios = asyncio.run(run_all(server.url, args))
+        rss_end = rss_mb()
+        memory = {"rss_mb_start": rss_start, "rss_mb_end": rss_end, "peak_rss_mb": max(rss_end, peak_rss_mb())}
+    return {"scenarios": scenarios, "memory": memory, "agent_queries": engine.queries}
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    if args.url:
+        result = {"scenarios": asyncio.run(run_all(args.url.rstrip("/"), args)), "memory": None}
+    else:
+        result = run_in_process(args)
+
+    result = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "config": vars(args),
+        **result,
+    }
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"benchmark-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"📝 Results written to {output}")
+
+    failed_checks = [name for name, summary in result["scenarios"].items()
+                     if not summary.get("checks", {}).get("passed", True)]
+    for name in failed_checks:
+        print(f"❌ {name}: booking invariants violated, see {output}")
+    if failed_checks:
+        return 1
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = find_regressions(result, json.load(f), args.tolerance)
+        for regression in regressions:
+            print(f"❌ Regression: {regression}")
+        if regressions:
+            return 1
+        print("✅ No regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
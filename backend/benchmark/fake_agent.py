@@ -0,0 +1,113 @@
+"""
+Fake Agent Engine
+Stand-in for `agent_engines.get(...)` that replays a recorded event stream.
+
+Recordings are JSON files with the events of one real agent run and the
+offset (seconds since the query started) at which each one arrived:
+
+    {"session_state": {...}, "events": [{"offset": 0.8, "event": {...}}, ...]}
+
+Replay timing can be scaled, or replaced by a fixed first-event latency and
+inter-event gap, and text parts can be re-chunked to exercise streaming.
+"""
+
+import asyncio
+import copy
+import json
+import os
+import time
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+RECORDINGS_DIR = os.path.join(os.path.dirname(__file__), "recordings")
+DEFAULT_RECORDING = os.path.join(RECORDINGS_DIR, "trip_planning.json")
+
+
+def load_recording(path: Optional[str] = None) -> Dict[str, Any]:
+    with open(path or DEFAULT_RECORDING, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def rechunk(event: Dict[str, Any], chunk_chars: int) -> List[Dict[str, Any]]:
+    """Split an event's text parts into events of at most chunk_chars characters"""
+    parts = (event.get("content") or {}).get("parts") or []
+    if not chunk_chars or not any("text" in part for part in parts):
+        return [event]
+    chunked = []
+    for part in parts:
+        if "text" not in part:
+            chunked.append({**event, "content": {**event["content"], "parts": [part]}})
+            continue
+        text = part["text"]
+        for start in range(0, len(text), chunk_chars):
+            chunked.append({
+                **event,
+                "content": {**event["content"], "parts": [{"text": text[start:start + chunk_chars]}]},
+            })
+    return chunked
+
+
+class FakeAgentEngine:
+    """Replays one recording for every query; sessions live in memory"""
+
+    def __init__(self, recording: Optional[Dict[str, Any]] = None, latency_scale: float = 1.0,
+                 first_event_ms: Optional[float] = None, event_gap_ms: Optional[float] = None,
+                 chunk_chars: int = 0, session_latency_ms: float = 0):
+        self.recording = recording or load_recording()
+        self.session_latency = session_latency_ms / 1000.0
+        self.sessions: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.timeline = self._timeline(latency_scale, first_event_ms, event_gap_ms, chunk_chars)
+        self.queries = 0
+
+    def _timeline(self, latency_scale, first_event_ms, event_gap_ms, chunk_chars) -> List[Tuple[float, Dict]]:
+        """(offset seconds, event) pairs in replay order"""
+        timeline = []
+        for entry in self.recording["events"]:
+            for event in rechunk(entry["event"], chunk_chars):
+                timeline.append((entry["offset"] * latency_scale, event))
+        if first_event_ms is not None or event_gap_ms is not None:
+            first = (first_event_ms if first_event_ms is not None else 0) / 1000.0
+            gap = (event_gap_ms if event_gap_ms is not None else 0) / 1000.0
+            timeline = [(first + i * gap, event) for i, (_, event) in enumerate(timeline)]
+        return timeline
+
+    def create_session(self, user_id: str) -> Dict[str, Any]:
+        if self.session_latency:
+            time.sleep(self.session_latency)
+        session = {"id": str(uuid4()), "user_id": user_id, "state": {}}
+        self.sessions[(user_id, session["id"])] = session
+        return session
+
+    def delete_session(self, user_id: str, session_id: str) -> None:
+        self.sessions.pop((user_id, session_id), None)
+
+    def get_session(self, user_id: str, session_id: str) -> Dict[str, Any]:
+        session = self.sessions.get((user_id, session_id))
+        if session is None:
+            raise ValueError(f"Session not found: {session_id}")
+        return {**session, "state": copy.deepcopy(self.recording.get("session_state", {}))}
+
+    def stream_query(self, user_id: str, session_id: str, message: str) -> Iterator[Dict[str, Any]]:
+        self.queries += 1
+        started = time.monotonic()
+        for offset, event in self.timeline:
+            delay = offset - (time.monotonic() - started)
+            if delay > 0:
+                time.sleep(delay)
+            yield copy.deepcopy(event)
+
+
+class AsyncFakeAgentEngine(FakeAgentEngine):
+    """Also offers the native async API, so AsyncAgentClient skips its thread pool"""
+
+    async def async_get_session(self, user_id: str, session_id: str) -> Dict[str, Any]:
+        return self.get_session(user_id, session_id)
+
+    async def async_stream_query(self, user_id: str, session_id: str, message: str):
+        self.queries += 1
+        started = time.monotonic()
+        for offset, event in self.timeline:
+            delay = offset - (time.monotonic() - started)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            yield copy.deepcopy(event)
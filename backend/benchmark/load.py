@@ -0,0 +1,309 @@
+"""
+Load driver
+Runs chat scenarios against the backend at a fixed concurrency and reports
+throughput, latency percentiles and time to first chunk.
+
+Scenarios:
+- http: POST /api/v1/chat/message (full response)
+- sse:  POST /api/v1/chat/stream (Server-Sent Events)
+- ws:   /ws/{session_id} (WebSocket chunks until "done")
+- checkout: POST /api/v1/booking/checkout, every Idempotency-Key sent
+  CHECKOUT_COPIES times at once, all users booking the same items
+
+Every virtual user opens its own chat session first (and, for checkout,
+generates an itinerary); session setup is not part of the measured latency.
+
+The checkout scenario also verifies the booking ledger under contention:
+every key yields exactly one booking (or a sold-out answer to each copy),
+and no item is booked beyond the inventory.
+"""
+
+import asyncio
+import itertools
+import json
+import resource
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+import websockets
+
+from booking_ledger import item_sku
+
+SCENARIOS = ("http", "sse", "ws", "checkout")
+
+# Concurrent retries of each checkout, as from a double-click or a client retry
+CHECKOUT_COPIES = 3
+
+
+def percentile(samples: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile, in milliseconds rounded to 0.1"""
+    if not samples:
+        return None
+    ordered = sorted(samples)
+    value = ordered[min(len(ordered) - 1, max(0, int(round(q * len(ordered) + 0.5)) - 1))]
+    return round(value * 1000, 1)
+
+
+def rss_mb() -> float:
+    """Current resident set size of this process (server + driver when run in-process)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return peak_rss_mb()
+
+
+def peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+
+class ScenarioResult:
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: List[float] = []
+        self.first_chunk: List[float] = []
+        self.errors: Dict[str, int] = {}
+        # checkout: Idempotency-Key -> (status, booking) of every copy sent
+        self.checkouts: Dict[str, List[tuple]] = {}
+        self.started = self.finished = 0.0
+
+    def error(self, reason: str) -> None:
+        self.errors[reason] = self.errors.get(reason, 0) + 1
+
+    def verify_checkouts(self, inventory: int) -> Dict[str, Any]:
+        """Ledger invariants over every checkout response"""
+        bookings: Dict[str, Dict[str, Any]] = {}
+        duplicated, mixed, sold_out = [], [], 0
+        for key, answers in self.checkouts.items():
+            booking_ids = {booking["booking_id"] for status, booking in answers if status == 200}
+            statuses = {status for status, _ in answers}
+            if len(booking_ids) > 1:
+                duplicated.append(key)
+            if statuses == {409}:
+                sold_out += 1
+            elif statuses != {200}:
+                mixed.append(key)
+            bookings.update((booking["booking_id"], booking) for status, booking in answers if status == 200)
+
+        booked: Dict[str, int] = {}
+        for booking in bookings.values():
+            for item in booking["items"]:
+                sku = item_sku(item)
+                booked[sku] = booked.get(sku, 0) + int(item.get("quantity", 1))
+        overbooked = {sku: count for sku, count in booked.items() if count > inventory}
+        return {
+            "keys": len(self.checkouts),
+            "bookings": len(bookings),
+            "sold_out_keys": sold_out,
+            "keys_with_several_bookings": duplicated[:10],
+            "keys_with_mixed_answers": mixed[:10],
+            "overbooked_skus": overbooked,
+            "passed": not (duplicated or mixed or overbooked),
+        }
+
+    def summary(self, inventory: Optional[int] = None) -> Dict[str, Any]:
+        duration = self.finished - self.started
+        completed = len(self.latencies)
+        total = completed + sum(self.errors.values())
+        return {
+            "requests": total,
+            "completed": completed,
+            "errors": self.errors,
+            "error_rate": round(1 - completed / total, 4) if total else 0,
+            "duration_seconds": round(duration, 3),
+            "throughput_rps": round(completed / duration, 2) if duration else 0,
+            "latency_ms": {
+                "p50": percentile(self.latencies, 0.50),
+                "p95": percentile(self.latencies, 0.95),
+                "p99": percentile(self.latencies, 0.99),
+                "mean": round(sum(self.latencies) / completed * 1000, 1) if completed else None,
+            },
+            "first_chunk_ms": {
+                "p50": percentile(self.first_chunk, 0.50),
+                "p95": percentile(self.first_chunk, 0.95),
+                "p99": percentile(self.first_chunk, 0.99),
+            } if self.first_chunk else None,
+            **({"checks": self.verify_checkouts(inventory)} if self.checkouts else {}),
+        }
+
+
+async def _http_message(client: httpx.AsyncClient, user: Dict[str, Any], message: str,
+                        use_cache: bool, result: ScenarioResult) -> None:
+    started = time.perf_counter()
+    response = await client.post("/api/v1/chat/message", json={
+        "message": message, "session_id": user["session_id"], "user_id": user["user_id"], "use_cache": use_cache,
+    })
+    if response.status_code != 200:
+        result.error(f"http_{response.status_code}")
+        return
+    result.latencies.append(time.perf_counter() - started)
+
+
+async def _sse_message(client: httpx.AsyncClient, user: Dict[str, Any], message: str,
+                       use_cache: bool, result: ScenarioResult) -> None:
+    started = time.perf_counter()
+    first_chunk = None
+    event_name = None
+    async with client.stream("POST", "/api/v1/chat/stream", json={
+        "message": message, "session_id": user["session_id"], "user_id": user["user_id"], "use_cache": use_cache,
+    }) as response:
+        if response.status_code != 200:
+            result.error(f"http_{response.status_code}")
+            return
+        async for line in response.aiter_lines():
+            if line.startswith("event: "):
+                event_name = line[7:]
+                if event_name == "chunk" and first_chunk is None:
+                    first_chunk = time.perf_counter() - started
+                elif event_name == "error":
+                    result.error("sse_error")
+                    return
+    if event_name != "done":
+        result.error("sse_incomplete")
+        return
+    result.latencies.append(time.perf_counter() - started)
+    if first_chunk is not None:
+        result.first_chunk.append(first_chunk)
+
+
+async def _ws_message(client: httpx.AsyncClient, user: Dict[str, Any], message: str,
+                      use_cache: bool, result: ScenarioResult) -> None:
+    websocket = user["websocket"]
+    started = time.perf_counter()
+    first_chunk = None
+    await websocket.send(json.dumps({"message": message}))
+    while True:
+        data = json.loads(await websocket.recv())
+        if data["type"] == "chunk" and first_chunk is None:
+            first_chunk = time.perf_counter() - started
+        elif data["type"] == "done":
+            break
+        elif data["type"] in ("error", "degraded"):
+            result.error(f"ws_{data['type']}")
+            return
+    result.latencies.append(time.perf_counter() - started)
+    if first_chunk is not None:
+        result.first_chunk.append(first_chunk)
+
+
+async def _checkout(client: httpx.AsyncClient, user: Dict[str, Any], message: str,
+                    use_cache: bool, result: ScenarioResult) -> None:
+    key = f"{user['user_id']}-{user['sent']}"
+    body = {"session_id": user["session_id"], "user_id": user["user_id"],
+            "itinerary_id": user["itinerary_id"], "payment_info": {"method": "benchmark"}}
+
+    async def one_copy() -> None:
+        started = time.perf_counter()
+        response = await client.post("/api/v1/booking/checkout", json=body, headers={"Idempotency-Key": key})
+        # Sold out (409) is the ledger doing its job, not a failure
+        if response.status_code not in (200, 409):
+            result.error(f"http_{response.status_code}")
+            return
+        result.latencies.append(time.perf_counter() - started)
+        booking = response.json() if response.status_code == 200 else None
+        result.checkouts.setdefault(key, []).append((response.status_code, booking))
+
+    await asyncio.gather(*(one_copy() for _ in range(CHECKOUT_COPIES)))
+
+
+_SENDERS: Dict[str, Callable] = {"http": _http_message, "sse": _sse_message, "ws": _ws_message,
+                                 "checkout": _checkout}
+
+
+async def run_scenario(base_url: str, scenario: str, concurrency: int, requests: int,
+                       message: str, use_cache: bool = False, timeout: float = 120,
+                       inventory: int = 100) -> Dict[str, Any]:
+    """Send `requests` messages (checkouts) from `concurrency` virtual users and summarize
+
+    `inventory` is the backend's BOOKING_DEFAULT_INVENTORY, for the checkout checks.
+    """
+    send = _SENDERS[scenario]
+    result = ScenarioResult(scenario)
+    limits = httpx.Limits(max_connections=concurrency * 2, max_keepalive_connections=concurrency * 2)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+        async def open_session(index: int) -> Optional[Dict[str, Any]]:
+            user_id = f"bench-{scenario}-{index}"
+            response = await client.post("/api/v1/chat/session", params={"user_id": user_id})
+            if response.status_code != 200:
+                result.error(f"session_{response.status_code}")
+                return None
+            user = {"user_id": user_id, "session_id": response.json()["session_id"], "sent": 0}
+            if scenario == "checkout":
+                response = await client.post("/api/v1/itinerary/generate", json={
+                    "session_id": user["session_id"], "user_id": user_id, "preferences": {"request": message},
+                    "use_cache": False, "use_templates": False,
+                })
+                if response.status_code != 200 or not response.json().get("options"):
+                    result.error(f"itinerary_{response.status_code}")
+                    return None
+                user["itinerary_id"] = response.json()["itinerary_id"]
+            if scenario == "ws":
+                # The UI keeps one socket per chat, so connect once per virtual user
+                ws_url = "ws" + base_url[len("http"):]
+                user["websocket"] = await websockets.connect(f"{ws_url}/ws/{user['session_id']}")
+            return user
+
+        users = [user for user in await asyncio.gather(*(open_session(i) for i in range(concurrency))) if user]
+        counter = itertools.count()
+
+        async def virtual_user(user: Dict[str, Any]) -> None:
+            while next(counter) < requests:
+                user["sent"] += 1
+                # Unique text keeps the response cache out of the measurement
+                text = message if use_cache else f"{message} [{user['user_id']} #{user['sent']}]"
+                try:
+                    await send(client, user, text, use_cache, result)
+                except Exception as e:
+                    result.error(type(e).__name__)
+
+        result.started = time.perf_counter()
+        await asyncio.gather(*(virtual_user(user) for user in users))
+        result.finished = time.perf_counter()
+
+        for user in users:
+            if "websocket" in user:
+                await user["websocket"].close()
+    return result.summary(inventory)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class InProcessServer:
+    """uvicorn serving the app on a background thread"""
+
+    def __init__(self, app, port: Optional[int] = None):
+        import uvicorn
+
+        self.port = port or free_port()
+        self.server = uvicorn.Server(uvicorn.Config(
+            app, host="127.0.0.1", port=self.port, log_level="warning", ws="websockets",
+        ))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def __enter__(self) -> "InProcessServer":
+        self.thread.start()
+        deadline = time.monotonic() + 30
+        while not self.server.started:
+            if not self.thread.is_alive() or time.monotonic() > deadline:
+                raise RuntimeError("Benchmark server failed to start")
+            time.sleep(0.05)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
@@ -0,0 +1,52 @@
+"""
+Record a live agent run for replay by the fake Agent Engine.
+
+    cd backend
+    python -m benchmark.record "Plan a weekend in Goa" -o benchmark/recordings/goa.json
+
+Uses the same GOOGLE_CLOUD_* / VERTEX_AI_AGENT_RESOURCE_ID settings as the
+backend. The temporary agent session is deleted afterwards.
+"""
+
+import argparse
+import json
+import os
+import time
+
+from dotenv import load_dotenv
+
+
+def record(message: str, user_id: str) -> dict:
+    import vertexai
+    from vertexai import agent_engines
+
+    vertexai.init(
+        project=os.environ["GOOGLE_CLOUD_PROJECT"],
+        location=os.environ["GOOGLE_CLOUD_LOCATION"],
+        staging_bucket=f"gs://{os.environ['GOOGLE_CLOUD_STORAGE_BUCKET']}",
+    )
+    agent = agent_engines.get(os.environ["VERTEX_AI_AGENT_RESOURCE_ID"])
+    session = agent.create_session(user_id=user_id)
+    try:
+        events = []
+        started = time.monotonic()
+        for event in agent.stream_query(user_id=user_id, session_id=session["id"], message=message):
+            events.append({"offset": round(time.monotonic() - started, 3), "event": event})
+        state = agent.get_session(user_id=user_id, session_id=session["id"]).get("state", {})
+    finally:
+        agent.delete_session(user_id=user_id, session_id=session["id"])
+    return {"message": message, "session_state": state, "events": events}
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(prog="python -m benchmark.record")
+    parser.add_argument("message")
+    parser.add_argument("-o", "--output", required=True)
+    parser.add_argument("--user-id", default="benchmark-recorder")
+    args = parser.parse_args()
+
+    recording = record(args.message, args.user_id)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(recording, f, indent=2, ensure_ascii=False, default=str)
+    print(f"✅ Recorded {len(recording['events'])} events to {args.output}")
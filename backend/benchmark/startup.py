@@ -0,0 +1,174 @@
+"""
+Cold start benchmark and import-time profile.
+
+    cd backend
+    python -m benchmark.startup                     # backend import, time to ready, agent package import
+    python -m benchmark.startup --runs 10 --top 20
+
+Every measurement runs in a fresh interpreter so module caches don't hide
+import cost:
+- backend_import: `import main`, with the slowest modules from -X importtime
+- backend_ready: process start until GET /health answers (fake agent engine)
+- agent_import: `import personalized_trip_planner` and the first build of
+  every root tool declaration (what the first model call pays)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmark.load import free_port
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+AGENT_DIR = os.path.join(os.path.dirname(BACKEND_DIR), "agent", "personalizedTripPlanner")
+
+READY_SCRIPT = """
+import os, sys, tempfile, uvicorn
+os.environ.setdefault("BOOKING_LEDGER_PATH", os.path.join(tempfile.mkdtemp(), "bookings.db"))
+import main
+from benchmark.fake_agent import FakeAgentEngine
+main.agent = FakeAgentEngine()
+uvicorn.run(main.app, host="127.0.0.1", port=int(sys.argv[1]), log_level="warning")
+"""
+
+AGENT_SCRIPT = """
+import json, time
+started = time.perf_counter()
+from personalized_trip_planner.agent import root_agent
+imported = time.perf_counter()
+for tool in root_agent.tools:
+    tool._get_declaration()
+declared = time.perf_counter()
+print(json.dumps({"import_seconds": imported - started, "declarations_seconds": declared - imported}))
+"""
+
+
+def parse_importtime(stderr: str, top: int) -> List[Dict[str, Any]]:
+    """Slowest modules by cumulative import time from `python -X importtime` output"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields = line[len("import time:"):].split("|")
+        # Skips the "self [us] | cumulative | imported package" header
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        self_us, cumulative_us, name = fields
+        depth = (len(name) - len(name.lstrip(" ")) - 1) // 2
+        modules.append({
+            "module": name.strip(),
+            "depth": depth,
+            "self_ms": round(int(self_us) / 1000, 1),
+            "cumulative_ms": round(int(cumulative_us) / 1000, 1),
+        })
+    modules.sort(key=lambda m: m["cumulative_ms"], reverse=True)
+    return modules[:top]
+
+
+def backend_import(runs: int, top: int) -> Dict[str, Any]:
+    timings, profile = [], []
+    for _ in range(runs):
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import main"],
+            cwd=BACKEND_DIR, capture_output=True, text=True,
+            env={**os.environ, "BOOKING_LEDGER_PATH": ":memory:"},
+        )
+        timings.append(time.perf_counter() - started)
+        if completed.returncode != 0:
+            raise RuntimeError(completed.stderr[-2000:])
+        profile = parse_importtime(completed.stderr, top)
+    return {"median_seconds": round(statistics.median(timings), 3), "runs": timings, "slowest_modules": profile}
+
+
+def backend_ready(runs: int, timeout: float = 60) -> Dict[str, Any]:
+    timings = []
+    for _ in range(runs):
+        port = free_port()
+        started = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, "-c", READY_SCRIPT, str(port)],
+            cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            while True:
+                if process.poll() is not None:
+                    raise RuntimeError("Backend exited before becoming ready")
+                if time.perf_counter() - started > timeout:
+                    raise RuntimeError("Backend did not become ready in time")
+                try:
+                    if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    pass
+                time.sleep(0.02)
+            timings.append(time.perf_counter() - started)
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+    return {"median_seconds": round(statistics.median(timings), 3), "runs": timings}
+
+
+def agent_import(runs: int) -> Dict[str, Any]:
+    if not os.path.isdir(AGENT_DIR):
+        return {"skipped": f"{AGENT_DIR} not found"}
+    results = []
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-c", AGENT_SCRIPT], cwd=AGENT_DIR, capture_output=True, text=True,
+            env={**os.environ, "PYTHONPATH": AGENT_DIR},
+        )
+        if completed.returncode != 0:
+            return {"skipped": completed.stderr.strip().splitlines()[-1]}
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    return {
+        "import_median_seconds": round(statistics.median(r["import_seconds"] for r in results), 3),
+        "declarations_median_seconds": round(statistics.median(r["declarations_seconds"] for r in results), 3),
+    }
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmark.startup", description="Cold start benchmark")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="modules to list in the import profile")
+    parser.add_argument("--output", help="result file (default: benchmark/results/startup-<time>.json)")
+    args = parser.parse_args(argv)
+
+    result = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "backend_import": backend_import(args.runs, args.top),
+        "backend_ready": backend_ready(args.runs),
+        "agent_import": agent_import(args.runs),
+    }
+
+    print(f"✅ Backend import: {result['backend_import']['median_seconds']}s (median of {args.runs})")
+    for module in result["backend_import"]["slowest_modules"]:
+        print(f"   {module['cumulative_ms']:>9.1f} ms  {'  ' * module['depth']}{module['module']}")
+    print(f"✅ Backend ready: {result['backend_ready']['median_seconds']}s")
+    agent = result["agent_import"]
+    if "skipped" in agent:
+        print(f"⚠️ Agent package skipped: {agent['skipped']}")
+    else:
+        print(f"✅ Agent package import: {agent['import_median_seconds']}s, "
+              f"tool declarations: {agent['declarations_median_seconds']}s")
+
+    output = args.output or os.path.join(
+        BACKEND_DIR, "benchmark", "results", f"startup-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+    print(f"📝 Results written to {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+"""
+Booking Ledger
+Append-only SQLite ledger for checkouts with simulated supplier inventory.
+
+Every checkout runs in one write transaction that:
+1. returns the stored result if the idempotency key was seen before
+2. atomically decrements inventory for every item (all or nothing)
+3. appends one ledger row per reserved item plus the booking confirmation
+4. records the response under the idempotency key
+
+Retries with the same key therefore never book twice, and concurrent
+checkouts, even from other workers sharing the file, serialize on SQLite's
+write lock instead of racing. Rows are never updated or deleted; a
+booking's state is the latest event recorded for it.
+"""
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Tuple
+from uuid import uuid4
+
+
+class IdempotencyConflict(Exception):
+    """The idempotency key was already used for a different request"""
+
+
+class SoldOut(Exception):
+    """Not enough inventory for an item"""
+
+    def __init__(self, sku: str):
+        super().__init__(f"Sold out: {sku}")
+        self.sku = sku
+
+
+def item_sku(item: Dict[str, Any]) -> str:
+    """Inventory key of a bookable item: type, name and date"""
+    name = re.sub(r"[^a-z0-9]+", "-", str(item.get("title", "")).lower()).strip("-")
+    return f"{item.get('booking_type') or item.get('type') or 'other'}:{name}:{item.get('date', '')}"
+
+
+def request_fingerprint(payload: Any) -> str:
+    """Stable hash of a request body, to detect reuse of a key for another request"""
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class BookingLedger:
+    """SQLite ledger with idempotency records and inventory counts"""
+
+    def __init__(self, path: str, default_inventory: int):
+        self.path = path
+        self.default_inventory = default_inventory
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # WAL keeps committed transactions safe; skip the fsync per commit
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(
+            "CREATE TABLE IF NOT EXISTS inventory ("
+            "  sku TEXT PRIMARY KEY, available INTEGER NOT NULL CHECK (available >= 0));"
+            "CREATE TABLE IF NOT EXISTS ledger ("
+            "  seq INTEGER PRIMARY KEY AUTOINCREMENT, booking_id TEXT NOT NULL, event TEXT NOT NULL,"
+            "  sku TEXT, quantity INTEGER, data TEXT, created_at REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS idx_ledger_booking ON ledger (booking_id);"
+            "CREATE TABLE IF NOT EXISTS idempotency ("
+            "  key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, booking_id TEXT NOT NULL,"
+            "  response TEXT NOT NULL, created_at REAL NOT NULL);"
+        )
+
+    def checkout(self, idempotency_key: str, fingerprint: str, items: List[Dict[str, Any]],
+                 booking: Dict[str, Any]) -> Tuple[Dict[str, Any], bool]:
+        """Book all items once per key; returns (response, replayed)"""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT fingerprint, response FROM idempotency WHERE key = ?", (idempotency_key,)
+                ).fetchone()
+                if row:
+                    self._conn.execute("ROLLBACK")
+                    if row[0] != fingerprint:
+                        raise IdempotencyConflict(idempotency_key)
+                    return json.loads(row[1]), True
+
+                booking_id = str(uuid4())
+                now = time.time()
+                for item in items:
+                    sku, quantity = item_sku(item), int(item.get("quantity", 1) or 1)
+                    self._conn.execute(
+                        "INSERT OR IGNORE INTO inventory (sku, available) VALUES (?, ?)",
+                        (sku, self.default_inventory),
+                    )
+                    updated = self._conn.execute(
+                        "UPDATE inventory SET available = available - ? WHERE sku = ? AND available >= ?",
+                        (quantity, sku, quantity),
+                    ).rowcount
+                    if not updated:
+                        raise SoldOut(sku)
+                    self._conn.execute(
+                        "INSERT INTO ledger (booking_id, event, sku, quantity, data, created_at) "
+                        "VALUES (?, 'reserved', ?, ?, ?, ?)",
+                        (booking_id, sku, quantity, json.dumps(item), now),
+                    )
+
+                response = {**booking, "booking_id": booking_id}
+                self._conn.execute(
+                    "INSERT INTO ledger (booking_id, event, data, created_at) VALUES (?, 'confirmed', ?, ?)",
+                    (booking_id, json.dumps(response), now),
+                )
+                self._conn.execute(
+                    "INSERT INTO idempotency (key, fingerprint, booking_id, response, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (idempotency_key, fingerprint, booking_id, json.dumps(response), now),
+                )
+                self._conn.execute("COMMIT")
+                return response, False
+            except IdempotencyConflict:
+                raise
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def available(self, sku: str) -> int:
+        with self._lock:
+            row = self._conn.execute("SELECT available FROM inventory WHERE sku = ?", (sku,)).fetchone()
+        return row[0] if row else self.default_inventory
+
+    def events(self, booking_id: str) -> List[Dict[str, Any]]:
+        """Ledger history of one booking, oldest first"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT seq, event, sku, quantity, data, created_at FROM ledger WHERE booking_id = ? ORDER BY seq",
+                (booking_id,),
+            ).fetchall()
+        return [
+            {"seq": seq, "event": event, "sku": sku, "quantity": quantity,
+             "data": json.loads(data) if data else None, "created_at": created_at}
+            for seq, event, sku, quantity, data, created_at in rows
+        ]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_booking_ledger() -> BookingLedger:
+    """Build the ledger from BOOKING_LEDGER_PATH and BOOKING_DEFAULT_INVENTORY"""
+    return BookingLedger(
+        path=os.getenv("BOOKING_LEDGER_PATH", "bookings.db"),
+        default_inventory=int(os.getenv("BOOKING_DEFAULT_INVENTORY", "100")),
+    )
@@ -0,0 +1,225 @@
+"""
+Chat History
+Memory-bounded per-session chat history.
+
+Turns live in the session's `messages` list so every session store backend
+keeps working unchanged, with bookkeeping under `session_data["history"]`:
+- the newest turns stay as plain text
+- older turns are folded into a rolling extractive summary and, when large,
+  stored zlib-compressed (base64, so sessions stay JSON serializable)
+- once a session exceeds its byte budget the oldest turns are dropped;
+  the summary still remembers them
+- history is read back a page at a time with a `before` cursor
+
+Agent sessions accumulate every event, so the context sent to Gemini grows
+with each turn. With HISTORY_ROTATE_AFTER_TURNS (or ..._INPUT_TOKENS) set,
+the caller moves the chat to a fresh agent session after that many agent
+turns (or once root_agent's input reaches that many tokens) and seeds it with
+`seed_context()` (summary + last few turns) instead of the full transcript.
+"""
+
+import base64
+import json
+import os
+import re
+import zlib
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+def _size(entry: Dict[str, Any]) -> int:
+    """Serialized size of a history entry in bytes"""
+    return len(json.dumps(entry, default=str).encode("utf-8"))
+
+
+def _clip(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + "…"
+
+
+def _first_sentence(text: str, limit: int) -> str:
+    text = " ".join(text.split())
+    return _clip(_SENTENCE_END.split(text, 1)[0], limit)
+
+
+class ChatHistory:
+    """Appends, compacts and pages the turns of a session"""
+
+    def __init__(self, max_bytes: int = 262144, max_turns: int = 100, recent_turns: int = 10,
+                 compress_min_bytes: int = 512, summary_chars: int = 2000, rotate_after_turns: int = 0,
+                 rotate_after_input_tokens: int = 0, context_turns: int = 2, page_size: int = 50):
+        self.max_bytes = max_bytes
+        self.max_turns = max_turns
+        self.recent_turns = max(1, recent_turns)
+        self.compress_min_bytes = compress_min_bytes
+        self.summary_chars = summary_chars
+        self.rotate_after_turns = rotate_after_turns
+        self.rotate_after_input_tokens = rotate_after_input_tokens
+        self.context_turns = context_turns
+        self.page_size = page_size
+
+    @staticmethod
+    def _meta(session_data: Dict) -> Dict[str, Any]:
+        messages = session_data.setdefault("messages", [])
+        meta = session_data.get("history")
+        if meta is None:
+            # Sessions created before the history store: adopt their turns as-is
+            for seq, entry in enumerate(messages, start=1):
+                entry.setdefault("seq", seq)
+            meta = session_data["history"] = {
+                "next_seq": len(messages) + 1,
+                "bytes": sum(_size(entry) for entry in messages),
+                "summary": [],
+                "summarized_seq": 0,
+                "dropped": 0,
+                "agent_turns": len(messages),
+            }
+        return meta
+
+    # Writing
+
+    def append(self, session_data: Dict, user_message: str, agent_response: str,
+               seen_by_agent: bool = True) -> Dict[str, Any]:
+        """Add a turn, then compress and drop old turns to respect the budget"""
+        meta = self._meta(session_data)
+        entry = {
+            "id": str(uuid4()),
+            "seq": meta["next_seq"],
+            "user_message": user_message,
+            "agent_response": agent_response,
+            "timestamp": datetime.now(),
+        }
+        meta["next_seq"] += 1
+        if seen_by_agent:
+            meta["agent_turns"] += 1
+        session_data["messages"].append(entry)
+        meta["bytes"] += _size(entry)
+        self._compact(session_data, meta)
+        return entry
+
+    def _compact(self, session_data: Dict, meta: Dict[str, Any]) -> None:
+        messages = session_data["messages"]
+        for entry in messages[:-self.recent_turns]:
+            if entry["seq"] <= meta["summarized_seq"]:
+                continue
+            self._summarize(meta, entry)
+            if "compressed" not in entry and len(entry["agent_response"]) >= self.compress_min_bytes:
+                before = _size(entry)
+                self._compress(entry)
+                meta["bytes"] += _size(entry) - before
+
+        # Always keep the latest turn, even if it alone is over budget.
+        # Dropping here (rather than in the session store's trim) keeps the byte count exact.
+        while (meta["bytes"] > self.max_bytes or len(messages) > self.max_turns) and len(messages) > 1:
+            entry = messages.pop(0)
+            if entry["seq"] > meta["summarized_seq"]:
+                self._summarize(meta, entry)
+            meta["bytes"] -= _size(entry)
+            meta["dropped"] += 1
+
+    @staticmethod
+    def _compress(entry: Dict[str, Any]) -> None:
+        payload = json.dumps({
+            "user_message": entry.pop("user_message"),
+            "agent_response": entry.pop("agent_response"),
+        }).encode("utf-8")
+        entry["compressed"] = base64.b64encode(zlib.compress(payload, 6)).decode("ascii")
+
+    def _summarize(self, meta: Dict[str, Any], entry: Dict[str, Any]) -> None:
+        turn = self.expand(entry)
+        meta["summary"].append(
+            f"- User: {_clip(turn['user_message'], 160)} | "
+            f"Assistant: {_first_sentence(turn['agent_response'], 200)}"
+        )
+        meta["summarized_seq"] = entry["seq"]
+        # Oldest lines fall off once the summary outgrows its budget
+        while len(meta["summary"]) > 1 and sum(len(line) + 1 for line in meta["summary"]) > self.summary_chars:
+            meta["summary"].pop(0)
+
+    # Reading
+
+    @staticmethod
+    def expand(entry: Dict[str, Any]) -> Dict[str, Any]:
+        """The turn with its text decompressed"""
+        if "compressed" not in entry:
+            return entry
+        payload = json.loads(zlib.decompress(base64.b64decode(entry["compressed"])))
+        expanded = {key: value for key, value in entry.items() if key != "compressed"}
+        expanded.update(payload)
+        return expanded
+
+    def page(self, session_data: Dict, before: Optional[int] = None,
+             limit: Optional[int] = None) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Up to `limit` turns older than seq `before`, oldest first, and the next cursor"""
+        self._meta(session_data)
+        limit = max(1, min(limit or self.page_size, 200))
+        messages = session_data["messages"]
+        if before is not None:
+            messages = [entry for entry in messages if entry["seq"] < before]
+        selected = messages[-limit:]
+        next_cursor = selected[0]["seq"] if len(messages) > len(selected) else None
+        return [self.expand(entry) for entry in selected], next_cursor
+
+    def summary(self, session_data: Dict) -> str:
+        return "\n".join(self._meta(session_data)["summary"])
+
+    def stats(self, session_data: Dict) -> Dict[str, Any]:
+        meta = self._meta(session_data)
+        return {
+            "turns": len(session_data["messages"]),
+            "bytes": meta["bytes"],
+            "max_bytes": self.max_bytes,
+            "dropped_turns": meta["dropped"],
+            "compressed_turns": sum(1 for entry in session_data["messages"] if "compressed" in entry),
+        }
+
+    # Agent context
+
+    def should_rotate(self, session_data: Dict, input_tokens: int = 0) -> bool:
+        """Whether the agent session has seen enough turns, or its latest model
+        call used enough input tokens, to start a fresh one"""
+        if 0 < self.rotate_after_input_tokens <= input_tokens:
+            return True
+        if self.rotate_after_turns <= 0:
+            return False
+        return self._meta(session_data)["agent_turns"] >= self.rotate_after_turns
+
+    def rotated(self, session_data: Dict) -> None:
+        """Record that the chat moved to a new agent session that needs seeding"""
+        meta = self._meta(session_data)
+        meta["agent_turns"] = 0
+        meta["seed_pending"] = True
+
+    def seed_context(self, session_data: Dict) -> Optional[str]:
+        """Summary and latest turns for a freshly rotated agent session, once"""
+        meta = self._meta(session_data)
+        if not meta.pop("seed_pending", False):
+            return None
+        sections = []
+        if meta["summary"]:
+            sections.append("Summary of the conversation so far:\n" + "\n".join(meta["summary"]))
+        recent = session_data["messages"][-self.context_turns:] if self.context_turns > 0 else []
+        if recent:
+            sections.append("Most recent turns:\n" + "\n".join(
+                f"User: {turn['user_message']}\nAssistant: {turn['agent_response'][:self.summary_chars]}"
+                for turn in map(self.expand, recent)
+            ))
+        return "\n\n".join(sections) or None
+
+
+def create_chat_history() -> ChatHistory:
+    """Build the chat history policy from environment variables"""
+    return ChatHistory(
+        max_bytes=int(os.getenv("HISTORY_MAX_BYTES", "262144")),
+        max_turns=int(os.getenv("SESSION_MAX_MESSAGES", "100")),
+        recent_turns=int(os.getenv("HISTORY_RECENT_TURNS", "10")),
+        compress_min_bytes=int(os.getenv("HISTORY_COMPRESS_MIN_BYTES", "512")),
+        summary_chars=int(os.getenv("HISTORY_SUMMARY_CHARS", "2000")),
+        rotate_after_turns=int(os.getenv("HISTORY_ROTATE_AFTER_TURNS", "0")),
+        rotate_after_input_tokens=int(os.getenv("HISTORY_ROTATE_AFTER_INPUT_TOKENS", "0")),
+        context_turns=int(os.getenv("HISTORY_CONTEXT_TURNS", "2")),
+        page_size=int(os.getenv("HISTORY_PAGE_SIZE", "50")),
+    )
@@ -0,0 +1,271 @@
+"""
+Intent Router
+Routes messages with an obvious intent straight to the matching sub-agent,
+so root_agent skips the model call it would spend picking a tool.
+
+Two stages, both local and deterministic:
+- rules: regexes for unambiguous phrasings ("proceed to booking", "show me
+  more destinations", "generate full itinerary")
+- model: nearest-centroid classifier over hashed word, word-pair and
+  character trigram features, trained from JSONL examples
+  ({"message": ..., "intent": <tool name or "none">})
+
+A routed message is prefixed with `[[route:<tool>]]`; the agent's
+before_model_callback turns that into a direct tool call. Anything below the
+confidence thresholds, and any negated or deferred request ("not ready to
+book yet"), goes to root_agent unchanged.
+
+With INTENT_LOG_PATH set, the tool root_agent picked for each unrouted
+message is appended there, so the model can be retrained from real traffic:
+
+    cd backend
+    python -m intent_router train intent_examples.jsonl logs/intents.jsonl --output intent_model.json
+"""
+
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import threading
+import unicodedata
+import zlib
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+from metrics import log
+
+NO_ROUTE = "none"
+ROUTE_MARKER = "[[route:{tool}]] "
+SEED_EXAMPLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "intent_examples.jsonl")
+
+RULES: List[Tuple[str, re.Pattern]] = [
+    ("booking_agent", re.compile(
+        r"\b(proceed|go ahead|continue|move on)\b.{0,20}\bbook|"
+        r"^(yes|ok|okay|great|thanks|thank you)?[ ,!.]*(please )?book (this|it|that|the trip|now|option \d)\b|"
+        r"\b(let'?s|i want to|i'd like to|i would like to|ready to) book\b|"
+        r"\bconfirm (this|the|my) (itinerary|trip|plan|booking)\b"
+    )),
+    ("InspirationAgent", re.compile(
+        r"\b(show|suggest|recommend|give) (me )?(some |more |other |different )?(destinations|places)\b|"
+        r"\bwhere should (i|we) (go|travel)\b"
+    )),
+    ("PlanningAgent", re.compile(
+        r"\b(generate|create|make|build|prepare) (me )?(a |an |the |my )?(full |detailed |complete )?"
+        r"(day[- ]by[- ]day )?(itinerary|trip plan)\b"
+    )),
+    ("RealtimeMonitoringAgent", re.compile(
+        r"\b(live|real[- ]time) (updates?|status|conditions)\b|\b(flight|train|bus) (status|delay)"
+    )),
+]
+
+# Negated or deferred requests ("not ready to book", "don't generate it yet")
+# mean the opposite of the phrasing they share with a route; root_agent reads them
+NEGATION = re.compile(
+    r"\b(not|no|never|nothing|don'?t|do not|doesn'?t|didn'?t|won'?t|wouldn'?t|can'?t|cannot|"
+    r"shouldn'?t|isn'?t|aren'?t|yet|hold off|wait)\b"
+)
+
+_TOKEN = re.compile(r"[a-z0-9']+")
+
+
+def _normalize(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).replace("\u2019", "'").lower().strip()
+
+
+def features(text: str, dims: int) -> Dict[int, float]:
+    """L2-normalized hashed bag of words, word pairs and character trigrams"""
+    tokens = _TOKEN.findall(_normalize(text))
+    grams: List[Tuple[str, float]] = [(f"w:{token}", 1.0) for token in tokens]
+    grams += [(f"b:{a}_{b}", 1.0) for a, b in zip(tokens, tokens[1:])]
+    for token in tokens:
+        padded = f"#{token}#"
+        grams += [(f"c:{padded[i:i + 3]}", 0.5) for i in range(len(padded) - 2)]
+
+    vector: Dict[int, float] = {}
+    for gram, weight in grams:
+        # crc32 rather than hash(): stable across processes, so saved models stay valid
+        index = zlib.crc32(gram.encode("utf-8")) % dims
+        vector[index] = vector.get(index, 0.0) + weight
+    norm = math.sqrt(sum(value * value for value in vector.values()))
+    return {index: value / norm for index, value in vector.items()} if norm else {}
+
+
+class CentroidModel:
+    """One normalized mean feature vector per intent; scores are cosine similarities"""
+
+    def __init__(self, centroids: Dict[str, Dict[int, float]], dims: int):
+        self.centroids = centroids
+        self.dims = dims
+
+    @classmethod
+    def train(cls, examples: Iterable[Tuple[str, str]], dims: int = 4096) -> "CentroidModel":
+        sums: Dict[str, Dict[int, float]] = {}
+        for message, intent in examples:
+            total = sums.setdefault(intent, {})
+            for index, value in features(message, dims).items():
+                total[index] = total.get(index, 0.0) + value
+        centroids = {}
+        for intent, total in sums.items():
+            norm = math.sqrt(sum(value * value for value in total.values()))
+            if norm:
+                centroids[intent] = {index: value / norm for index, value in total.items()}
+        return cls(centroids, dims)
+
+    def scores(self, message: str) -> List[Tuple[str, float]]:
+        """(intent, similarity) pairs, best first"""
+        vector = features(message, self.dims)
+        ranked = [
+            (intent, sum(value * centroid.get(index, 0.0) for index, value in vector.items()))
+            for intent, centroid in self.centroids.items()
+        ]
+        return sorted(ranked, key=lambda pair: pair[1], reverse=True)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "dims": self.dims,
+            "centroids": {intent: {str(index): round(value, 6) for index, value in centroid.items()}
+                          for intent, centroid in self.centroids.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CentroidModel":
+        return cls(
+            {intent: {int(index): value for index, value in centroid.items()}
+             for intent, centroid in data["centroids"].items()},
+            data["dims"],
+        )
+
+
+def load_examples(paths: Iterable[str]) -> List[Tuple[str, str]]:
+    """(message, intent) pairs from JSONL files; malformed lines are skipped"""
+    examples = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if isinstance(record, dict) and record.get("message") and record.get("intent"):
+                    examples.append((record["message"], record["intent"]))
+    return examples
+
+
+class IntentRouter:
+    """Decides which sub-agent, if any, a message goes to without asking root_agent"""
+
+    def __init__(self, model: Optional[CentroidModel], min_score: float = 0.35, min_margin: float = 0.12,
+                 max_chars: int = 300, log_path: Optional[str] = None):
+        self.model = model
+        self.min_score = min_score
+        self.min_margin = min_margin
+        self.max_chars = max_chars
+        self.log_path = log_path
+        self._log_lock = threading.Lock()
+        self.stats = {"rule": 0, "model": 0, "fallback": 0}
+
+    def route(self, message: str) -> Tuple[Optional[str], str]:
+        """(tool name or None, source) for a user message"""
+        text = _normalize(message)
+        # Long messages carry constraints root_agent should read itself
+        if not text or len(text) > self.max_chars or NEGATION.search(text):
+            self.stats["fallback"] += 1
+            return None, "fallback"
+
+        for tool, pattern in RULES:
+            if pattern.search(text):
+                self.stats["rule"] += 1
+                return tool, "rule"
+
+        if self.model is not None:
+            ranked = self.model.scores(text)
+            if ranked:
+                intent, score = ranked[0]
+                runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+                if intent != NO_ROUTE and score >= self.min_score and score - runner_up >= self.min_margin:
+                    self.stats["model"] += 1
+                    return intent, "model"
+
+        self.stats["fallback"] += 1
+        return None, "fallback"
+
+    @staticmethod
+    def mark(message: str, tool: str) -> str:
+        """Prefix a message with the route marker the agent callback understands"""
+        return ROUTE_MARKER.format(tool=tool) + message
+
+    def log_choice(self, message: str, tool: Optional[str]) -> None:
+        """Append root_agent's choice for an unrouted message to the training log"""
+        if not self.log_path:
+            return
+        line = json.dumps({"message": message, "intent": tool or NO_ROUTE}) + "\n"
+        with self._log_lock:
+            with open(self.log_path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+    async def observe(self, events: AsyncIterator[Dict[str, Any]], message: str) -> AsyncIterator[Dict[str, Any]]:
+        """Pass agent events through and log the first tool root_agent called"""
+        chosen = None
+        async for event in events:
+            if chosen is None and event.get("author") == "root_agent":
+                for part in (event.get("content") or {}).get("parts") or []:
+                    if part.get("function_call"):
+                        chosen = part["function_call"].get("name")
+                        break
+            yield event
+        self.log_choice(message, chosen)
+
+
+def create_intent_router() -> Optional[IntentRouter]:
+    """Build the router from environment settings (None when disabled)"""
+    if os.getenv("INTENT_ROUTER_ENABLED", "true").lower() != "true":
+        return None
+
+    model_path = os.getenv("INTENT_MODEL_PATH", "")
+    model = None
+    try:
+        if model_path and os.path.exists(model_path):
+            with open(model_path, encoding="utf-8") as f:
+                model = CentroidModel.from_dict(json.load(f))
+        elif os.path.exists(SEED_EXAMPLES):
+            model = CentroidModel.train(load_examples([SEED_EXAMPLES]))
+    except (OSError, ValueError, KeyError) as e:
+        log(f"⚠️ Intent model unavailable, using rules only: {e}")
+
+    return IntentRouter(
+        model,
+        min_score=float(os.getenv("INTENT_MODEL_MIN_SCORE", "0.35")),
+        min_margin=float(os.getenv("INTENT_MODEL_MIN_MARGIN", "0.12")),
+        max_chars=int(os.getenv("INTENT_ROUTER_MAX_CHARS", "300")),
+        log_path=os.getenv("INTENT_LOG_PATH") or None,
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m intent_router", description="Intent model tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+    train = commands.add_parser("train", help="train the centroid model from JSONL examples")
+    train.add_argument("examples", nargs="+", help="JSONL files of {\"message\", \"intent\"}")
+    train.add_argument("--output", default="intent_model.json")
+    train.add_argument("--dims", type=int, default=4096)
+    args = parser.parse_args(argv)
+
+    examples = load_examples(args.examples)
+    if not examples:
+        print("❌ No training examples found")
+        return 1
+    model = CentroidModel.train(examples, dims=args.dims)
+
+    # Training accuracy only, but it flags mislabeled or conflicting examples
+    correct = sum(model.scores(message)[0][0] == intent for message, intent in examples)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(model.to_dict(), f)
+    print(f"✅ Trained on {len(examples)} examples, {len(model.centroids)} intents, "
+          f"training accuracy {correct / len(examples):.1%}")
+    print(f"📝 Model written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,84 @@
+"""
+Typed itinerary model for the backend.
+
+The planning agent publishes its options as structured data in the agent
+session state (state["itinerary"]["options"]). They are validated once
+here and stored compactly in the session, so booking, live updates and the
+ItineraryDashboard read days, activities, costs and bookable items directly
+instead of re-parsing or re-prompting. Free-text replies fall back to the
+first JSON object in the text.
+
+The models are the agent's own Planning/schema.py, vendored as
+itinerary_schema.py so the backend deploys without the agent package.
+"""
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from itinerary_schema import Activity, ItineraryDay, json_candidates
+from itinerary_schema import Itinerary as _Itinerary
+from metrics import log
+
+
+class Itinerary(_Itinerary):
+    """The agent's itinerary with the views the API and booking need"""
+
+    def client_view(self) -> Dict[str, Any]:
+        """The option for API responses, with its cost basis spelled out and the whole trip's total"""
+        return {
+            **self.model_dump(),
+            "cost_basis": "per_traveler",
+            "trip_total_cost": self.total_cost * self.travelers,
+        }
+
+    def bookable_items(self) -> List[Dict[str, Any]]:
+        """Activities that need advance booking, with their day and date"""
+        return [
+            {"day": day.day, "date": day.date, **activity.model_dump(exclude={"lat", "lon"})}
+            for day in self.days
+            for activity in day.activities
+            if activity.booking_required
+        ]
+
+
+def _validate_options(data: Any) -> List[Itinerary]:
+    """Accept {"options": [...]}, a list of itineraries or a single itinerary"""
+    if isinstance(data, dict) and "options" in data:
+        data = data["options"]
+    if isinstance(data, dict):
+        data = [data]
+    if not isinstance(data, list):
+        return []
+
+    options = []
+    for item in data:
+        try:
+            options.append(Itinerary.model_validate(item))
+        except ValidationError as e:
+            log(f"⚠️ Skipping invalid itinerary option: {e.error_count()} errors")
+    return options
+
+
+def parse_itinerary_state(state: Optional[Dict[str, Any]]) -> List[Itinerary]:
+    """Itinerary options the planning agent left in its session state"""
+    return _validate_options((state or {}).get("itinerary"))
+
+
+def parse_itinerary_text(text: str) -> List[Itinerary]:
+    """Itinerary options from JSON embedded in a free-text reply"""
+    for candidate in json_candidates(text):
+        options = _validate_options(candidate)
+        if options:
+            return options
+    return []
+
+
+def compact_options(options: List[Itinerary]) -> List[Dict[str, Any]]:
+    """Session-storage form: defaults are dropped and restored on validation"""
+    return [option.model_dump(exclude_defaults=True) for option in options]
+
+
+def load_options(stored: List[Dict[str, Any]]) -> List[Itinerary]:
+    """Inverse of compact_options"""
+    return [Itinerary.model_validate(option) for option in stored or []]
@@ -0,0 +1,66 @@
+"""
+Typed itinerary schema shared by the planning pipeline.
+
+Itinerary option agents must answer in this shape (enforced through their
+output_schema), so downstream agents and the backend read bookable items,
+times and costs straight from session state instead of re-parsing prose.
+
+The backend deploys without the agent package and keeps an identical copy
+of this file as backend/itinerary_schema.py (test_itinerary_schema.py fails
+when they drift), so it must only depend on pydantic and the standard
+library. Change both together.
+"""
+
+import json
+import re
+from typing import Any, Iterator, List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class Activity(BaseModel):
+    time: str = Field(description="Start time as HH:MM (24h)")
+    title: str = Field(description="Short name of the activity")
+    type: Literal["transport", "accommodation", "dining", "activity"]
+    description: str = Field(default="", description="One or two sentences with specifics (place, operator, room type, ...)")
+    cost: float = Field(default=0, description="Estimated cost per traveler in INR")
+    duration: str = Field(default="", description='Duration such as "2h 30m"')
+    booking_required: bool = Field(default=False, description="True if it must be booked in advance")
+    booking_type: str = Field(default="", description="hotel, flight, train, bus, tour, restaurant, ... when booking is required")
+    lat: Optional[float] = Field(default=None, description="Approximate latitude of a sightseeing stop")
+    lon: Optional[float] = Field(default=None, description="Approximate longitude of a sightseeing stop")
+
+
+class ItineraryDay(BaseModel):
+    day: int = Field(description="1-based day number")
+    date: str = Field(default="", description="YYYY-MM-DD if the travel dates are known")
+    title: str = Field(description="Theme or main area of the day")
+    activities: List[Activity]
+
+
+class Itinerary(BaseModel):
+    title: str = Field(description="Short title describing this option's focus")
+    destination: str
+    start_date: str = Field(default="", description="YYYY-MM-DD if known")
+    end_date: str = Field(default="", description="YYYY-MM-DD if known")
+    travelers: int = Field(default=1)
+    total_cost: float = Field(description="Estimated total per traveler in INR")
+    days: List[ItineraryDay]
+    notes: List[str] = Field(default_factory=list, description="Key tips: weather, advisories, what to pack")
+
+
+_JSON_BLOCK = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def json_candidates(text: str) -> Iterator[Any]:
+    """Decoded JSON values embedded in a free-text reply: fenced blocks, then the outermost object"""
+    candidates = _JSON_BLOCK.findall(text)
+    start, end = text.find("{"), text.rfind("}")
+    if start != -1 and end > start:
+        candidates.append(text[start:end + 1])
+
+    for candidate in candidates:
+        try:
+            yield json.loads(candidate)
+        except ValueError:
+            continue
@@ -0,0 +1,264 @@
+"""
+Itinerary Templates
+Precomputed itineraries for the destinations most requests ask for, adapted
+to a user's dates, budget and interests without calling PlanningAgent.
+
+Templates are generated offline per destination x duration x theme
+(agent/personalizedTripPlanner/deployment/build_templates.py) and stored as
+JSON:
+
+    {"templates": [{
+        "destination": "Hampi", "origin": "Bengaluru", "days": 3, "theme": "heritage",
+        "themes": ["heritage", "history"],
+        "reference_budget_per_day": 2200,      # per traveler, INR
+        "itinerary": {...},                    # Itinerary, costs per traveler
+        "alternatives": [{"replaces": "<activity title>",
+                          "tier": "budget" | "premium",   # or
+                          "theme": "<interest>",
+                          "activity": {...}}]
+    }]}
+
+Matching a template:
+- the destination, and the origin when the user gives one, since transport
+  legs are drafted from and back to the template's origin
+- a theme that one of the user's interests names, when interests are given
+- the shortest template covering the trip length
+
+Adapting a template:
+- longer templates are shortened to the requested length, keeping the final
+  (departure) day
+- alternatives swap in for the user's budget tier and interests
+- accommodation and dining costs shrink towards an over-run budget
+- days are dated from start_date; every cost, including total_cost, stays
+  per traveler
+
+Anything without a matching template (unknown destination or origin, other
+interests, longer trips) returns no options and goes to the agent as before.
+"""
+
+import copy
+import json
+import os
+import re
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from itinerary import Activity, Itinerary
+from metrics import log
+
+SEED_TEMPLATES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "itinerary_templates.json")
+
+# Costs that follow the budget tier; transport and entry fees do not
+FLEXIBLE_TYPES = ("accommodation", "dining")
+# Per-day budget relative to the template's reference that selects a tier
+BUDGET_TIER_BELOW = 0.8
+PREMIUM_TIER_ABOVE = 1.6
+# Flexible costs are never scaled below this share of the template's estimate
+MIN_COST_SCALE = 0.6
+
+# Spellings of the same origin city
+CITY_ALIASES = {"bangalore": "bengaluru", "bombay": "mumbai", "madras": "chennai",
+                "new delhi": "delhi", "mysuru": "mysore", "calcutta": "kolkata"}
+
+_NUMBER = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def _number(value: Any) -> Optional[float]:
+    """First number in a preference value: 5, "5 days", "₹50,000" """
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    match = _NUMBER.search(str(value or ""))
+    return float(match.group().replace(",", "")) if match else None
+
+
+def _interests(preferences: Dict[str, Any]) -> List[str]:
+    values = preferences.get("interests") or []
+    if isinstance(values, str):
+        values = re.split(r"[,/]|\band\b", values)
+    values = list(values) + [preferences.get("theme") or ""]
+    return [str(value).strip().lower() for value in values if str(value).strip()]
+
+
+def _city(value: Any) -> str:
+    """Comparable city name: "Bangalore, India" -> "bengaluru" """
+    name = str(value or "").split(",")[0].strip().lower()
+    return CITY_ALIASES.get(name, name)
+
+
+def _theme_overlap(template: Dict[str, Any], interests: List[str]) -> int:
+    """How many of the template's themes the interests name ("beaches" names "beach")"""
+    themes = {template.get("theme", ""), *template.get("themes", [])} - {""}
+    return sum(any(re.search(rf"\b{re.escape(theme)}", interest) for interest in interests) for theme in themes)
+
+
+def _start_date(preferences: Dict[str, Any]) -> Optional[date]:
+    try:
+        return date.fromisoformat(str(preferences.get("start_date") or "")[:10])
+    except ValueError:
+        return None
+
+
+class TemplateStore:
+    """Selects and adapts precomputed itineraries; match() is pure CPU, no I/O"""
+
+    def __init__(self, templates: List[Dict[str, Any]], max_options: int = 3):
+        self.max_options = max_options
+        self._by_destination: Dict[str, List[Dict[str, Any]]] = {}
+        for template in templates:
+            try:
+                Itinerary.model_validate(template["itinerary"])
+                key = template["destination"].lower()
+                int(template["days"])
+            except (KeyError, TypeError, ValueError) as e:
+                log(f"⚠️ Skipping invalid itinerary template: {e}")
+                continue
+            self._by_destination.setdefault(key, []).append(template)
+
+    @classmethod
+    def load(cls, path: str, max_options: int = 3) -> "TemplateStore":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data.get("templates", []), max_options=max_options)
+
+    @property
+    def destinations(self) -> List[str]:
+        return sorted({templates[0]["destination"] for templates in self._by_destination.values()})
+
+    def __len__(self) -> int:
+        return sum(map(len, self._by_destination.values()))
+
+    def _find(self, destination: str) -> List[Dict[str, Any]]:
+        wanted = destination.strip().lower()
+        if wanted in self._by_destination:
+            return self._by_destination[wanted]
+        # "Goa, India" or "Jaipur trip" still name a known destination
+        for key, templates in self._by_destination.items():
+            if re.search(rf"\b{re.escape(key)}\b", wanted):
+                return templates
+        return []
+
+    def match(self, preferences: Dict[str, Any]) -> List[Itinerary]:
+        """Adapted options for the preferences, best first; [] when the agent should plan"""
+        templates = self._find(str(preferences.get("destination") or ""))
+        origin = _city(preferences.get("origin"))
+        if origin:
+            templates = [t for t in templates if _city(t.get("origin")) == origin]
+        interests = _interests(preferences)
+        if interests:
+            templates = [t for t in templates if _theme_overlap(t, interests)]
+
+        duration = _number(preferences.get("duration"))
+        days = int(duration) if duration else None
+        candidates = [t for t in templates if days is None or t["days"] >= days]
+        if not candidates:
+            return []
+        # The shortest template that covers the trip, then the closest theme
+        length = min(t["days"] for t in candidates) if days else None
+        candidates = [t for t in candidates if length is None or t["days"] == length]
+        candidates.sort(key=lambda t: -_theme_overlap(t, interests))
+        return [self.adapt(template, preferences) for template in candidates[:self.max_options]]
+
+    def adapt(self, template: Dict[str, Any], preferences: Dict[str, Any]) -> Itinerary:
+        """A copy of the template fitted to the user's dates, budget and interests"""
+        itinerary = Itinerary.model_validate(copy.deepcopy(template["itinerary"]))
+        duration = _number(preferences.get("duration"))
+        if duration and 0 < int(duration) < len(itinerary.days):
+            # Keep the departure day, drop the days before it
+            itinerary.days = itinerary.days[:int(duration) - 1] + itinerary.days[-1:]
+            for number, day in enumerate(itinerary.days, 1):
+                day.day = number
+        days = len(itinerary.days) or 1
+
+        travelers = int(_number(preferences.get("travelers")) or itinerary.travelers or 1)
+        budget = _number(preferences.get("budget"))
+        per_traveler = budget / travelers if budget else None
+        tier = None
+        reference = template.get("reference_budget_per_day")
+        if per_traveler and reference:
+            ratio = per_traveler / days / reference
+            tier = "budget" if ratio < BUDGET_TIER_BELOW else "premium" if ratio >= PREMIUM_TIER_ABOVE else None
+
+        notes = [f"Adapted from a precomputed {template['destination']} plan"]
+        if template.get("origin") and not preferences.get("origin"):
+            notes.append(f"Travel is planned from and back to {template['origin']}")
+        swapped = self._swap(itinerary, template, tier, _interests(preferences))
+        if swapped:
+            notes.append("Swapped for your budget and interests: " + ", ".join(swapped))
+
+        activities = [activity for day in itinerary.days for activity in day.activities]
+        total = sum(activity.cost for activity in activities)
+        if per_traveler and total > per_traveler:
+            flexible = sum(a.cost for a in activities if a.type in FLEXIBLE_TYPES)
+            if flexible:
+                scale = max(MIN_COST_SCALE, (per_traveler - (total - flexible)) / flexible)
+                for activity in activities:
+                    if activity.type in FLEXIBLE_TYPES:
+                        activity.cost = round(activity.cost * scale / 10) * 10
+                total = sum(activity.cost for activity in activities)
+            if total > per_traveler:
+                notes.append(f"Estimated ₹{total:,.0f} per traveler is above the ₹{per_traveler:,.0f} budget")
+
+        start = _start_date(preferences)
+        if start:
+            for day in itinerary.days:
+                day.date = (start + timedelta(days=day.day - 1)).isoformat()
+            itinerary.start_date = itinerary.days[0].date
+            itinerary.end_date = itinerary.days[-1].date
+        itinerary.travelers = travelers
+        itinerary.total_cost = total
+        itinerary.notes = notes + itinerary.notes
+        return itinerary
+
+    @staticmethod
+    def _swap(itinerary: Itinerary, template: Dict[str, Any], tier: Optional[str], interests: List[str]) -> List[str]:
+        """Apply the template's alternatives for this tier and these interests"""
+        own_themes = {template.get("theme", ""), *template.get("themes", [])}
+        swapped = []
+        for alternative in template.get("alternatives", []):
+            wanted = (
+                (tier and alternative.get("tier") == tier)
+                or (alternative.get("theme") not in own_themes and _theme_overlap(alternative, interests))
+            )
+            if not wanted:
+                continue
+            # Every occurrence, so each night of a stay moves to the same tier
+            for day in itinerary.days:
+                for index, activity in enumerate(day.activities):
+                    if activity.title == alternative.get("replaces"):
+                        # The replacement takes over the slot, whatever time it was drafted for
+                        day.activities[index] = Activity.model_validate(
+                            {**alternative["activity"], "time": activity.time}
+                        )
+                        if day.activities[index].title not in swapped:
+                            swapped.append(day.activities[index].title)
+        return swapped
+
+
+def describe_options(options: List[Itinerary]) -> str:
+    """Plain-text summary of template options, in place of the agent's reply"""
+    lines = []
+    for number, option in enumerate(options, 1):
+        lines.append(f"Option {number}: {option.title} ({len(option.days)} days, "
+                     f"about ₹{option.total_cost:,.0f} per traveler)")
+        for day in option.days:
+            date_label = f" ({day.date})" if day.date else ""
+            highlights = ", ".join(a.title for a in day.activities if a.type == "activity")
+            lines.append(f"  Day {day.day}{date_label}: {day.title}" + (f" - {highlights}" if highlights else ""))
+        lines.extend(f"  Note: {note}" for note in option.notes)
+        lines.append("")
+    return "\n".join(lines).strip()
+
+
+def create_template_store() -> Optional[TemplateStore]:
+    """Load templates from environment settings (None when disabled or unavailable)"""
+    if os.getenv("ITINERARY_TEMPLATES_ENABLED", "true").lower() != "true":
+        return None
+
+    path = os.getenv("ITINERARY_TEMPLATES_PATH") or SEED_TEMPLATES
+    try:
+        store = TemplateStore.load(path, max_options=int(os.getenv("ITINERARY_TEMPLATE_OPTIONS", "3")))
+    except (OSError, ValueError) as e:
+        log(f"⚠️ Itinerary templates unavailable, every plan goes to the agent: {e}")
+        return None
+    log(f"🗺️ Loaded {len(store)} itinerary templates for {len(store.destinations)} destinations")
+    return store
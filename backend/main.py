@@ -6,17 +6,36 @@ FastAPI application that integrates with Vertex AI Agent Engine
 import os
 import json
 import asyncio
+import textwrap
 from datetime import datetime
 from typing import Dict, List, Optional, Any
 from uuid import uuid4
 
-import vertexai
-from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Header, HTTPException, Response, WebSocket, WebSocketDisconnect
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
 from dotenv import load_dotenv
-from vertexai import agent_engines
+
+from admission import AdmissionRejected, create_admission_controller, is_quota_error
+from agent_client import AsyncAgentClient, extract_text_parts
+from booking_ledger import IdempotencyConflict, SoldOut, create_booking_ledger, request_fingerprint
+from history_store import create_chat_history
+from intent_router import create_intent_router
+from itinerary import Itinerary, compact_options, load_options, parse_itinerary_state, parse_itinerary_text
+from itinerary_templates import create_template_store, describe_options
+from metrics import (
+    ACTIVE_SESSIONS, ADMISSION_WAITING, AGENT_SESSION_ROTATIONS, INTENT_ROUTES, ITINERARY_TEMPLATE_LOOKUPS,
+    MetricsMiddleware, log, observe_stream, render, stage
+)
+from replanner import build_replan_prompt, diff_days, find_affected_days, merge_days, parse_replanned_days
+from resilience import CircuitOpen, ResilientAgentClient, create_resilient_client
+from response_cache import create_response_cache
+from session_pool import AgentSessionPool, create_session_pool
+from session_store import create_session_store
+from token_budget import account_tokens, clip_context, compact_json, last_input_tokens
+from user_profiles import create_user_profile_store
 
 # Load environment variables
 load_dotenv()
@@ -35,11 +54,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
 )
 
+# Trace ids, in-flight counts and request latency for /metrics
+app.add_middleware(MetricsMiddleware)
+
 # Global variables
 agent = None
-active_sessions: Dict[str, Dict] = {}
+agent_client: Optional[ResilientAgentClient] = None
+session_store = create_session_store()
+chat_history = create_chat_history()
+session_reaper: Optional[asyncio.Task] = None
+agent_init: Optional[asyncio.Task] = None
+session_pool: Optional[AgentSessionPool] = None
+response_cache = create_response_cache()
+intent_router = create_intent_router()
+itinerary_templates = create_template_store()
+user_profiles = create_user_profile_store()
+booking_ledger = create_booking_ledger()
+admission = create_admission_controller()
 websocket_connections: Dict[str, WebSocket] = {}
 
 # Pydantic models
@@ -47,6 +81,7 @@ class ChatMessage(BaseModel):
     message: str
     session_id: Optional[str] = None
     user_id: str
+    use_cache: bool = True
 
 class ChatResponse(BaseModel):
     response: str
@@ -54,17 +89,29 @@ class ChatResponse(BaseModel):
     message_id: str
     timestamp: datetime
     suggestions: Optional[List[str]] = None
+    cached: bool = False
+    degraded: bool = False
 
 class ItineraryRequest(BaseModel):
     session_id: str
     user_id: str
     preferences: Dict[str, Any]
+    use_cache: bool = True
+    use_templates: bool = True
+
+class ReplanRequest(BaseModel):
+    session_id: str
+    user_id: str
+    edit: str
+    option_index: int = 0
+    days: Optional[List[int]] = None
 
 class BookingRequest(BaseModel):
     session_id: str
     user_id: str
     itinerary_id: str
     payment_info: Dict[str, Any]
+    option_index: int = 0
 
 class TripUpdate(BaseModel):
     session_id: str
@@ -87,50 +134,121 @@ def initialize_vertex_ai():
         if not bucket:
             raise ValueError("GOOGLE_CLOUD_STORAGE_BUCKET environment variable is required")
         
+        # The Vertex AI SDK takes seconds to import; only pay for it when connecting
+        import vertexai
+        
         vertexai.init(
             project=project_id,
             location=location,
             staging_bucket=f"gs://{bucket}",
         )
         
-        print(f"✅ Vertex AI initialized with project: {project_id}, location: {location}")
+        log(f"✅ Vertex AI initialized with project: {project_id}, location: {location}")
         return True
         
     except Exception as e:
-        print(f"❌ Failed to initialize Vertex AI: {e}")
+        log(f"❌ Failed to initialize Vertex AI: {e}")
         return False
 
 def initialize_agent():
     """Initialize the Vertex AI Agent Engine"""
-    global agent
+    global agent, agent_client
     try:
         resource_id = os.getenv("VERTEX_AI_AGENT_RESOURCE_ID")
         if not resource_id:
             raise ValueError("VERTEX_AI_AGENT_RESOURCE_ID environment variable is required")
         
+        from vertexai import agent_engines
+        
         agent = agent_engines.get(resource_id)
-        print(f"✅ Agent initialized with resource ID: {resource_id}")
+        agent_client = create_resilient_client(AsyncAgentClient(agent))
+        log(f"✅ Agent initialized with resource ID: {resource_id}")
         return True
         
     except Exception as e:
-        print(f"❌ Failed to initialize agent: {e}")
+        log(f"❌ Failed to initialize agent: {e}")
         return False
 
+async def release_agent_session(session_id: str, session_data: Dict):
+    """Delete the remote agent session behind one of our sessions"""
+    try:
+        if agent_client:
+            await agent_client.delete_session(
+                user_id=agent_user_id(session_data),
+                session_id=session_data["agent_session"]["id"]
+            )
+            log(f"✅ Cleaned up session {session_id}")
+    except Exception as e:
+        log(f"❌ Failed to cleanup session {session_id}: {e}")
+
+async def reap_expired_sessions():
+    """Periodically release sessions that outlived their TTL"""
+    interval = float(os.getenv("SESSION_REAP_INTERVAL_SECONDS", "60"))
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            for session_id, session_data in session_store.pop_expired():
+                websocket_connections.pop(session_id, None)
+                await release_agent_session(session_id, session_data)
+        except Exception as e:
+            log(f"❌ Session reaper failed: {e}")
+
+async def initialize_agent_services():
+    """Connect to the agent and warm the session pool"""
+    global agent_client, session_pool
+    if agent is None:
+        # Both steps block on SDK imports and network calls; keep them off the event loop
+        if not await asyncio.to_thread(initialize_vertex_ai):
+            raise RuntimeError("Failed to initialize Vertex AI")
+        if not await asyncio.to_thread(initialize_agent):
+            raise RuntimeError("Failed to initialize Vertex AI Agent")
+    elif agent_client is None:
+        # An agent set before startup (e.g. the benchmark's fake engine) skips Vertex AI
+        agent_client = create_resilient_client(AsyncAgentClient(agent))
+        log("✅ Using preconfigured agent")
+    
+    # Keep pre-created agent sessions ready for new chats
+    session_pool = create_session_pool(agent_client)
+    if session_pool is not None:
+        session_pool.start()
+
+async def require_agent():
+    """Wait for a background agent initialization to finish; 500 if there is no agent"""
+    if agent_init is not None and not agent_init.done():
+        try:
+            await asyncio.shield(agent_init)
+        except Exception:
+            pass
+    if not agent:
+        raise HTTPException(status_code=500, detail="Agent not initialized")
+
 # Initialize Vertex AI and Agent on startup
 @app.on_event("startup")
 async def startup_event():
     """Initialize Vertex AI and Agent on application startup"""
-    print("🚀 Starting Personalized Trip Planner Backend...")
+    global agent_init, session_reaper
+    log("🚀 Starting Personalized Trip Planner Backend...")
     
-    # Initialize Vertex AI
-    if not initialize_vertex_ai():
-        raise RuntimeError("Failed to initialize Vertex AI")
+    # Release expired sessions in the background
+    session_reaper = asyncio.create_task(reap_expired_sessions())
     
-    # Initialize Agent
-    if not initialize_agent():
-        raise RuntimeError("Failed to initialize Vertex AI Agent")
+    if os.getenv("AGENT_INIT_IN_BACKGROUND", "false").lower() == "true":
+        # Accept traffic right away; agent requests wait for initialization
+        agent_init = asyncio.create_task(initialize_agent_services())
+        agent_init.add_done_callback(report_agent_init)
+        log("✅ Backend started, agent initializing in the background")
+        return
     
-    print("✅ Backend startup completed successfully!")
+    await initialize_agent_services()
+    log("✅ Backend startup completed successfully!")
+
+def report_agent_init(task: asyncio.Task):
+    if task.cancelled():
+        return
+    if task.exception():
+        log(f"❌ Background agent initialization failed: {task.exception()}")
+    else:
+        log("✅ Backend startup completed successfully!")
 
 # Health check endpoint
 @app.get("/health")
@@ -140,31 +258,244 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "agent_available": agent is not None,
-        "active_sessions": len(active_sessions)
+        "active_sessions": len(session_store),
+        "pooled_agent_sessions": len(session_pool) if session_pool is not None else 0,
+        "admission": admission.stats(),
+        "intent_router": intent_router.stats if intent_router else None,
+        "itinerary_templates": len(itinerary_templates) if itinerary_templates else 0,
+        "agent": agent_client.stats() if isinstance(agent_client, ResilientAgentClient) else None
+    }
+
+def agent_user_id(session_data: Dict) -> str:
+    """User id that owns the remote agent session (the pool's id for pooled sessions)"""
+    return session_data.get("agent_user_id", session_data["user_id"])
+
+async def acquire_agent_session(user_id: str):
+    """(owner user id, agent session) from the pool, else freshly created"""
+    with stage("session_create"):
+        if session_pool is not None:
+            return await session_pool.acquire()
+        return user_id, await agent_client.create_session(user_id=user_id)
+
+async def new_session(user_id: str):
+    """Create (session_id, session_data) backed by a pooled or freshly created agent session"""
+    owner_id, agent_session = await acquire_agent_session(user_id)
+    
+    internal_session_id = str(uuid4())
+    session_data = {
+        "user_id": user_id,
+        "agent_user_id": owner_id,
+        "agent_session": agent_session,
+        "created_at": datetime.now(),
+        "messages": []
+    }
+    session_store.save(internal_session_id, session_data)
+    return internal_session_id, session_data
+
+async def get_or_create_session(session_id: Optional[str], user_id: str):
+    """Return (session_id, session_data), creating a new agent session if needed"""
+    if session_id:
+        session_data = session_store.get(session_id)
+        if session_data is not None:
+            return session_id, session_data
+    
+    # Create new session if none exists
+    return await new_session(user_id)
+
+def get_session_or_404(session_id: str) -> Dict:
+    """Return the session data or raise a 404"""
+    session_data = session_store.get(session_id)
+    if session_data is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    return session_data
+
+def record_message(session_id: str, session_data: Dict, user_message: str, response_text: str,
+                   cached: bool = False) -> str:
+    """Store an exchange in the session history and return its message ID"""
+    exchange = chat_history.append(session_data, user_message, response_text, seen_by_agent=not cached)
+    if cached:
+        # The remote agent never saw this turn; replay it on the next query
+        session_data.setdefault("pending_context", []).append({
+            "user_message": user_message,
+            "agent_response": response_text
+        })
+    session_store.save(session_id, session_data)
+    return exchange["id"]
+
+def get_cached_response(prompt: str, use_cache: bool) -> Optional[str]:
+    """Return a cached agent response when caching applies to this request"""
+    if not response_cache or not use_cache:
+        return None
+    hit = response_cache.get(prompt)
+    if hit is None:
+        return None
+    log(f"⚡ Response cache {hit['tier']} hit (similarity: {hit['similarity']})")
+    return hit["response"]
+
+def personalized(session_data: Dict) -> bool:
+    """The user has a stored profile, so agent answers are built from it and never shared"""
+    return bool(user_profiles and user_profiles.get(session_data["user_id"]))
+
+def cache_response(prompt: str, response_text: str, use_cache: bool):
+    """Remember an agent response for similar future prompts"""
+    if response_cache and use_cache and response_text:
+        response_cache.set(prompt, response_text)
+
+DEGRADED_RESPONSE = (
+    "Our trip planner is having trouble right now and couldn't answer this message. "
+    "Please try again in a minute."
+)
+
+def degraded_response(prompt: str, use_cache: bool):
+    """Fallback while the agent circuit is open: (text, from_cache)
+
+    Any cached answer for the prompt beats a failure, even where the cache
+    would normally be skipped for conversational context.
+    """
+    cached = get_cached_response(prompt, use_cache)
+    if cached is not None:
+        return cached, True
+    return DEGRADED_RESPONSE, False
+
+async def rotate_agent_session(session_id: str, session_data: Dict):
+    """Move a long chat to a fresh agent session so the model context stays bounded"""
+    previous = {key: session_data[key] for key in ("user_id", "agent_user_id", "agent_session")
+                if key in session_data}
+    try:
+        owner_id, agent_session = await acquire_agent_session(session_data["user_id"])
+    except Exception as e:
+        log(f"⚠️ Could not rotate agent session, keeping the current one: {e}")
+        return
+    
+    session_data["agent_user_id"] = owner_id
+    session_data["agent_session"] = agent_session
+    chat_history.rotated(session_data)
+    session_store.save(session_id, session_data)
+    AGENT_SESSION_ROTATIONS.inc()
+    log(f"🧹 Rotated agent session {previous['agent_session']['id']} -> {agent_session['id']}")
+    await release_agent_session(session_id, previous)
+
+async def build_agent_message(session_id: str, session_data: Dict, message: str) -> str:
+    """Prefix the context the remote agent session is missing
+
+    After a rotation that is the rolling summary and latest turns; otherwise
+    turns that were answered from the cache.
+    """
+    if chat_history.should_rotate(session_data, last_input_tokens(session_data)):
+        await rotate_agent_session(session_id, session_data)
+    
+    # Replayed context is clipped to a token budget; the message itself never is
+    max_context_tokens = int(os.getenv("AGENT_MESSAGE_CONTEXT_MAX_TOKENS", "2000"))
+    seed = chat_history.seed_context(session_data)
+    pending = session_data.pop("pending_context", None)
+    if seed:
+        session_store.save(session_id, session_data)
+        return f"{clip_context(seed, max_context_tokens)}\n\nUser: {message}"
+    if not pending:
+        return message
+    session_store.save(session_id, session_data)
+    
+    max_chars = int(os.getenv("RESPONSE_CACHE_CONTEXT_CHARS", "2000"))
+    context = "\n".join(
+        f"User: {turn['user_message']}\nAssistant: {turn['agent_response'][:max_chars]}"
+        for turn in pending
+    )
+    return f"Earlier in this conversation:\n{clip_context(context, max_context_tokens)}\n\nUser: {message}"
+
+async def fetch_itinerary_options(user_id: str, agent_session_id: str, response_text: str) -> List[Itinerary]:
+    """Structured itinerary options from the agent session state, else from the reply text"""
+    try:
+        with stage("agent_state_fetch"):
+            agent_session = await agent_client.get_session(user_id=user_id, session_id=agent_session_id)
+        options = parse_itinerary_state(agent_session.get("state"))
+        if options:
+            return options
+    except Exception as e:
+        log(f"⚠️ Could not read itinerary from agent session state: {e}")
+    return parse_itinerary_text(response_text)
+
+def agent_stream(session_data: Dict, message: str, idempotent: bool = False, route_text: Optional[str] = None,
+                 read_only: bool = False):
+    """Instrumented event stream from the agent session behind one of our sessions
+
+    With `route_text` (the user's own words), a confidently classified
+    message is marked for direct delegation to its sub-agent. `read_only`
+    prompts (only the reply text is used) may be hedged.
+    """
+    if user_profiles:
+        # New agent sessions learn the chat user's personalization profile first
+        message = user_profiles.seed(session_data, message)
+    tool = None
+    if intent_router and route_text is not None:
+        tool, source = intent_router.route(route_text)
+        INTENT_ROUTES.inc(route=tool or "root_agent", source=source)
+        if tool:
+            log(f"⚡ Routed to {tool} ({source})")
+            message = intent_router.mark(message, tool)
+    events = account_tokens(agent_client.stream_query(
+        user_id=agent_user_id(session_data),
+        session_id=session_data["agent_session"]["id"],
+        message=message,
+        idempotent=idempotent,
+        read_only=read_only
+    ), session_data)
+    if user_profiles:
+        events = user_profiles.capture(events, session_data)
+    if intent_router and route_text is not None and tool is None:
+        # Learn from root_agent's own choice for messages we could not route
+        events = intent_router.observe(events, route_text)
+    return observe_stream(events)
+
+def itinerary_view(itinerary: Optional[Dict]) -> Optional[Dict]:
+    """Stored itinerary with its compact options expanded for clients"""
+    if not itinerary:
+        return itinerary
+    options = load_options(itinerary.get("options"))
+    return {
+        **itinerary,
+        "options": [option.client_view() for option in options],
+        "bookable_items": options[0].bookable_items() if options else []
     }
 
+def too_busy(e: AdmissionRejected) -> HTTPException:
+    """429 for a request turned away by admission control"""
+    return HTTPException(
+        status_code=429,
+        detail=f"Too many requests ({e.reason}), please retry later",
+        headers={"Retry-After": str(e.retry_after)}
+    )
+
+def agent_error(e: Exception, action: str) -> HTTPException:
+    """HTTP error for a failed agent call; quota errors become 429s, an open circuit 503"""
+    if isinstance(e, CircuitOpen):
+        return HTTPException(
+            status_code=503,
+            detail="The trip planner is temporarily unavailable, please retry later",
+            headers={"Retry-After": str(e.retry_after)}
+        )
+    if is_quota_error(e):
+        return HTTPException(
+            status_code=429,
+            detail="The trip planner is at capacity, please retry later",
+            headers={"Retry-After": os.getenv("QUOTA_RETRY_AFTER_SECONDS", "30")}
+        )
+    return HTTPException(status_code=500, detail=f"{action}: {str(e)}")
+
+def sse_event(event: str, data: Dict[str, Any]) -> str:
+    """Format a Server-Sent Events frame"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
 # Start new chat session
 @app.post("/api/v1/chat/session")
 async def start_chat_session(user_id: str):
     """Start a new chat session with the AI agent"""
     try:
-        if not agent:
-            raise HTTPException(status_code=500, detail="Agent not initialized")
-        
-        # Create session using the agent
-        agent_session = agent.create_session(user_id=user_id)
-        print(f"Created agent session for user: {user_id}, session_id: {agent_session['id']}")
-        
-        # Generate our internal session ID
-        internal_session_id = str(uuid4())
+        await require_agent()
         
-        # Store session info
-        active_sessions[internal_session_id] = {
-            "user_id": user_id,
-            "agent_session": agent_session,
-            "created_at": datetime.now(),
-            "messages": []
-        }
+        # Take a warm agent session from the pool (or create one)
+        internal_session_id, session_data = await new_session(user_id)
+        agent_session = session_data["agent_session"]
+        log(f"Created agent session for user: {user_id}, session_id: {agent_session['id']}")
         
         return {
             "session_id": internal_session_id,
@@ -175,7 +506,7 @@ async def start_chat_session(user_id: str):
         }
         
     except Exception as e:
-        print(f"❌ Failed to create session: {e}")
+        log(f"❌ Failed to create session: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to create session: {str(e)}")
 
 # Send message to agent
@@ -183,91 +514,211 @@ async def start_chat_session(user_id: str):
 async def send_message(request: ChatMessage):
     """Send a message to the AI agent and get response"""
     try:
-        if not agent:
-            raise HTTPException(status_code=500, detail="Agent not initialized")
+        await require_agent()
         
-        # Get or create session
-        if not request.session_id or request.session_id not in active_sessions:
-            # Create new session if none exists
-            agent_session = agent.create_session(user_id=request.user_id)
-            internal_session_id = str(uuid4())
+        # Turns on one session run one at a time so neither overwrites the other's history
+        async with session_store.lock(request.session_id):
+            session_id, session_data = await get_or_create_session(request.session_id, request.user_id)
+            agent_session = session_data["agent_session"]
             
-            active_sessions[internal_session_id] = {
-                "user_id": request.user_id,
-                "agent_session": agent_session,
-                "created_at": datetime.now(),
-                "messages": []
-            }
-            session_id = internal_session_id
-        else:
-            session_id = request.session_id
-        
-        session_data = active_sessions[session_id]
-        agent_session = session_data["agent_session"]
-        
-        print(f"Processing message for user: {request.user_id}, session: {agent_session['id']}")
-        
-        # Send message to agent using the exact pattern from test_deployment.py
-        response_parts = []
-        try:
-            for event in agent.stream_query(
-                user_id=request.user_id,
-                session_id=agent_session["id"],
-                message=request.message
-            ):
-                if "content" in event:
-                    if "parts" in event["content"]:
-                        parts = event["content"]["parts"]
-                        for part in parts:
-                            if "text" in part:
-                                text_part = part["text"]
-                                response_parts.append(text_part)
-                                print(f"Received response part: {text_part[:100]}...")
-        except Exception as e:
-            print(f"❌ Error during agent stream_query: {e}")
-            raise HTTPException(status_code=500, detail=f"Agent communication error: {str(e)}")
-        
-        response_text = " ".join(response_parts)
-        message_id = str(uuid4())
-        
-        # Store messages
-        session_data["messages"].append({
-            "id": message_id,
-            "user_message": request.message,
-            "agent_response": response_text,
-            "timestamp": datetime.now()
-        })
-        
-        # Generate suggestions based on response
-        suggestions = generate_suggestions(response_text)
-        
-        print(f"✅ Successfully processed message, response length: {len(response_text)}")
-        
-        return ChatResponse(
-            response=response_text,
-            session_id=session_id, 
-            message_id=message_id,
-            timestamp=datetime.now(),
-            suggestions=suggestions
-        )
+            log(f"Processing message for user: {request.user_id}, session: {agent_session['id']}")
+            
+            # Only context-free opening questions of users without a profile share the cache
+            use_cache = request.use_cache and not session_data["messages"] and not personalized(session_data)
+            cached_response = get_cached_response(request.message, use_cache)
+            degraded = False
+            
+            if cached_response is not None:
+                response_text = cached_response
+            else:
+                # Send message to agent using the exact pattern from test_deployment.py
+                response_parts = []
+                try:
+                    async with admission.slot(request.user_id):
+                        async for event in agent_stream(
+                            session_data, await build_agent_message(session_id, session_data, request.message),
+                            route_text=request.message
+                        ):
+                            response_parts.extend(extract_text_parts(event))
+                except AdmissionRejected as e:
+                    raise too_busy(e)
+                except CircuitOpen:
+                    log("⚠️ Agent circuit open, serving a degraded response")
+                    response_text, from_cache = degraded_response(request.message, request.use_cache)
+                    cached_response = response_text if from_cache else None
+                    degraded = True
+                except Exception as e:
+                    log(f"❌ Error during agent stream_query: {e}")
+                    raise agent_error(e, "Agent communication error")
+                else:
+                    response_text = " ".join(response_parts)
+                    cache_response(request.message, response_text, use_cache)
+            
+            # A canned apology is not part of the conversation
+            message_id = str(uuid4())
+            if not degraded or cached_response is not None:
+                message_id = record_message(
+                    session_id, session_data, request.message, response_text,
+                    cached=cached_response is not None
+                )
+            
+            # Generate suggestions based on response
+            suggestions = generate_suggestions(response_text)
+            
+            log(f"✅ Successfully processed message, response length: {len(response_text)}")
+            
+            return ChatResponse(
+                response=response_text,
+                session_id=session_id, 
+                message_id=message_id,
+                timestamp=datetime.now(),
+                suggestions=suggestions,
+                cached=cached_response is not None,
+                degraded=degraded
+            )
         
     except HTTPException:
         raise
     except Exception as e:
-        print(f"❌ Failed to process message: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to process message: {str(e)}")
+        log(f"❌ Failed to process message: {e}")
+        raise agent_error(e, "Failed to process message")
+
+# Stream message response over Server-Sent Events
+@app.post("/api/v1/chat/stream")
+async def stream_message(request: ChatMessage):
+    """Send a message to the AI agent and stream text parts as they arrive"""
+    await require_agent()
+    
+    # Turns on one session run one at a time; held until the reply is recorded
+    session_lock = await session_store.acquire(request.session_id)
+    try:
+        session_id, session_data = await get_or_create_session(request.session_id, request.user_id)
+    except Exception as e:
+        session_lock.release()
+        log(f"❌ Failed to create session: {e}")
+        raise agent_error(e, "Failed to create session")
+    
+    use_cache = request.use_cache and not session_data["messages"] and not personalized(session_data)
+    cached_response = get_cached_response(request.message, use_cache)
+    
+    # Admit before the response starts so overload is still a plain 429
+    ticket = None
+    if cached_response is None:
+        try:
+            ticket = await admission.acquire(request.user_id)
+        except AdmissionRejected as e:
+            session_lock.release()
+            raise too_busy(e)
+    
+    async def event_stream():
+        try:
+            yield sse_event("session", {"session_id": session_id})
+            
+            from_cache = cached_response is not None
+            if from_cache:
+                response_text = cached_response
+                yield sse_event("chunk", {"text": response_text})
+            else:
+                response_parts = []
+                try:
+                    async for event in agent_stream(
+                        session_data, await build_agent_message(session_id, session_data, request.message),
+                        route_text=request.message
+                    ):
+                        for text_part in extract_text_parts(event):
+                            response_parts.append(text_part)
+                            yield sse_event("chunk", {"text": text_part})
+                except CircuitOpen:
+                    log("⚠️ Agent circuit open, serving a degraded response")
+                    response_text, from_cache = degraded_response(request.message, request.use_cache)
+                    yield sse_event("chunk", {"text": response_text})
+                    if not from_cache:
+                        yield sse_event("done", {
+                            "session_id": session_id,
+                            "message_id": str(uuid4()),
+                            "suggestions": [],
+                            "cached": False,
+                            "degraded": True,
+                            "timestamp": datetime.now().isoformat()
+                        })
+                        return
+                except Exception as e:
+                    log(f"❌ Error during agent stream_query: {e}")
+                    yield sse_event("error", {"detail": agent_error(e, "Agent communication error").detail})
+                    return
+                else:
+                    response_text = " ".join(response_parts)
+                    cache_response(request.message, response_text, use_cache)
+                finally:
+                    ticket.release()
+            
+            message_id = record_message(
+                session_id, session_data, request.message, response_text,
+                cached=from_cache
+            )
+            
+            yield sse_event("done", {
+                "session_id": session_id,
+                "message_id": message_id,
+                "suggestions": generate_suggestions(response_text),
+                "cached": from_cache,
+                "degraded": from_cache and cached_response is None,
+                "timestamp": datetime.now().isoformat()
+            })
+        finally:
+            session_lock.release()
+    
+    def release():
+        if ticket:
+            ticket.release()
+        session_lock.release()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        # Frees the slot and the session even if the client disconnects before the stream starts
+        background=BackgroundTask(release)
+    )
+
+# Prometheus metrics
+@app.get("/metrics")
+async def metrics():
+    """Latency histograms, counters and in-flight gauges in Prometheus text format"""
+    ACTIVE_SESSIONS.set(len(session_store))
+    ADMISSION_WAITING.set(admission.stats()["waiting"])
+    return Response(render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# Response cache metrics
+@app.get("/api/v1/cache/stats")
+async def get_cache_stats():
+    """Get response cache hit/miss metrics"""
+    if not response_cache:
+        return {"enabled": False}
+    return {"enabled": True, **response_cache.stats()}
 
 # Get chat history
 @app.get("/api/v1/chat/history/{session_id}")
-async def get_chat_history(session_id: str):
-    """Get chat history for a session"""
-    if session_id not in active_sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
+async def get_chat_history(session_id: str, before: Optional[int] = None, limit: Optional[int] = None):
+    """Get chat history for a session, newest page first
+
+    Pass `next_cursor` back as `before` to load older turns. Turns beyond the
+    session's history budget are only kept in `summary`.
+    """
+    session_data = get_session_or_404(session_id)
+    messages, next_cursor = chat_history.page(session_data, before=before, limit=limit)
     
     return {
         "session_id": session_id,
-        "messages": active_sessions[session_id]["messages"],
-        "created_at": active_sessions[session_id]["created_at"]
+        "messages": messages,
+        "next_cursor": next_cursor,
+        "summary": chat_history.summary(session_data),
+        "history": chat_history.stats(session_data),
+        "token_usage": {
+            "agents": session_data.get("token_usage", {}).get("totals", {}),
+            "last_turn": session_data.get("token_usage", {}).get("last_turn")
+        },
+        "created_at": session_data["created_at"]
     }
 
 # Generate itinerary
@@ -275,113 +726,285 @@ async def get_chat_history(session_id: str):
 async def generate_itinerary(request: ItineraryRequest):
     """Generate a personalized itinerary based on user preferences"""
     try:
-        if not agent:
-            raise HTTPException(status_code=500, detail="Agent not initialized")
-        
-        if request.session_id not in active_sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        session_data = active_sessions[request.session_id]
-        agent_session = session_data["agent_session"]
+        await require_agent()
         
-        # Create itinerary generation prompt
-        itinerary_prompt = f"""
-        Based on the user's preferences: {json.dumps(request.preferences, indent=2)}
-        Please generate a detailed, day-by-day itinerary with:
-        1. Specific destinations and activities
-        2. Time schedules for each activity
-        3. Transportation options between locations
-        4. Accommodation recommendations
-        5. Cost estimates for each component
-        6. Booking links where applicable
-        
-        Format the response as a structured JSON object.
-        """
-        
-        # Send to agent using the same pattern
-        response_parts = []
-        for event in agent.stream_query(
-            user_id=request.user_id,
-            session_id=agent_session["id"],
-            message=itinerary_prompt
-        ):
-            if "content" in event and "parts" in event["content"]:
-                for part in event["content"]["parts"]:
-                    if "text" in part:
-                        response_parts.append(part["text"])
+        # One request per session at a time, so the stored plan and history are not overwritten
+        async with session_store.lock(request.session_id):
+            session_data = get_session_or_404(request.session_id)
+            agent_session = session_data["agent_session"]
+            
+            # Create itinerary generation prompt; minified preferences keep it small
+            preferences = compact_json(request.preferences, int(os.getenv("ITINERARY_PREFERENCES_MAX_CHARS", "2000")))
+            itinerary_prompt = textwrap.dedent(f"""
+            Based on the user's preferences: {preferences}
+            Please generate a detailed, day-by-day itinerary with:
+            1. Specific destinations and activities
+            2. Time schedules for each activity
+            3. Transportation options between locations
+            4. Accommodation recommendations
+            5. Cost estimates for each component
+            6. Booking requirements for each component
+            """).strip()
+            
+            # Popular destinations are served from precomputed templates, no agent call
+            template_options = []
+            if itinerary_templates and request.use_templates:
+                with stage("itinerary_template"):
+                    template_options = itinerary_templates.match(request.preferences)
+                ITINERARY_TEMPLATE_LOOKUPS.inc(outcome="hit" if template_options else "miss")
+            
+            # Identical preferences produce the same plan unless the user's profile shapes it
+            cache_key = f"itinerary {json.dumps(request.preferences, sort_keys=True)}"
+            use_cache = request.use_cache and not personalized(session_data)
+            cached_itinerary = None if template_options else get_cached_response(cache_key, use_cache)
+            
+            if template_options:
+                log(f"🗺️ Itinerary served from {len(template_options)} precomputed templates")
+                itinerary_text, options = describe_options(template_options), template_options
+                # The agent still learns about the plan for follow-up questions
+                session_data.setdefault("pending_context", []).append({
+                    "user_message": f"Generate an itinerary for: {preferences}",
+                    "agent_response": itinerary_text
+                })
+            elif cached_itinerary is not None:
+                cached = json.loads(cached_itinerary)
+                itinerary_text, options = cached["content"], load_options(cached["options"])
+                session_data.setdefault("pending_context", []).append({
+                    "user_message": f"Generate an itinerary for: {preferences}",
+                    "agent_response": itinerary_text
+                })
+            else:
+                # Send to agent using the same pattern
+                try:
+                    async with admission.slot(request.user_id):
+                        # Regenerating a plan is harmless, so transient failures may be retried
+                        response_parts = []
+                        # Always a planning request, so it goes straight to PlanningAgent
+                        agent_message = await build_agent_message(request.session_id, session_data, itinerary_prompt)
+                        if intent_router:
+                            agent_message = intent_router.mark(agent_message, "PlanningAgent")
+                        async for event in agent_stream(session_data, agent_message, idempotent=True):
+                            response_parts.extend(extract_text_parts(event))
+                        itinerary_text = " ".join(response_parts)
+                        options = await fetch_itinerary_options(
+                            agent_user_id(session_data), agent_session["id"], itinerary_text
+                        )
+                except AdmissionRejected as e:
+                    raise too_busy(e)
+                except CircuitOpen as e:
+                    stale = get_cached_response(cache_key, True)
+                    if stale is None:
+                        raise agent_error(e, "Failed to generate itinerary")
+                    log("⚠️ Agent circuit open, serving a cached itinerary")
+                    cached_itinerary = stale
+                    cached = json.loads(stale)
+                    itinerary_text, options = cached["content"], load_options(cached["options"])
+                except Exception as e:
+                    raise agent_error(e, "Failed to generate itinerary")
+                cache_response(cache_key, json.dumps({
+                    "content": itinerary_text,
+                    "options": compact_options(options)
+                }), use_cache)
+            
+            # Store the parsed plan; the prose is only kept when nothing could be parsed
+            itinerary_id = str(uuid4())
+            session_data["itinerary"] = {
+                "id": itinerary_id,
+                "options": compact_options(options),
+                "preferences": request.preferences,
+                "created_at": datetime.now()
+            }
+            if not options:
+                session_data["itinerary"]["content"] = itinerary_text
+            session_store.save(request.session_id, session_data)
+            
+            return {
+                "itinerary_id": itinerary_id,
+                "content": itinerary_text,
+                "options": [option.client_view() for option in options],
+                "status": "generated",
+                "cached": cached_itinerary is not None,
+                "source": "template" if template_options else "cache" if cached_itinerary is not None else "agent",
+                "timestamp": datetime.now().isoformat()
+            }
         
-        itinerary_text = " ".join(response_parts)
+    except HTTPException:
+        raise
+    except Exception as e:
+        log(f"❌ Failed to generate itinerary: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to generate itinerary: {str(e)}")
+
+# Re-plan part of an itinerary
+@app.post("/api/v1/itinerary/{itinerary_id}/replan")
+async def replan_itinerary(itinerary_id: str, request: ReplanRequest):
+    """Apply an edit by re-planning only the days it affects
+
+    The rest of the plan is kept as stored. The agent works in a scratch
+    session that only sees the affected days, not the whole chat.
+    """
+    await require_agent()
+    
+    session_data = get_session_or_404(request.session_id)
+    stored = session_data.get("itinerary")
+    if not stored or stored["id"] != itinerary_id:
+        raise HTTPException(status_code=404, detail="Itinerary not found")
+    options = load_options(stored.get("options"))
+    if not 0 <= request.option_index < len(options):
+        raise HTTPException(status_code=400, detail="No structured itinerary option to re-plan")
+    
+    itinerary = options[request.option_index]
+    affected = find_affected_days(itinerary, request.edit, request.days)
+    if not affected:
+        raise HTTPException(status_code=400, detail="The requested days are not in this itinerary")
+    prompt = build_replan_prompt(itinerary, request.edit, affected, stored.get("preferences"))
+    log(f"Re-planning day(s) {list(affected)} of {len(itinerary.days)}")
+    
+    try:
+        async with admission.slot(request.user_id):
+            owner_id, scratch = await acquire_agent_session(request.user_id)
+            scratch_data = {"user_id": request.user_id, "agent_user_id": owner_id, "agent_session": scratch}
+            try:
+                response_parts = []
+                # Only the reply text is used, so a slow answer may be hedged
+                async for event in agent_stream(scratch_data, prompt, idempotent=True, read_only=True):
+                    response_parts.extend(extract_text_parts(event))
+            finally:
+                await release_agent_session(itinerary_id, scratch_data)
+    except AdmissionRejected as e:
+        raise too_busy(e)
+    except Exception as e:
+        log(f"❌ Failed to re-plan itinerary: {e}")
+        raise agent_error(e, "Failed to re-plan itinerary")
+    
+    replanned = parse_replanned_days(" ".join(response_parts), affected)
+    if not replanned:
+        raise HTTPException(status_code=502, detail="The agent did not return the re-planned days")
+    revised = merge_days(itinerary, replanned)
+    changes = diff_days(itinerary, revised)
+    
+    # The agent call ran without the session; apply the edit to its latest state
+    async with session_store.lock(request.session_id):
+        session_data = get_session_or_404(request.session_id)
+        if (session_data.get("itinerary") or {}).get("id") != itinerary_id:
+            raise HTTPException(status_code=409, detail="The itinerary has changed while it was re-planned; review the latest version")
         
-        # Store itinerary
-        itinerary_id = str(uuid4())
+        # A new id keeps checkouts of the previous version from replaying
+        options[request.option_index] = revised
         session_data["itinerary"] = {
-            "id": itinerary_id,
-            "content": itinerary_text,
-            "preferences": request.preferences,
+            **stored,
+            "id": str(uuid4()),
+            "options": compact_options(options),
+            "revision": stored.get("revision", 0) + 1,
+            "previous_id": itinerary_id,
             "created_at": datetime.now()
         }
-        
-        return {
-            "itinerary_id": itinerary_id,
-            "content": itinerary_text,
-            "status": "generated",
-            "timestamp": datetime.now().isoformat()
-        }
-        
-    except Exception as e:
-        print(f"❌ Failed to generate itinerary: {e}")
-        raise HTTPException(status_code=500, detail=f"Failed to generate itinerary: {str(e)}")
+        session_data["itinerary"].pop("content", None)
+        # The chat's agent session never saw this edit; tell it on the next turn
+        session_data.setdefault("pending_context", []).append({
+            "user_message": f"Change the itinerary: {request.edit}",
+            "agent_response": "Updated " + "; ".join(
+                f"day {change['day']}: removed {', '.join(change['removed']) or 'nothing'}, "
+                f"added {', '.join(change['added']) or 'nothing'}"
+                for change in changes
+            ) if changes else "The itinerary is unchanged."
+        })
+        session_store.save(request.session_id, session_data)
+    
+    return {
+        "itinerary_id": session_data["itinerary"]["id"],
+        "previous_itinerary_id": itinerary_id,
+        "revision": session_data["itinerary"]["revision"],
+        "replanned_days": [day.day for day in replanned],
+        "changes": changes,
+        "option": revised.client_view(),
+        "status": "replanned",
+        "timestamp": datetime.now().isoformat()
+    }
 
 # One-click booking
 @app.post("/api/v1/booking/checkout")
-async def process_booking(request: BookingRequest):
-    """Process one-click booking for the entire itinerary"""
+async def process_booking(request: BookingRequest, response: Response,
+                          idempotency_key: Optional[str] = Header(default=None, alias="Idempotency-Key")):
+    """Process one-click booking for the entire itinerary
+    
+    Safe to retry: the Idempotency-Key header (or, without one, the session,
+    itinerary and option) identifies the checkout, and repeats return the
+    original booking. Only the session's current itinerary can be booked.
+    """
     try:
-        if request.session_id not in active_sessions:
-            raise HTTPException(status_code=404, detail="Session not found")
-        
-        session_data = active_sessions[request.session_id]
-        
-        if "itinerary" not in session_data:
-            raise HTTPException(status_code=400, detail="No itinerary found for booking")
+        get_session_or_404(request.session_id)
         
-        # Simulate booking process (replace with actual EMT integration)
-        booking_id = str(uuid4())
-        
-        # Store booking
-        session_data["booking"] = {
-            "id": booking_id,
-            "itinerary_id": request.itinerary_id,
-            "payment_info": request.payment_info,
-            "status": "confirmed",
-            "created_at": datetime.now()
-        }
+        # Checkouts on one session run one at a time; the ledger guards against double booking
+        async with session_store.lock(request.session_id):
+            session_data = get_session_or_404(request.session_id)
+            if "itinerary" not in session_data:
+                raise HTTPException(status_code=400, detail="No itinerary found for booking")
+            # A re-plan issues a new id; the old version must not be booked
+            if request.itinerary_id != session_data["itinerary"].get("id"):
+                raise HTTPException(status_code=409, detail="The itinerary has changed since it was shown; review the latest version")
+            
+            options = load_options(session_data["itinerary"].get("options"))
+            if options and not 0 <= request.option_index < len(options):
+                raise HTTPException(status_code=400, detail="Itinerary option not found")
+            # Item costs are per traveler; each traveler takes one unit of inventory
+            travelers = max(options[request.option_index].travelers, 1) if options else 1
+            items = [{**item, "quantity": travelers}
+                     for item in (options[request.option_index].bookable_items() if options else [])]
+            
+            with stage("booking_checkout"):
+                booking, replayed = await asyncio.to_thread(
+                    booking_ledger.checkout,
+                    idempotency_key or f"{request.session_id}:{request.itinerary_id}:{request.option_index}",
+                    request_fingerprint(request.model_dump()),
+                    items,
+                    {
+                        "itinerary_id": request.itinerary_id,
+                        "option_index": request.option_index,
+                        "status": "confirmed",
+                        "travelers": travelers,
+                        "items": [{k: item[k] for k in ("day", "date", "time", "title", "booking_type", "cost", "quantity")}
+                                  for item in items],
+                        "total_amount": sum(item["cost"] * item["quantity"] for item in items),
+                        "created_at": datetime.now().isoformat()
+                    }
+                )
+            
+            if not replayed:
+                session_data["booking"] = {"id": booking["booking_id"], **booking}
+                session_store.save(request.session_id, session_data)
         
+        response.headers["Idempotent-Replayed"] = str(replayed).lower()
         return {
-            "booking_id": booking_id,
-            "status": "confirmed",
+            "booking_id": booking["booking_id"],
+            "status": booking["status"],
             "message": "Your trip has been successfully booked!",
+            "items": booking["items"],
+            "total_amount": booking["total_amount"],
+            "replayed": replayed,
             "timestamp": datetime.now().isoformat()
         }
         
+    except HTTPException:
+        raise
+    except IdempotencyConflict:
+        raise HTTPException(status_code=422, detail="Idempotency-Key was already used for a different request")
+    except SoldOut as e:
+        raise HTTPException(status_code=409, detail=f"Not enough availability for {e.sku}")
     except Exception as e:
-        print(f"❌ Failed to process booking: {e}")
+        log(f"❌ Failed to process booking: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to process booking: {str(e)}")
 
 # Live trip updates
 @app.get("/api/v1/trip/live/{session_id}")
 async def get_live_updates(session_id: str):
     """Get real-time updates for an active trip"""
-    if session_id not in active_sessions:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
-    session_data = active_sessions[session_id]
+    session_data = get_session_or_404(session_id)
     
     return {
         "session_id": session_id,
         "status": "active",
         "last_update": datetime.now().isoformat(),
-        "itinerary": session_data.get("itinerary"),
+        "itinerary": itinerary_view(session_data.get("itinerary")),
         "booking": session_data.get("booking")
     }
 
@@ -397,27 +1020,63 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             data = await websocket.receive_text()
             message_data = json.loads(data)
             
-            # Process message through agent
-            if session_id in active_sessions:
-                session_data = active_sessions[session_id]
-                agent_session = session_data["agent_session"]
+            # Process message through agent, one message of the session at a time
+            async with session_store.lock(session_id):
+                session_data = session_store.get(session_id)
+                if session_data is None:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "detail": "Session not found"
+                    }))
+                    continue
                 
+                # Forward each text part as soon as the agent produces it
                 response_parts = []
-                for event in agent.stream_query(
-                    user_id=session_data["user_id"],
-                    session_id=agent_session["id"],
-                    message=message_data["message"]
-                ):
-                    if "content" in event and "parts" in event["content"]:
-                        for part in event["content"]["parts"]:
-                            if "text" in part:
-                                response_parts.append(part["text"])
+                try:
+                    async with admission.slot(session_data["user_id"]):
+                        async for event in agent_stream(
+                            session_data, await build_agent_message(session_id, session_data, message_data["message"]),
+                            route_text=message_data["message"]
+                        ):
+                            for text_part in extract_text_parts(event):
+                                response_parts.append(text_part)
+                                await websocket.send_text(json.dumps({
+                                    "type": "chunk",
+                                    "text": text_part
+                                }))
+                except WebSocketDisconnect:
+                    raise
+                except AdmissionRejected as e:
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "detail": too_busy(e).detail,
+                        "retry_after": e.retry_after
+                    }))
+                    continue
+                except CircuitOpen as e:
+                    response_text, _ = degraded_response(message_data["message"], True)
+                    await websocket.send_text(json.dumps({
+                        "type": "degraded",
+                        "response": response_text,
+                        "retry_after": e.retry_after
+                    }))
+                    continue
+                except Exception as e:
+                    log(f"❌ Error during agent stream_query: {e}")
+                    await websocket.send_text(json.dumps({
+                        "type": "error",
+                        "detail": agent_error(e, "Agent communication error").detail
+                    }))
+                    continue
                 
                 response_text = " ".join(response_parts)
+                message_id = record_message(session_id, session_data, message_data["message"], response_text)
                 
-                # Send response back through WebSocket
                 await websocket.send_text(json.dumps({
+                    "type": "done",
+                    "message_id": message_id,
                     "response": response_text,
+                    "suggestions": generate_suggestions(response_text),
                     "timestamp": datetime.now().isoformat()
                 }))
     
@@ -457,17 +1116,28 @@ def generate_suggestions(response_text: str) -> List[str]:
 @app.on_event("shutdown")
 async def cleanup_sessions():
     """Clean up inactive sessions on shutdown"""
-    print("🧹 Cleaning up sessions...")
-    for session_id, session_data in active_sessions.items():
-        try:
-            if agent:
-                agent.delete_session(
-                    user_id=session_data["user_id"],
-                    session_id=session_data["agent_session"]["id"]
-                )
-                print(f"✅ Cleaned up session {session_id}")
-        except Exception as e:
-            print(f"❌ Failed to cleanup session {session_id}: {e}")
+    log("🧹 Cleaning up sessions...")
+    if session_reaper:
+        session_reaper.cancel()
+    if agent_init and not agent_init.done():
+        agent_init.cancel()
+    
+    # Shared stores keep their sessions for the remaining workers
+    if not session_store.persistent:
+        for session_id, session_data in session_store.items():
+            await release_agent_session(session_id, session_data)
+    else:
+        for session_id, session_data in session_store.pop_expired():
+            await release_agent_session(session_id, session_data)
+    session_store.close()
+    booking_ledger.close()
+    if user_profiles:
+        user_profiles.close()
+    if session_pool is not None:
+        await session_pool.close()
+    
+    if agent_client:
+        agent_client.close()
 
 if __name__ == "__main__":
     import uvicorn
@@ -0,0 +1,274 @@
+"""
+Metrics
+Request tracing and Prometheus-format latency metrics without extra dependencies.
+
+- MetricsMiddleware gives every HTTP request / WebSocket a trace id (taken
+  from X-Request-ID or traceparent when present), tracks in-flight counts
+  and durations per route template and echoes the id as X-Trace-Id
+- log() prefixes messages with the current trace id
+- stage() times a named step (session create, state fetch, checkout, ...)
+- observe_stream() wraps an agent event stream and records time to first
+  event, total stream time, text parts/bytes and per sub-agent tool latency
+  from function_call / function_response event pairs
+- render() produces the text exposition served at /metrics
+"""
+
+import asyncio
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncIterator, Dict, Iterable, Optional, Tuple
+from uuid import uuid4
+
+from starlette.routing import Match
+
+trace_id_var: contextvars.ContextVar[str] = contextvars.ContextVar("trace_id", default="-")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+TOKEN_BUCKETS = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000, 256000)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], Any] = {}
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _key(self, labels: Dict[str, Any]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._samples(key, value))
+        return "\n".join(lines)
+
+    def _samples(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels) -> None:
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Iterable[str] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                # per-bucket counts, then +Inf count and sum
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-2] += 1
+            counts[-1] += value
+
+    def _samples(self, key, counts):
+        lines = []
+        for i, bound in enumerate(self.buckets + ("+Inf",)):
+            le = 'le="%s"' % bound
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {counts[i]}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {counts[-2]}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {round(counts[-1], 6)}")
+        return lines
+
+
+REGISTRY: list = []
+
+HTTP_REQUESTS = Counter("http_requests_total", "HTTP requests by route and status", ("method", "path", "status"))
+HTTP_DURATION = Histogram("http_request_duration_seconds", "HTTP request duration, including streamed bodies",
+                          ("method", "path"))
+IN_FLIGHT = Gauge("http_requests_in_flight", "Requests and WebSockets currently being served", ("path",))
+STAGE_DURATION = Histogram("trip_planner_stage_duration_seconds", "Duration of backend stages", ("stage",))
+AGENT_FIRST_EVENT = Histogram("agent_time_to_first_event_seconds", "Time from query to the first agent event")
+AGENT_STREAM_DURATION = Histogram("agent_stream_duration_seconds", "Total agent stream time", ("outcome",))
+AGENT_RESPONSE_PARTS = Histogram("agent_response_parts", "Text parts per agent response",
+                                 buckets=(1, 2, 5, 10, 20, 50, 100, 200))
+AGENT_RESPONSE_BYTES = Histogram("agent_response_bytes", "UTF-8 bytes of text per agent response",
+                                 buckets=SIZE_BUCKETS)
+ACTIVE_SESSIONS = Gauge("trip_planner_active_sessions", "Chat sessions in the session store")
+ADMISSION_WAITING = Gauge("trip_planner_admission_waiting", "Agent calls queued by admission control")
+AGENT_SESSION_ROTATIONS = Counter("trip_planner_agent_session_rotations_total",
+                                  "Chats moved to a fresh agent session to bound model context")
+INTENT_ROUTES = Counter("trip_planner_intent_routes_total",
+                        "User messages by routing decision (rule, model or fallback to root_agent)",
+                        ("route", "source"))
+ITINERARY_TEMPLATE_LOOKUPS = Counter("trip_planner_itinerary_templates_total",
+                                     "Itinerary requests by precomputed template outcome (hit or miss)",
+                                     ("outcome",))
+AGENT_MODEL_CALLS = Counter("agent_model_calls_total", "Model calls by agent, sub-agents included", ("agent",))
+AGENT_TOKENS = Counter("agent_tokens_total", "Model tokens by agent and kind (input, output, cached, trimmed)",
+                       ("agent", "kind"))
+AGENT_CALL_INPUT_TOKENS = Histogram("agent_call_input_tokens", "Input tokens of a model call, by agent",
+                                    ("agent",), buckets=TOKEN_BUCKETS)
+TURN_TOKENS = Histogram("agent_turn_tokens", "Model tokens per turn across all agents", ("kind",),
+                        buckets=TOKEN_BUCKETS)
+AGENT_TOOL_DURATION = Histogram("agent_tool_call_duration_seconds",
+                                "Sub-agent tool latency, from function_call to function_response",
+                                ("agent", "tool"))
+
+
+def render() -> str:
+    """Prometheus text exposition of every metric"""
+    return "\n".join(metric.render() for metric in REGISTRY) + "\n"
+
+
+def log(message: str) -> None:
+    """print() with the current trace id"""
+    print(f"[{trace_id_var.get()}] {message}")
+
+
+@contextmanager
+def stage(name: str):
+    """Time a block into trip_planner_stage_duration_seconds"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_DURATION.observe(time.perf_counter() - started, stage=name)
+
+
+async def observe_stream(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+    """Pass agent events through while recording stream and tool timings"""
+    started = time.perf_counter()
+    first_event: Optional[float] = None
+    parts = size = 0
+    pending_tools: Dict[str, Tuple[float, str, str]] = {}
+    outcome = "error"
+    try:
+        async for event in events:
+            now = time.perf_counter()
+            if first_event is None:
+                first_event = now - started
+                AGENT_FIRST_EVENT.observe(first_event)
+            author = event.get("author") or "unknown"
+            for part in (event.get("content") or {}).get("parts") or []:
+                if "text" in part:
+                    parts += 1
+                    size += len(part["text"].encode("utf-8"))
+                elif part.get("function_call"):
+                    call = part["function_call"]
+                    pending_tools[call.get("id") or call.get("name")] = (now, author, call.get("name", ""))
+                elif part.get("function_response"):
+                    response = part["function_response"]
+                    call = pending_tools.pop(response.get("id") or response.get("name"), None)
+                    if call:
+                        AGENT_TOOL_DURATION.observe(now - call[0], agent=call[1], tool=call[2])
+            yield event
+        outcome = "ok"
+    except (GeneratorExit, asyncio.CancelledError):
+        outcome = "cancelled"
+        raise
+    finally:
+        total = time.perf_counter() - started
+        AGENT_STREAM_DURATION.observe(total, outcome=outcome)
+        if outcome == "ok":
+            AGENT_RESPONSE_PARTS.observe(parts)
+            AGENT_RESPONSE_BYTES.observe(size)
+        log(f"⏱️ Agent stream {outcome}: first event {first_event or 0:.3f}s, "
+            f"total {total:.3f}s, {parts} parts, {size} bytes")
+
+
+def incoming_trace_id(headers: Dict[str, str]) -> str:
+    """Trace id from X-Request-ID or a W3C traceparent header, else a new one"""
+    if headers.get("x-request-id"):
+        return headers["x-request-id"][:64]
+    traceparent = headers.get("traceparent", "").split("-")
+    if len(traceparent) == 4 and len(traceparent[1]) == 32:
+        return traceparent[1]
+    return uuid4().hex
+
+
+def route_template(scope) -> str:
+    """Route path (e.g. /ws/{session_id}) so labels stay low-cardinality"""
+    app = scope.get("app")
+    for route in getattr(app, "routes", ()):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return "unmatched"
+
+
+class MetricsMiddleware:
+    """ASGI middleware: trace ids, in-flight gauges and request durations"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        headers = {k.decode("latin-1"): v.decode("latin-1") for k, v in scope.get("headers", [])}
+        trace_id = incoming_trace_id(headers)
+        token = trace_id_var.set(trace_id)
+        path = route_template(scope)
+        method = scope.get("method", "WS")
+        status = {"code": 500 if scope["type"] == "http" else 101}
+
+        async def send_with_trace(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(b"x-trace-id", trace_id.encode("latin-1"))]
+            await send(message)
+
+        IN_FLIGHT.inc(path=path)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            IN_FLIGHT.dec(path=path)
+            HTTP_DURATION.observe(time.perf_counter() - started, method=method, path=path)
+            HTTP_REQUESTS.inc(method=method, path=path, status=status["code"])
+            trace_id_var.reset(token)
@@ -0,0 +1,183 @@
+"""
+Incremental Re-planning
+Applies an edit ("make day 3 cheaper", "swap the fort for a food tour") to a
+stored itinerary by re-planning only the days it touches.
+
+- find_affected_days() maps the edit to day numbers (explicit "day 3",
+  ranges, ordinals, dates) and to the activity slots it names
+- build_replan_prompt() shows the agent only those days, plus one line per
+  pinned day so it avoids repeating them
+- parse_replanned_days() / merge_days() validate the reply and splice it
+  into the plan; every other day is kept exactly as stored
+- diff_days() reports what changed per day
+
+The prompt and reply cover a few days instead of the whole multi-day plan,
+which is where the token and latency savings come from.
+"""
+
+import json
+import re
+from typing import Any, Dict, List, Optional, Set
+
+from pydantic import ValidationError
+
+from itinerary import Itinerary, ItineraryDay, json_candidates
+
+_ORDINALS = {
+    "first": 1, "second": 2, "third": 3, "fourth": 4, "fifth": 5,
+    "sixth": 6, "seventh": 7, "eighth": 8, "ninth": 9, "tenth": 10,
+}
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+    "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+}
+_DAY_LIST = re.compile(r"\bdays?\s+((?:\d+\s*(?:,|and|&|-|–|to|through)\s*)*\d+)")
+_RANGE = re.compile(r"(\d+)\s*(?:-|–|to|through)\s*(\d+)")
+_DAY_WORD = re.compile(r"\bday\s+(" + "|".join(_NUMBER_WORDS) + r")\b")
+_ORDINAL_DAY = re.compile(r"\b(" + "|".join(list(_ORDINALS) + ["last", "final"]) + r")\s+day\b")
+_WORD = re.compile(r"[a-z]{4,}")
+# Words too generic to pin an edit to a particular activity
+_GENERIC = {
+    "make", "swap", "replace", "change", "instead", "with", "more", "less", "cheaper", "better",
+    "visit", "tour", "trip", "that", "this", "from", "into", "some", "day", "days", "time",
+    "plan", "want", "would", "like", "please", "activity", "activities", "move", "later", "earlier",
+}
+
+
+def find_affected_days(itinerary: Itinerary, edit: str,
+                       days: Optional[List[int]] = None) -> Dict[int, List[int]]:
+    """Day number -> indices of the activities the edit names (empty: the whole day)
+
+    Explicit `days` win. When the edit names no day, activity or date, every
+    day is affected.
+    """
+    numbers = {day.day for day in itinerary.days}
+    text = edit.lower()
+    found: Set[int] = set(days or [])
+
+    if not found:
+        for match in _DAY_LIST.finditer(text):
+            for start, end in _RANGE.findall(match.group(1)):
+                found.update(range(int(start), int(end) + 1))
+            found.update(int(n) for n in re.findall(r"\d+", _RANGE.sub("", match.group(1))))
+        found.update(_NUMBER_WORDS[word] for word in _DAY_WORD.findall(text))
+        for word in _ORDINAL_DAY.findall(text):
+            found.add(max(numbers) if word in ("last", "final") and numbers else _ORDINALS.get(word, 0))
+        found.update(day.day for day in itinerary.days if day.date and day.date.lower() in text)
+
+    edit_words = set(_WORD.findall(text)) - _GENERIC
+    slots: Dict[int, List[int]] = {}
+    for day in itinerary.days:
+        for index, activity in enumerate(day.activities):
+            if edit_words & (set(_WORD.findall(activity.title.lower())) - _GENERIC):
+                slots.setdefault(day.day, []).append(index)
+
+    if found:
+        return {number: slots.get(number, []) for number in sorted(found & numbers)}
+    if slots:
+        return slots
+    return {number: [] for number in sorted(numbers)}
+
+
+def _day_outline(day: ItineraryDay) -> str:
+    titles = ", ".join(activity.title for activity in day.activities)
+    return f"Day {day.day}{f' ({day.date})' if day.date else ''}: {day.title} - {titles}"
+
+
+def build_replan_prompt(itinerary: Itinerary, edit: str, affected: Dict[int, List[int]],
+                        preferences: Optional[Dict[str, Any]] = None) -> str:
+    """Agent prompt covering only the affected days"""
+    changing, pinned = [], []
+    for day in itinerary.days:
+        if day.day not in affected:
+            pinned.append(_day_outline(day))
+            continue
+        data = day.model_dump(exclude_defaults=True)
+        targets = affected[day.day]
+        if targets:
+            for index, activity in enumerate(data.get("activities", [])):
+                activity["pinned"] = index not in targets
+        changing.append(data)
+
+    numbers = ", ".join(str(number) for number in affected)
+    lines = [
+        "Revise part of an existing trip itinerary. Do not plan the whole trip again.",
+        f"Trip: {itinerary.title} in {itinerary.destination}"
+        + (f", {itinerary.start_date} to {itinerary.end_date}" if itinerary.start_date else "")
+        + f", {itinerary.travelers} traveler(s).",
+    ]
+    if preferences:
+        lines.append(f"Traveler preferences: {json.dumps(preferences, separators=(',', ':'))}")
+    lines.append(f'Requested change: "{edit}"')
+    if pinned:
+        lines.append("These days are fixed and must not be repeated:\n" + "\n".join(pinned))
+    lines.append(f"Current plan for day(s) {numbers}:\n```json\n{json.dumps(changing, separators=(',', ':'))}\n```")
+    if any(affected.values()):
+        lines.append('Keep activities marked "pinned": true exactly as they are.')
+    lines.append(
+        f'Reply with only a JSON object {{"days": [...]}} containing day(s) {numbers} in the same '
+        "format (day, date, title, activities with time, title, type, description, cost, duration, "
+        "booking_required, booking_type). Omit the pinned flag."
+    )
+    return "\n\n".join(lines)
+
+
+def parse_replanned_days(text: str, affected: Dict[int, List[int]]) -> List[ItineraryDay]:
+    """Affected days from the agent's reply; days it left out are not returned"""
+    for candidate in json_candidates(text):
+        if isinstance(candidate, dict):
+            candidate = candidate.get("days", [candidate])
+        if not isinstance(candidate, list):
+            continue
+        days = []
+        for item in candidate:
+            try:
+                day = ItineraryDay.model_validate(item)
+            except ValidationError:
+                continue
+            if day.day in affected:
+                days.append(day)
+        if days:
+            return days
+    return []
+
+
+def _day_cost(day: ItineraryDay) -> float:
+    return sum(activity.cost for activity in day.activities)
+
+
+def merge_days(itinerary: Itinerary, replanned: List[ItineraryDay]) -> Itinerary:
+    """The itinerary with replanned days swapped in and the total cost adjusted"""
+    by_number = {day.day: day for day in replanned}
+    merged = itinerary.model_copy(deep=True)
+    delta = 0.0
+    for index, day in enumerate(merged.days):
+        new_day = by_number.get(day.day)
+        if new_day is None:
+            continue
+        if not new_day.date:
+            new_day.date = day.date
+        delta += _day_cost(new_day) - _day_cost(day)
+        merged.days[index] = new_day
+    merged.total_cost = max(0.0, round(merged.total_cost + delta, 2))
+    return merged
+
+
+def diff_days(before: Itinerary, after: Itinerary) -> List[Dict[str, Any]]:
+    """Per changed day: activities removed and added, and the cost change"""
+    old_days = {day.day: day for day in before.days}
+    changes = []
+    for day in after.days:
+        old = old_days.get(day.day)
+        if old is None or old == day:
+            continue
+        old_titles = [activity.title for activity in old.activities]
+        new_titles = [activity.title for activity in day.activities]
+        changes.append({
+            "day": day.day,
+            "removed": [title for title in old_titles if title not in new_titles],
+            "added": [title for title in new_titles if title not in old_titles],
+            "cost_before": _day_cost(old),
+            "cost_after": _day_cost(day),
+        })
+    return changes
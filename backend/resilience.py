@@ -0,0 +1,341 @@
+"""
+Resilient Agent Client
+Retries, hedging and a circuit breaker around the remote agent.
+
+- transient failures are retried with full-jitter exponential backoff, but
+  only until the first event has been handed to the caller
+- errors where the agent rejected the call (quota, unavailable) are always
+  retried; ambiguous ones (timeouts, dropped connections) only for prompts
+  marked idempotent, since the agent may already have acted on them
+- read-only prompts, whose caller only uses the reply text, can be hedged:
+  if nothing arrived within the recent p95 time-to-first-event, a second
+  attempt starts in a scratch agent session and the first to respond wins
+  (the loser is cancelled, and the scratch session is deleted either way)
+- consecutive transient failures open a circuit breaker so callers fail
+  fast with CircuitOpen instead of piling onto an unhealthy agent; after a
+  cooldown a single probe call decides whether it closes again
+"""
+
+import asyncio
+import math
+import os
+import random
+import time
+from collections import deque
+from functools import partial
+from typing import Any, AsyncIterator, Deque, Dict, Optional, Tuple
+
+from admission import is_quota_error
+from metrics import log
+
+# Returned by anext() when a stream ends before producing an event
+_END = object()
+
+REJECTED_MARKERS = ("UNAVAILABLE", "Service Unavailable", "Bad Gateway", "Gateway Timeout")
+AMBIGUOUS_MARKERS = ("DEADLINE_EXCEEDED", "Connection reset", "Connection aborted", "timed out")
+
+
+class CircuitOpen(Exception):
+    """The agent is considered unhealthy; retry after `retry_after` seconds"""
+
+    def __init__(self, retry_after: float):
+        super().__init__("Agent circuit breaker is open")
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+def is_rejected_error(error: BaseException) -> bool:
+    """The agent refused the call, so it never acted on the prompt"""
+    code = getattr(error, "code", None)
+    if getattr(code, "value", code) in (502, 503):
+        return True
+    text = str(error)
+    return is_quota_error(error) or any(marker in text for marker in REJECTED_MARKERS)
+
+
+def is_ambiguous_error(error: BaseException) -> bool:
+    """The call may or may not have reached the agent"""
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    code = getattr(error, "code", None)
+    if getattr(code, "value", code) == 504:
+        return True
+    text = str(error)
+    return any(marker in text for marker in AMBIGUOUS_MARKERS)
+
+
+class CircuitBreaker:
+    """closed -> open after N consecutive failures -> half_open probe after a cooldown"""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probing = False
+
+    def retry_after(self) -> float:
+        return max(0.0, self._opened_at + self.reset_timeout - time.monotonic())
+
+    def check(self) -> None:
+        """Raise CircuitOpen unless a call may go through now"""
+        if self.state == "open":
+            if self.retry_after() > 0:
+                raise CircuitOpen(self.retry_after())
+            self.state = "half_open"
+            self._probing = False
+        if self.state == "half_open":
+            if self._probing:
+                raise CircuitOpen(self.reset_timeout)
+            self._probing = True
+
+    def record_success(self) -> None:
+        if self.state != "closed":
+            log("✅ Agent circuit breaker closed")
+        self.state = "closed"
+        self._failures = 0
+        self._probing = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probing = False
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            if self.state != "open":
+                log(f"⚠️ Agent circuit breaker opened after {self._failures} failures")
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+    def release_probe(self) -> None:
+        """A call finished without telling us anything about agent health"""
+        self._probing = False
+
+
+class LatencyTracker:
+    """Rolling window of durations with a percentile estimate"""
+
+    def __init__(self, window: int = 200, min_samples: int = 20):
+        self.min_samples = min_samples
+        self._samples: Deque[float] = deque(maxlen=window)
+
+    def add(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> Optional[float]:
+        if len(self._samples) < self.min_samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class ResilientAgentClient:
+    """Same interface as AsyncAgentClient, with retries, hedging and a breaker"""
+
+    def __init__(self, client: Any, max_attempts: int = 3, backoff_base: float = 0.5,
+                 backoff_max: float = 8.0, hedge: bool = False, hedge_min_delay: float = 1.0,
+                 breaker: Optional[CircuitBreaker] = None):
+        self.client = client
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.hedge = hedge
+        self.hedge_min_delay = hedge_min_delay
+        self.breaker = breaker or CircuitBreaker(failure_threshold=5, reset_timeout=30)
+        self.first_event_latency = LatencyTracker()
+        self._stats = {"retries": 0, "hedges": 0, "hedge_wins": 0, "failed_fast": 0}
+
+    # Failure bookkeeping
+
+    def _record(self, error: BaseException) -> None:
+        if is_rejected_error(error) or is_ambiguous_error(error):
+            self.breaker.record_failure()
+        else:
+            self.breaker.release_probe()
+
+    def _should_retry(self, error: BaseException, idempotent: bool, attempt: int) -> bool:
+        if attempt >= self.max_attempts or isinstance(error, CircuitOpen):
+            return False
+        return is_rejected_error(error) or (idempotent and is_ambiguous_error(error))
+
+    async def _backoff(self, attempt: int, error: BaseException) -> None:
+        delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        self._stats["retries"] += 1
+        log(f"⚠️ Agent call failed ({error}); retry {attempt} in {delay:.2f}s")
+        await asyncio.sleep(delay)
+
+    def _check(self) -> None:
+        try:
+            self.breaker.check()
+        except CircuitOpen:
+            self._stats["failed_fast"] += 1
+            raise
+
+    # Unary calls
+
+    async def _call(self, func, idempotent: bool, **kwargs):
+        for attempt in range(1, self.max_attempts + 1):
+            self._check()
+            try:
+                result = await func(**kwargs)
+            except Exception as e:
+                self._record(e)
+                if not self._should_retry(e, idempotent, attempt):
+                    raise
+                await self._backoff(attempt, e)
+                continue
+            except BaseException:
+                self.breaker.release_probe()
+                raise
+            self.breaker.record_success()
+            return result
+
+    async def create_session(self, user_id: str) -> Dict[str, Any]:
+        """Create a remote agent session"""
+        return await self._call(self.client.create_session, idempotent=False, user_id=user_id)
+
+    async def delete_session(self, user_id: str, session_id: str) -> None:
+        """Delete a remote agent session"""
+        await self._call(self.client.delete_session, idempotent=True, user_id=user_id, session_id=session_id)
+
+    async def get_session(self, user_id: str, session_id: str) -> Dict[str, Any]:
+        """Fetch a remote agent session, including its state"""
+        return await self._call(self.client.get_session, idempotent=True, user_id=user_id, session_id=session_id)
+
+    # Streaming calls
+
+    async def _open(self, open_stream) -> Tuple[AsyncIterator, Any]:
+        """Start one attempt and wait for its first event"""
+        started = time.monotonic()
+        stream = open_stream()
+        try:
+            first = await anext(stream, _END)
+        except Exception as e:
+            self._record(e)
+            raise
+        except BaseException:
+            self.breaker.release_probe()
+            await stream.aclose()
+            raise
+        self.first_event_latency.add(time.monotonic() - started)
+        self.breaker.record_success()
+        return stream, first
+
+    @staticmethod
+    async def _discard(task: asyncio.Task) -> None:
+        task.cancel()
+        try:
+            stream, _ = await task
+        except BaseException:
+            return
+        await stream.aclose()
+
+    async def _scratch_stream(self, user_id: str, message: str) -> AsyncIterator[Dict[str, Any]]:
+        """The prompt in a throwaway agent session, deleted when the stream closes"""
+        session = await self.client.create_session(user_id=user_id)
+        try:
+            async for event in self.client.stream_query(user_id=user_id, session_id=session["id"], message=message):
+                yield event
+        finally:
+            try:
+                await self.client.delete_session(user_id=user_id, session_id=session["id"])
+            except Exception as e:
+                log(f"⚠️ Could not delete hedge session {session['id']}: {e}")
+
+    async def _open_hedged(self, open_stream, open_hedge) -> Tuple[AsyncIterator, Any]:
+        """First attempt to produce an event wins; the other is cancelled"""
+        p95 = self.first_event_latency.percentile(0.95)
+        primary = asyncio.ensure_future(self._open(open_stream))
+        if p95 is None:
+            return await primary
+
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=max(p95, self.hedge_min_delay))
+            if done:
+                return primary.result()
+            try:
+                self._check()
+            except CircuitOpen:
+                return await primary
+            self._stats["hedges"] += 1
+            hedged = asyncio.ensure_future(self._open(open_hedge))
+        except BaseException:
+            await self._discard(primary)
+            raise
+
+        pending = {primary, hedged}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is hedged:
+                            self._stats["hedge_wins"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                await self._discard(task)
+
+    async def stream_query(self, user_id: str, session_id: str, message: str,
+                           idempotent: bool = False, read_only: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Yield agent events; retried (and hedged) only before the first event
+
+        `read_only` marks prompts whose caller never reads the session's
+        state afterwards, so a hedge may answer from a scratch session.
+        """
+        open_stream = partial(self.client.stream_query, user_id=user_id, session_id=session_id, message=message)
+        for attempt in range(1, self.max_attempts + 1):
+            self._check()
+            try:
+                if read_only and self.hedge:
+                    stream, first = await self._open_hedged(open_stream, partial(self._scratch_stream, user_id, message))
+                else:
+                    stream, first = await self._open(open_stream)
+            except Exception as e:
+                if not self._should_retry(e, idempotent, attempt):
+                    raise
+                await self._backoff(attempt, e)
+                continue
+            break
+
+        # Output has started; from here on errors go to the caller
+        try:
+            event = first
+            while event is not _END:
+                yield event
+                try:
+                    event = await anext(stream, _END)
+                except Exception as e:
+                    self._record(e)
+                    raise
+        finally:
+            await stream.aclose()
+
+    def stats(self) -> Dict[str, Any]:
+        p95 = self.first_event_latency.percentile(0.95)
+        return {
+            **self._stats,
+            "circuit": self.breaker.state,
+            "p95_first_event_seconds": round(p95, 3) if p95 is not None else None,
+        }
+
+    def close(self) -> None:
+        """Release the wrapped client"""
+        self.client.close()
+
+
+def create_resilient_client(client: Any) -> ResilientAgentClient:
+    """Wrap an AsyncAgentClient using the AGENT_RETRY_* / AGENT_HEDGE_* / AGENT_BREAKER_* variables"""
+    return ResilientAgentClient(
+        client,
+        max_attempts=int(os.getenv("AGENT_RETRY_ATTEMPTS", "3")),
+        backoff_base=float(os.getenv("AGENT_RETRY_BACKOFF_SECONDS", "0.5")),
+        backoff_max=float(os.getenv("AGENT_RETRY_BACKOFF_MAX_SECONDS", "8")),
+        hedge=os.getenv("AGENT_HEDGE_ENABLED", "false").lower() == "true",
+        hedge_min_delay=float(os.getenv("AGENT_HEDGE_MIN_DELAY_SECONDS", "1")),
+        breaker=CircuitBreaker(
+            failure_threshold=int(os.getenv("AGENT_BREAKER_FAILURE_THRESHOLD", "5")),
+            reset_timeout=float(os.getenv("AGENT_BREAKER_RESET_SECONDS", "30")),
+        ),
+    )
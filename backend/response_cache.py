@@ -0,0 +1,201 @@
+"""
+Response Cache
+Serves repeated destination/itinerary questions without a full agent round trip.
+
+Two lookup tiers:
+- exact:   normalized prompt (case, punctuation, currency and stopwords folded)
+- similar: Jaccard similarity of character shingles above a threshold,
+           restricted to prompts carrying exactly the same numbers so that
+           "5-day trip under 50000" never answers "7-day trip under 30000",
+           and the same content words up to typos, so that "cheap weekend
+           trip to Coorg" never answers "weekend trip to Coorg"
+
+Entries expire after a TTL and the cache is bounded with LRU eviction.
+"""
+
+import os
+import re
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from difflib import SequenceMatcher
+from typing import Any, Dict, FrozenSet, Optional, Set
+
+STOPWORDS = frozenset({
+    "a", "an", "the", "i", "me", "my", "we", "our", "you", "your", "please",
+    "want", "would", "like", "to", "for", "of", "in", "on", "at", "with",
+    "and", "or", "is", "are", "be", "can", "could", "some", "any",
+    "plan", "suggest", "give", "show", "need", "looking",
+})
+
+# Two words this alike are taken for the same word misspelt ("bangalore", "banglore")
+TYPO_SIMILARITY = 0.8
+
+_NUMBER_WITH_SEPARATORS = re.compile(r"(?<=\d)[,_](?=\d{3}\b)")
+_NON_WORD = re.compile(r"[^\w\s]+")
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Fold a prompt into a canonical form used as the exact-match key"""
+    text = unicodedata.normalize("NFKC", prompt).lower()
+    text = re.sub(r"₹|\brs\.?(?=\s*\d)|\binr\b", " ", text)
+    text = _NUMBER_WITH_SEPARATORS.sub("", text)
+    text = re.sub(r"(\d+)\s*k\b", lambda m: f"{m.group(1)}000", text)
+    text = _NON_WORD.sub(" ", text)
+    tokens = (token for token in text.split() if token not in STOPWORDS)
+    # Light plural folding: "trips" and "trip" share a key
+    return " ".join(token[:-1] if len(token) > 3 and token.endswith("s") and not token.endswith("ss") else token
+                    for token in tokens)
+
+
+def shingles(normalized: str, size: int = 3) -> Set[str]:
+    """Character shingles of a normalized prompt"""
+    text = f" {normalized} "
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+def _has_word(token: str, words: FrozenSet[str]) -> bool:
+    if token in words:
+        return True
+    return len(token) > 3 and any(
+        len(word) > 3 and SequenceMatcher(None, token, word).ratio() >= TYPO_SIMILARITY for word in words
+    )
+
+
+def same_words(a: FrozenSet[str], b: FrozenSet[str]) -> bool:
+    """Every content word of each prompt appears in the other, allowing for typos"""
+    return all(_has_word(token, b) for token in a - b) and all(_has_word(token, a) for token in b - a)
+
+
+class _Entry:
+    __slots__ = ("response", "expires_at", "shingles", "numbers", "tokens")
+
+    def __init__(self, response: str, expires_at: float, shingle_set: Set[str],
+                 numbers: FrozenSet[str], tokens: FrozenSet[str]):
+        self.response = response
+        self.expires_at = expires_at
+        self.shingles = shingle_set
+        self.numbers = numbers
+        self.tokens = tokens
+
+
+class ResponseCache:
+    """TTL + LRU cache of agent responses with a similarity tier"""
+
+    def __init__(self, ttl_seconds: float, max_entries: int, similarity_threshold: float,
+                 shingle_size: int = 3):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity_threshold = similarity_threshold
+        self.shingle_size = shingle_size
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        # token -> normalized keys containing it, used to shortlist candidates
+        self._token_index: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "similar_hits": 0, "misses": 0, "stores": 0, "evictions": 0}
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        for token in entry.tokens:
+            keys = self._token_index.get(token)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._token_index[token]
+
+    def get(self, prompt: str) -> Optional[Dict[str, Any]]:
+        """Return {"response", "tier", "similarity"} for a cached answer, or None"""
+        key = normalize_prompt(prompt)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at > now:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return {"response": entry.response, "tier": "exact", "similarity": 1.0}
+            if entry is not None:
+                self._remove(key)
+
+            match = self._find_similar(key, now)
+            if match is not None:
+                match_key, similarity = match
+                self._entries.move_to_end(match_key)
+                self._stats["similar_hits"] += 1
+                return {"response": self._entries[match_key].response, "tier": "similar",
+                        "similarity": round(similarity, 3)}
+
+            self._stats["misses"] += 1
+            return None
+
+    def _find_similar(self, key: str, now: float):
+        tokens = frozenset(key.split())
+        numbers = frozenset(_NUMBER.findall(key))
+        query_shingles = shingles(key, self.shingle_size)
+
+        candidates = set()
+        for token in tokens:
+            candidates.update(self._token_index.get(token, ()))
+
+        best = None
+        for candidate in candidates:
+            entry = self._entries[candidate]
+            if entry.expires_at <= now or entry.numbers != numbers:
+                continue
+            overlap = len(query_shingles & entry.shingles)
+            similarity = overlap / (len(query_shingles) + len(entry.shingles) - overlap)
+            if similarity < self.similarity_threshold or (best is not None and similarity <= best[1]):
+                continue
+            # Qualifiers such as "cheap" or "luxury" change the answer but barely move the shingles
+            if same_words(tokens, entry.tokens):
+                best = (candidate, similarity)
+        return best
+
+    def set(self, prompt: str, response: str) -> None:
+        """Cache a response for a prompt"""
+        key = normalize_prompt(prompt)
+        tokens = frozenset(key.split())
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = _Entry(
+                response=response,
+                expires_at=time.time() + self.ttl_seconds,
+                shingle_set=shingles(key, self.shingle_size),
+                numbers=frozenset(_NUMBER.findall(key)),
+                tokens=tokens,
+            )
+            for token in tokens:
+                self._token_index.setdefault(token, set()).add(key)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self._stats["evictions"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters and current size"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._entries)
+        lookups = stats["exact_hits"] + stats["similar_hits"] + stats["misses"]
+        stats["hit_ratio"] = round((stats["exact_hits"] + stats["similar_hits"]) / lookups, 4) if lookups else 0.0
+        return stats
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._token_index.clear()
+
+
+def create_response_cache() -> Optional[ResponseCache]:
+    """Build the response cache from environment settings (None when disabled)"""
+    if os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() != "true":
+        return None
+    return ResponseCache(
+        ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", "21600")),
+        max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000")),
+        similarity_threshold=float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.8")),
+    )
@@ -0,0 +1,133 @@
+"""
+Agent Session Pool
+Warm pool of pre-created Agent Engine sessions.
+
+Creating a remote agent session is a round trip that otherwise sits in
+front of every new chat's first message. The pool keeps a few idle
+sessions per worker, hands them out on demand, refills in the background
+and deletes sessions that sat idle for too long.
+
+Pooled sessions are created before the user is known, so they belong to a
+shared pool user id; callers must query them with the `agent_user_id`
+returned by `acquire()` rather than the end user's id.
+"""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from metrics import log
+
+
+class AgentSessionPool:
+    """Pre-created agent sessions, refilled and reclaimed in the background"""
+
+    def __init__(self, client: Any, size: int, user_id: str = "pooled-user",
+                 max_age_seconds: float = 1800, refill_interval: float = 30):
+        self.client = client
+        self.size = size
+        self.user_id = user_id
+        self.max_age_seconds = max_age_seconds
+        self.refill_interval = refill_interval
+        self._idle: Deque[Tuple[float, Dict[str, Any]]] = deque()
+        self._creating = 0
+        self._wake = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"hits": 0, "misses": 0, "created": 0, "reclaimed": 0, "errors": 0}
+
+    def __len__(self) -> int:
+        return len(self._idle)
+
+    async def _create(self) -> None:
+        self._creating += 1
+        try:
+            agent_session = await self.client.create_session(user_id=self.user_id)
+            self._idle.append((time.monotonic(), agent_session))
+            self.stats["created"] += 1
+        except Exception as e:
+            self.stats["errors"] += 1
+            log(f"❌ Failed to pre-create agent session: {e}")
+        finally:
+            self._creating -= 1
+
+    async def _delete(self, agent_session: Dict[str, Any]) -> None:
+        try:
+            await self.client.delete_session(user_id=self.user_id, session_id=agent_session["id"])
+        except Exception as e:
+            log(f"❌ Failed to delete pooled agent session {agent_session['id']}: {e}")
+
+    async def refill(self) -> None:
+        """Top the pool up to its target size concurrently"""
+        missing = self.size - len(self._idle) - self._creating
+        if missing > 0:
+            await asyncio.gather(*(self._create() for _ in range(missing)))
+
+    async def reclaim_stale(self) -> None:
+        """Delete idle sessions older than max_age_seconds (oldest are on the left)"""
+        cutoff = time.monotonic() - self.max_age_seconds
+        stale = []
+        while self._idle and self._idle[0][0] < cutoff:
+            stale.append(self._idle.popleft()[1])
+        if stale:
+            self.stats["reclaimed"] += len(stale)
+            await asyncio.gather(*(self._delete(s) for s in stale))
+
+    async def _maintain(self) -> None:
+        while True:
+            try:
+                await self.reclaim_stale()
+                await self.refill()
+            except Exception as e:
+                log(f"❌ Session pool maintenance failed: {e}")
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.refill_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def start(self) -> None:
+        """Fill the pool and keep it topped up in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._maintain())
+
+    async def acquire(self) -> Tuple[str, Dict[str, Any]]:
+        """Return (agent_user_id, agent_session), creating one only if the pool is empty"""
+        cutoff = time.monotonic() - self.max_age_seconds
+        while self._idle:
+            # Newest first: the freshest sessions are least likely to have expired remotely
+            created_at, agent_session = self._idle.pop()
+            if created_at >= cutoff:
+                self.stats["hits"] += 1
+                self._wake.set()
+                return self.user_id, agent_session
+            self._idle.appendleft((created_at, agent_session))
+            break
+
+        self.stats["misses"] += 1
+        self._wake.set()
+        return self.user_id, await self.client.create_session(user_id=self.user_id)
+
+    async def close(self) -> None:
+        """Stop maintenance and delete every idle session"""
+        if self._task:
+            self._task.cancel()
+            self._task = None
+        idle = [agent_session for _, agent_session in self._idle]
+        self._idle.clear()
+        await asyncio.gather(*(self._delete(s) for s in idle))
+
+
+def create_session_pool(client: Any) -> Optional[AgentSessionPool]:
+    """Build the pool from SESSION_POOL_* environment variables (size 0 disables it)"""
+    size = int(os.getenv("SESSION_POOL_SIZE", "4"))
+    if size <= 0:
+        return None
+    return AgentSessionPool(
+        client,
+        size=size,
+        user_id=os.getenv("SESSION_POOL_USER_ID", "pooled-user"),
+        max_age_seconds=float(os.getenv("SESSION_POOL_MAX_AGE_SECONDS", "1800")),
+        refill_interval=float(os.getenv("SESSION_POOL_REFILL_INTERVAL_SECONDS", "30")),
+    )
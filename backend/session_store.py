@@ -0,0 +1,398 @@
+"""
+Session Store
+Pluggable storage for chat sessions with TTL eviction.
+
+Backends:
+- memory: in-process LRU + TTL (default, single worker)
+- sqlite: file-backed store shared by every worker on a host
+- redis:  shared store for multiple hosts (any redis-py compatible client)
+
+Expired sessions are handed back by `pop_expired()` so the caller can
+release the matching remote agent sessions.
+
+`save()` writes the whole session, so a request holds `lock(session_id)`
+from loading a session to saving it. The lock is shared by every worker
+using the store; a holder that dies frees it after `lock_seconds`.
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+from uuid import uuid4
+
+# Seconds between attempts to take a session lock held by another worker
+LOCK_POLL_SECONDS = 0.05
+
+
+def _json_default(value: Any) -> Any:
+    """Serialize values json does not handle natively"""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _dumps(session_data: Dict) -> str:
+    return json.dumps(session_data, default=_json_default)
+
+
+class SessionLock:
+    """A held session lock; release() is idempotent"""
+
+    def __init__(self, store: "SessionStore", session_id: Optional[str], token: str, local: asyncio.Lock):
+        self._store = store
+        self._session_id = session_id
+        self._token = token
+        self._local = local
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            if self._session_id:
+                self._store._unlock(self._session_id, self._token)
+            self._local.release()
+
+
+class SessionStore(ABC):
+    """Base class for session storage backends"""
+
+    # Whether sessions outlive this process (shared with other workers)
+    persistent = False
+
+    def __init__(self, ttl_seconds: float, max_messages: int, lock_seconds: float = 300):
+        self.ttl_seconds = ttl_seconds
+        self.max_messages = max_messages
+        self.lock_seconds = lock_seconds
+        # Requests in this worker queue here rather than polling the shared lock
+        self._local_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def _trim(self, session_data: Dict) -> Dict:
+        """Keep only the most recent messages of a session"""
+        messages = session_data.get("messages")
+        if messages is not None and len(messages) > self.max_messages:
+            session_data["messages"] = messages[-self.max_messages:]
+        return session_data
+
+    @abstractmethod
+    def get(self, session_id: str) -> Optional[Dict]:
+        """Return the session data, or None if missing or expired"""
+
+    @abstractmethod
+    def save(self, session_id: str, session_data: Dict) -> None:
+        """Insert or update a session and refresh its TTL"""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> Optional[Dict]:
+        """Remove a session and return its data"""
+
+    @abstractmethod
+    def pop_expired(self) -> List[Tuple[str, Dict]]:
+        """Remove and return every expired or evicted session"""
+
+    @abstractmethod
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        """Iterate over live sessions"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """Number of live sessions"""
+
+    def __contains__(self, session_id: str) -> bool:
+        return self.get(session_id) is not None
+
+    def _try_lock(self, session_id: str, token: str) -> bool:
+        """Take the lock shared with other workers, unless someone else holds it"""
+        return True
+
+    def _unlock(self, session_id: str, token: str) -> None:
+        """Release the shared lock if it is still held under `token`"""
+
+    async def acquire(self, session_id: Optional[str]) -> SessionLock:
+        """Wait for exclusive use of a session
+
+        Without a session id the request creates a new session nobody else
+        can see yet, so nothing is held.
+        """
+        local = asyncio.Lock() if not session_id else self._local_locks.setdefault(session_id, asyncio.Lock())
+        await local.acquire()
+        token = uuid4().hex
+        try:
+            while session_id and not self._try_lock(session_id, token):
+                await asyncio.sleep(LOCK_POLL_SECONDS)
+        except BaseException:
+            local.release()
+            raise
+        return SessionLock(self, session_id, token, local)
+
+    @asynccontextmanager
+    async def lock(self, session_id: Optional[str]):
+        session_lock = await self.acquire(session_id)
+        try:
+            yield session_lock
+        finally:
+            session_lock.release()
+
+    def close(self) -> None:
+        """Release backend resources"""
+
+
+class InMemorySessionStore(SessionStore):
+    """In-process LRU + TTL session store"""
+
+    def __init__(self, ttl_seconds: float, max_messages: int, max_entries: int, lock_seconds: float = 300):
+        super().__init__(ttl_seconds, max_messages, lock_seconds)
+        self.max_entries = max_entries
+        # session_id -> (expires_at, session_data), least recently used first
+        self._sessions: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._evicted: List[Tuple[str, Dict]] = []
+        self._lock = threading.Lock()
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return None
+            expires_at, session_data = entry
+            if expires_at <= time.time():
+                del self._sessions[session_id]
+                self._evicted.append((session_id, session_data))
+                return None
+            self._sessions.move_to_end(session_id)
+            return session_data
+
+    def save(self, session_id: str, session_data: Dict) -> None:
+        with self._lock:
+            self._sessions[session_id] = (time.time() + self.ttl_seconds, self._trim(session_data))
+            self._sessions.move_to_end(session_id)
+            while len(self._sessions) > self.max_entries:
+                self._evicted.append(self._pop_lru())
+
+    def _pop_lru(self) -> Tuple[str, Dict]:
+        session_id, (_, session_data) = self._sessions.popitem(last=False)
+        return session_id, session_data
+
+    def delete(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._sessions.pop(session_id, None)
+            return entry[1] if entry else None
+
+    def pop_expired(self) -> List[Tuple[str, Dict]]:
+        now = time.time()
+        with self._lock:
+            expired, self._evicted = self._evicted, []
+            for session_id in [sid for sid, (exp, _) in self._sessions.items() if exp <= now]:
+                expired.append((session_id, self._sessions.pop(session_id)[1]))
+            return expired
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        with self._lock:
+            snapshot = [(sid, data) for sid, (_, data) in self._sessions.items()]
+        return iter(snapshot)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class SQLiteSessionStore(SessionStore):
+    """SQLite-backed session store, shareable between workers on one host"""
+
+    persistent = True
+
+    def __init__(self, path: str, ttl_seconds: float, max_messages: int, lock_seconds: float = 300):
+        super().__init__(ttl_seconds, max_messages, lock_seconds)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS sessions ("
+            "session_id TEXT PRIMARY KEY, data TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_sessions_expires ON sessions (expires_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS session_locks ("
+            "session_id TEXT PRIMARY KEY, token TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM sessions WHERE session_id = ? AND expires_at > ?",
+                (session_id, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, session_id: str, session_data: Dict) -> None:
+        payload = _dumps(self._trim(session_data))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, expires_at) VALUES (?, ?, ?)",
+                (session_id, payload, time.time() + self.ttl_seconds),
+            )
+
+    def delete(self, session_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "DELETE FROM sessions WHERE session_id = ? RETURNING data", (session_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def pop_expired(self) -> List[Tuple[str, Dict]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "DELETE FROM sessions WHERE expires_at <= ? RETURNING session_id, data", (time.time(),)
+            ).fetchall()
+        return [(session_id, json.loads(data)) for session_id, data in rows]
+
+    def _try_lock(self, session_id: str, token: str) -> bool:
+        now = time.time()
+        with self._lock:
+            # Inserts a free lock or takes over an expired one in a single statement
+            cursor = self._conn.execute(
+                "INSERT INTO session_locks (session_id, token, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET token = excluded.token, expires_at = excluded.expires_at "
+                "WHERE session_locks.expires_at <= ?",
+                (session_id, token, now + self.lock_seconds, now),
+            )
+        return cursor.rowcount == 1
+
+    def _unlock(self, session_id: str, token: str) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM session_locks WHERE session_id = ? AND token = ?", (session_id, token))
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT session_id, data FROM sessions WHERE expires_at > ?", (time.time(),)
+            ).fetchall()
+        return ((session_id, json.loads(data)) for session_id, data in rows)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT COUNT(*) FROM sessions WHERE expires_at > ?", (time.time(),)
+            ).fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class RedisSessionStore(SessionStore):
+    """Redis-backed session store for multi-host deployments
+
+    Session payloads live under `<prefix><session_id>` and a sorted set
+    `<prefix>expiry` tracks deadlines, so expired sessions can still be
+    read once by the reaper before they are released. Session locks are
+    `<prefix>lock:<session_id>` keys that expire on their own.
+    """
+
+    persistent = True
+
+    # Deletes a lock only while it still holds the caller's token
+    UNLOCK_SCRIPT = (
+        "if redis.call('get', KEYS[1]) == ARGV[1] then return redis.call('del', KEYS[1]) end return 0"
+    )
+
+    def __init__(self, client: Any, ttl_seconds: float, max_messages: int, prefix: str = "session:",
+                 lock_seconds: float = 300):
+        super().__init__(ttl_seconds, max_messages, lock_seconds)
+        self.client = client
+        self.prefix = prefix
+        self.expiry_key = f"{prefix}expiry"
+        # Payloads outlive their deadline so the reaper can still read them
+        self.grace_seconds = max(int(ttl_seconds), 60)
+
+    def _key(self, session_id: str) -> str:
+        return f"{self.prefix}{session_id}"
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        score = self.client.zscore(self.expiry_key, session_id)
+        if score is None or score <= time.time():
+            return None
+        payload = self.client.get(self._key(session_id))
+        return json.loads(payload) if payload else None
+
+    def save(self, session_id: str, session_data: Dict) -> None:
+        expires_at = time.time() + self.ttl_seconds
+        pipe = self.client.pipeline()
+        pipe.set(self._key(session_id), _dumps(self._trim(session_data)),
+                 ex=int(self.ttl_seconds) + self.grace_seconds)
+        pipe.zadd(self.expiry_key, {session_id: expires_at})
+        pipe.execute()
+
+    def delete(self, session_id: str) -> Optional[Dict]:
+        payload = self.client.get(self._key(session_id))
+        pipe = self.client.pipeline()
+        pipe.delete(self._key(session_id))
+        pipe.zrem(self.expiry_key, session_id)
+        pipe.execute()
+        return json.loads(payload) if payload else None
+
+    def pop_expired(self) -> List[Tuple[str, Dict]]:
+        expired = []
+        for member in self.client.zrangebyscore(self.expiry_key, 0, time.time()):
+            session_id = member.decode() if isinstance(member, bytes) else member
+            # zrem is the claim: only one worker releases a given session
+            if not self.client.zrem(self.expiry_key, session_id):
+                continue
+            payload = self.client.get(self._key(session_id))
+            self.client.delete(self._key(session_id))
+            if payload:
+                expired.append((session_id, json.loads(payload)))
+        return expired
+
+    def _try_lock(self, session_id: str, token: str) -> bool:
+        return bool(self.client.set(f"{self.prefix}lock:{session_id}", token, nx=True,
+                                    px=int(self.lock_seconds * 1000)))
+
+    def _unlock(self, session_id: str, token: str) -> None:
+        self.client.eval(self.UNLOCK_SCRIPT, 1, f"{self.prefix}lock:{session_id}", token)
+
+    def items(self) -> Iterator[Tuple[str, Dict]]:
+        for member in self.client.zrangebyscore(self.expiry_key, time.time(), "+inf"):
+            session_id = member.decode() if isinstance(member, bytes) else member
+            session_data = self.get(session_id)
+            if session_data is not None:
+                yield session_id, session_data
+
+    def __len__(self) -> int:
+        return self.client.zcount(self.expiry_key, time.time(), "+inf")
+
+    def close(self) -> None:
+        self.client.close()
+
+
+def create_session_store() -> SessionStore:
+    """Build the session store selected by the SESSION_STORE environment variable"""
+    backend = os.getenv("SESSION_STORE", "memory").lower()
+    ttl_seconds = float(os.getenv("SESSION_TTL_SECONDS", "3600"))
+    max_messages = int(os.getenv("SESSION_MAX_MESSAGES", "100"))
+    lock_seconds = float(os.getenv("SESSION_LOCK_SECONDS", "300"))
+
+    if backend == "memory":
+        max_entries = int(os.getenv("SESSION_MAX_ENTRIES", "10000"))
+        return InMemorySessionStore(ttl_seconds, max_messages, max_entries, lock_seconds)
+
+    if backend == "sqlite":
+        path = os.getenv("SESSION_DB_PATH", "sessions.db")
+        return SQLiteSessionStore(path, ttl_seconds, max_messages, lock_seconds)
+
+    if backend == "redis":
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("SESSION_STORE=redis requires the 'redis' package") from e
+        client = redis.Redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379"))
+        return RedisSessionStore(client, ttl_seconds, max_messages, lock_seconds=lock_seconds)
+
+    raise ValueError(f"Unknown SESSION_STORE backend: {backend}")
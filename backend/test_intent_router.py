@@ -0,0 +1,48 @@
+"""
+Only unambiguous requests skip root_agent, and never negated ones.
+
+Run with: python -m pytest test_intent_router.py
+"""
+
+import json
+
+from intent_router import NO_ROUTE, SEED_EXAMPLES, CentroidModel, IntentRouter, create_intent_router, load_examples
+
+
+def test_rules_route_obvious_requests():
+    router = IntentRouter(model=None)
+    assert router.route("Great, proceed to booking") == ("booking_agent", "rule")
+    assert router.route("Show me more destinations") == ("InspirationAgent", "rule")
+    assert router.route("Generate the full itinerary") == ("PlanningAgent", "rule")
+    assert router.route("Any live updates on my trip?") == ("RealtimeMonitoringAgent", "rule")
+
+
+def test_model_routes_paraphrases_and_falls_back_when_unsure():
+    router = create_intent_router()
+    assert router.route("Plan my trip to Goa") == ("PlanningAgent", "model")
+    assert router.route("What's the weather like there?") == (None, "fallback")
+
+
+def test_negated_requests_go_to_root_agent():
+    router = create_intent_router()
+    for message in ["I'm not ready to book", "not ready to book", "I do not want to book",
+                    "I dont want to book yet", "I don’t want to book", "dont generate the itinerary yet",
+                    "Never show me more destinations"]:
+        assert router.route(message) == (None, "fallback"), message
+
+
+def test_long_messages_go_to_root_agent():
+    router = IntentRouter(model=None, max_chars=20)
+    assert router.route("Proceed to booking, but only the hotel on the second night") == (None, "fallback")
+
+
+def test_seed_examples_label_negations_as_none():
+    labels = dict(load_examples([SEED_EXAMPLES]))
+    assert labels["I do not want to book"] == NO_ROUTE
+    assert labels["Dont generate the itinerary yet"] == NO_ROUTE
+
+
+def test_model_round_trips_through_json():
+    model = CentroidModel.train(load_examples([SEED_EXAMPLES]))
+    restored = CentroidModel.from_dict(json.loads(json.dumps(model.to_dict())))
+    assert restored.scores("Plan my trip to Goa")[0][0] == model.scores("Plan my trip to Goa")[0][0]
@@ -0,0 +1,19 @@
+"""
+The vendored itinerary schema matches the planning agent's.
+
+Run with: python -m pytest test_itinerary_schema.py
+"""
+
+import os
+
+import itinerary_schema
+
+AGENT_SCHEMA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "agent", "personalizedTripPlanner", "personalized_trip_planner", "subagents", "Planning", "schema.py",
+)
+
+
+def test_vendored_schema_matches_the_agent_schema():
+    with open(AGENT_SCHEMA, encoding="utf-8") as agent_file, open(itinerary_schema.__file__, encoding="utf-8") as vendored:
+        assert vendored.read() == agent_file.read(), "Copy Planning/schema.py to backend/itinerary_schema.py"
@@ -0,0 +1,37 @@
+"""
+Template matching only answers requests the precomputed plans actually fit.
+
+Run with: python -m pytest test_itinerary_templates.py
+"""
+
+from itinerary_templates import SEED_TEMPLATES, TemplateStore
+
+
+def _store():
+    return TemplateStore.load(SEED_TEMPLATES)
+
+
+def test_seed_covers_each_trip_length():
+    store = _store()
+    for days in (2, 3, 4, 5):
+        options = store.match({"destination": "Coorg", "duration": f"{days} days"})
+        assert options and len(options[0].days) == days
+
+
+def test_other_origins_miss():
+    store = _store()
+    assert store.match({"destination": "Goa", "duration": 4, "origin": "Delhi"}) == []
+    assert store.match({"destination": "Goa", "duration": 4, "origin": "Bangalore"})
+
+
+def test_interests_must_name_a_theme():
+    store = _store()
+    assert store.match({"destination": "Coorg", "duration": 3, "interests": ["shopping"]}) == []
+    options = store.match({"destination": "Goa", "duration": 3, "interests": ["beaches"]})
+    assert [option.title for option in options] == ["North Goa beaches and nightlife"]
+
+
+def test_budget_tier_applies_to_every_night():
+    option = _store().match({"destination": "Mysore", "duration": 4, "budget": "4000", "travelers": 1})[0]
+    stays = [a.title for day in option.days for a in day.activities if a.type == "accommodation"]
+    assert stays == ["Check in at a budget lodge", "Night at the budget lodge", "Night at the budget lodge"]
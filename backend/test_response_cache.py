@@ -0,0 +1,63 @@
+"""
+Cached answers are only served for prompts that ask the same thing.
+
+Run with: python -m pytest test_response_cache.py
+"""
+
+from response_cache import ResponseCache, normalize_prompt
+
+
+def _cache(**kwargs):
+    settings = {"ttl_seconds": 60, "max_entries": 10, "similarity_threshold": 0.8}
+    settings.update(kwargs)
+    return ResponseCache(**settings)
+
+
+def test_exact_tier_folds_case_currency_and_plurals():
+    assert normalize_prompt("Trips to Goa under ₹50,000!") == normalize_prompt("trip to goa under 50k")
+    cache = _cache()
+    cache.set("Trips to Goa under ₹50,000", "Goa ideas")
+    assert cache.get("trip to goa under 50k") == {"response": "Goa ideas", "tier": "exact", "similarity": 1.0}
+
+
+def test_similar_tier_allows_reordering_and_typos():
+    cache = _cache()
+    cache.set("weekend trip from Bangalore to Coorg", "Coorg plan")
+    assert cache.get("Coorg weekend trip from Bangalore")["tier"] == "similar"
+    assert cache.get("weekend trip from Banglore to Coorg")["response"] == "Coorg plan"
+
+
+def test_similar_tier_refuses_added_or_missing_qualifiers():
+    cache = _cache()
+    cache.set("weekend trip from Bangalore to Coorg", "Coorg plan")
+    assert cache.get("cheap weekend trip from Bangalore to Coorg") is None
+    assert cache.get("luxury weekend trip from Bangalore to Coorg") is None
+
+    cache = _cache()
+    cache.set("luxury weekend trip from Bangalore to Coorg", "Luxury plan")
+    assert cache.get("weekend trip from Bangalore to Coorg") is None
+
+
+def test_similar_tier_refuses_other_numbers():
+    cache = _cache()
+    cache.set("5 day trip to Kerala under 50000", "Kerala plan")
+    assert cache.get("7 day trip to Kerala under 50000") is None
+
+
+def test_entries_expire():
+    cache = _cache(ttl_seconds=0)
+    cache.set("trip to Goa", "Goa ideas")
+    assert cache.get("trip to Goa") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = _cache(max_entries=2)
+    cache.set("trip to Goa", "Goa")
+    cache.set("trip to Ooty", "Ooty")
+    cache.get("trip to Goa")
+    cache.set("trip to Hampi", "Hampi")
+
+    assert cache.get("trip to Ooty") is None
+    assert cache.get("trip to Goa")["response"] == "Goa"
+    assert cache.stats()["evictions"] == 1
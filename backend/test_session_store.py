@@ -0,0 +1,84 @@
+"""
+Session stores expire and evict sessions, and serialize requests on one session.
+
+Run with: python -m pytest test_session_store.py
+"""
+
+import asyncio
+from datetime import datetime
+
+from session_store import InMemorySessionStore, SQLiteSessionStore
+
+
+def _session(**extra):
+    return {"user_id": "u", "created_at": datetime(2026, 1, 15, 9, 30), "messages": [], **extra}
+
+
+def test_memory_sessions_expire_and_are_handed_back():
+    store = InMemorySessionStore(ttl_seconds=0, max_messages=10, max_entries=10)
+    store.save("s1", _session())
+    assert store.get("s1") is None
+    assert [session_id for session_id, _ in store.pop_expired()] == ["s1"]
+    assert store.pop_expired() == []
+
+
+def test_least_recently_used_session_is_evicted():
+    store = InMemorySessionStore(ttl_seconds=60, max_messages=10, max_entries=2)
+    store.save("s1", _session())
+    store.save("s2", _session())
+    store.get("s1")
+    store.save("s3", _session())
+
+    assert "s2" not in store and "s1" in store and "s3" in store
+    assert [session_id for session_id, _ in store.pop_expired()] == ["s2"]
+
+
+def test_sqlite_round_trip_keeps_timestamps_and_trims_messages(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60, max_messages=2)
+    store.save("s1", _session(messages=[{"id": str(i)} for i in range(3)], itinerary={"created_at": datetime(2026, 1, 16)}))
+
+    reopened = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60, max_messages=2)
+    session_data = reopened.get("s1")
+    assert session_data["created_at"] == "2026-01-15T09:30:00"
+    assert session_data["itinerary"]["created_at"] == "2026-01-16T00:00:00"
+    assert [message["id"] for message in session_data["messages"]] == ["1", "2"]
+    assert len(reopened) == 1 and dict(reopened.items()) == {"s1": session_data}
+
+
+def test_sqlite_sessions_expire(tmp_path):
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=0, max_messages=10)
+    store.save("s1", _session())
+    assert store.get("s1") is None and len(store) == 0
+    assert [session_id for session_id, _ in store.pop_expired()] == ["s1"]
+
+
+def test_concurrent_requests_keep_each_others_messages(tmp_path):
+    # Two workers sharing one database
+    workers = [SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60, max_messages=10) for _ in range(2)]
+    workers[0].save("s1", _session())
+
+    async def reply(store, text):
+        async with store.lock("s1"):
+            session_data = store.get("s1")
+            await asyncio.sleep(0.05)  # the agent call
+            session_data["messages"].append({"id": text})
+            store.save("s1", session_data)
+
+    async def main():
+        await asyncio.gather(*(reply(store, text) for store in workers for text in ("a", "b")))
+
+    asyncio.run(main())
+    assert sorted(message["id"] for message in workers[0].get("s1")["messages"]) == ["a", "a", "b", "b"]
+
+
+def test_lock_of_a_dead_worker_expires(tmp_path):
+    crashed = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60, max_messages=10, lock_seconds=0.1)
+    assert crashed._try_lock("s1", "crashed")
+
+    store = SQLiteSessionStore(str(tmp_path / "sessions.db"), ttl_seconds=60, max_messages=10)
+    session_lock = asyncio.run(asyncio.wait_for(store.acquire("s1"), timeout=1))
+    # The late release of the old holder leaves the new lock alone
+    crashed._unlock("s1", "crashed")
+    assert not crashed._try_lock("s1", "other")
+    session_lock.release()
+    assert crashed._try_lock("s1", "other")
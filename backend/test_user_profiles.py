@@ -0,0 +1,80 @@
+"""
+Profiles of users whose chats share pooled agent sessions stay separate.
+
+Run with: python -m pytest test_user_profiles.py
+"""
+
+import asyncio
+import base64
+import json
+
+from user_profiles import PROFILE_KEY, UserProfileStore
+
+
+async def _agent_events(profile):
+    yield {"author": "PersonalizationAgent", "actions": {"state_delta": {PROFILE_KEY: profile}}}
+    yield {"author": "root_agent", "content": {"parts": [{"text": "Saved."}]}}
+
+
+async def _drain(events):
+    return [event async for event in events]
+
+
+def _chat(user_id, agent_session_id):
+    # Both chats run on sessions owned by the pool's shared agent user id
+    return {"user_id": user_id, "agent_user_id": "pooled-user", "agent_session": {"id": agent_session_id}}
+
+
+def test_two_users_keep_separate_profiles():
+    store = UserProfileStore(":memory:")
+    alice, bob = _chat("alice", "agent-1"), _chat("bob", "agent-2")
+
+    asyncio.run(_drain(store.capture(_agent_events({"interests": {"beach": 1.0}}), alice)))
+    asyncio.run(_drain(store.capture(_agent_events({"interests": {"heritage": 1.0}}), bob)))
+
+    assert store.get("alice") == {"interests": {"beach": 1.0}}
+    assert store.get("bob") == {"interests": {"heritage": 1.0}}
+    assert store.get("pooled-user") is None
+
+    # Alice's next agent session is seeded with her profile, once
+    alice["agent_session"] = {"id": "agent-3"}
+    message = store.seed(alice, "Suggest activities")
+    encoded = message[len("[[profile:"):message.index("]]")]
+    assert json.loads(base64.urlsafe_b64decode(encoded)) == {"interests": {"beach": 1.0}}
+    assert message.endswith("]] Suggest activities")
+    assert store.seed(alice, "And restaurants?") == "And restaurants?"
+
+
+def test_users_without_a_profile_are_not_seeded():
+    store = UserProfileStore(":memory:")
+    assert store.seed(_chat("carol", "agent-4"), "Hi") == "Hi"
+
+
+def test_profile_answers_are_not_shared_through_the_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    import httpx
+    import main
+    from agent_client import AsyncAgentClient
+    from benchmark.fake_agent import FakeAgentEngine
+    from resilience import create_resilient_client
+    from response_cache import ResponseCache
+
+    store = UserProfileStore(":memory:")
+    store.save("alice", {"interests": {"beach": 1.0}})
+    engine = FakeAgentEngine(latency_scale=0)
+    monkeypatch.setattr(main, "agent", engine)
+    monkeypatch.setattr(main, "agent_client", create_resilient_client(AsyncAgentClient(engine)))
+    monkeypatch.setattr(main, "user_profiles", store)
+    monkeypatch.setattr(main, "response_cache", ResponseCache(ttl_seconds=60, max_entries=10, similarity_threshold=0.8))
+
+    async def ask(user_id):
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as client:
+            response = await client.post("/api/v1/chat/message", json={"message": "Weekend trip to Coorg", "user_id": user_id})
+        return response.json()["cached"]
+
+    # Alice's answer is built from her profile: neither stored nor served from the cache
+    assert asyncio.run(ask("alice")) is False
+    assert asyncio.run(ask("bob")) is False
+    assert asyncio.run(ask("carol")) is True
+    assert asyncio.run(ask("alice")) is False
+    assert engine.queries == 3
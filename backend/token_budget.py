@@ -0,0 +1,128 @@
+"""
+Token Budget
+Token accounting for agent turns and size budgets for what we send.
+
+The agent records cumulative usage per agent in its session state
+(state["token_usage:<agent>"]), plus one record per tool call for model
+calls tools make (state["token_usage:<source>#<call id>"]). They arrive as
+state deltas on stream events, sub-agents included. account_tokens() turns
+them into per-turn increments for /metrics and keeps per-session totals
+per agent or source in session_data["token_usage"].
+
+Budgets on our side of the call:
+- clip_context() bounds the replayed context prefixed to a message
+- compact_json() shrinks preference payloads embedded in prompts
+"""
+
+import json
+from typing import Any, AsyncIterator, Dict
+
+from metrics import AGENT_CALL_INPUT_TOKENS, AGENT_MODEL_CALLS, AGENT_TOKENS, TURN_TOKENS
+
+USAGE_KEY_PREFIX = "token_usage:"
+# Separates a nested usage source from the tool call it was recorded for
+CALL_SEPARATOR = "#"
+# Rough size of a Gemini token in characters
+CHARS_PER_TOKEN = 4
+COUNTED = ("calls", "input_tokens", "output_tokens", "cached_tokens", "trimmed_tokens")
+
+
+def clip_context(context: str, max_tokens: int) -> str:
+    """Keep the most recent part of a context block within max_tokens"""
+    max_chars = max_tokens * CHARS_PER_TOKEN
+    if max_tokens <= 0 or len(context) <= max_chars:
+        return context
+    clipped = context[-max_chars:]
+    # Start on a line boundary when there is one
+    newline = clipped.find("\n")
+    if 0 <= newline < len(clipped) // 2:
+        clipped = clipped[newline + 1:]
+    return "…\n" + clipped
+
+
+def _prune(value: Any) -> Any:
+    """Drop empty values, which carry no preference"""
+    if isinstance(value, dict):
+        pruned = {key: _prune(item) for key, item in value.items()}
+        return {key: item for key, item in pruned.items() if item not in (None, "", [], {})}
+    if isinstance(value, list):
+        return [item for item in map(_prune, value) if item not in (None, "", [], {})]
+    return value
+
+
+def _shorten(value: Any, limit: int) -> Any:
+    if isinstance(value, str) and len(value) > limit:
+        return value[:limit] + "…"
+    if isinstance(value, dict):
+        return {key: _shorten(item, limit) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_shorten(item, limit) for item in value]
+    return value
+
+
+def compact_json(value: Any, max_chars: int) -> str:
+    """Minified JSON without empty values; long strings are shortened to fit max_chars"""
+    value = _prune(value)
+    text = json.dumps(value, separators=(",", ":"), ensure_ascii=False, default=str)
+    limit = 512
+    while max_chars > 0 and len(text) > max_chars and limit >= 16:
+        text = json.dumps(_shorten(value, limit), separators=(",", ":"), ensure_ascii=False, default=str)
+        limit //= 2
+    return text
+
+
+def session_usage(session_data: Dict) -> Dict[str, Any]:
+    """Token bookkeeping of a session, reset when its agent session changes"""
+    agent_session_id = session_data["agent_session"]["id"]
+    usage = session_data.setdefault("token_usage", {"totals": {}})
+    if usage.get("agent_session_id") != agent_session_id:
+        # Cumulative counters restart with every new agent session
+        usage["agent_session_id"] = agent_session_id
+        usage["seen"] = {}
+    return usage
+
+
+def last_input_tokens(session_data: Dict, agent: str = "root_agent") -> int:
+    """Input tokens of the agent's latest model call in the current agent session"""
+    usage = session_data.get("token_usage") or {}
+    if usage.get("agent_session_id") != session_data["agent_session"]["id"]:
+        return 0
+    return (usage.get("seen") or {}).get(agent, {}).get("last_input_tokens", 0)
+
+
+async def account_tokens(events: AsyncIterator[Dict[str, Any]], session_data: Dict) -> AsyncIterator[Dict[str, Any]]:
+    """Pass agent events through while recording the turn's token usage per agent"""
+    usage = session_usage(session_data)
+    turn = {kind: 0 for kind in COUNTED}
+    try:
+        async for event in events:
+            state_delta = (event.get("actions") or {}).get("state_delta") or {}
+            for key, totals in state_delta.items():
+                if key.startswith(USAGE_KEY_PREFIX) and isinstance(totals, dict):
+                    _record(usage, key[len(USAGE_KEY_PREFIX):], totals, turn)
+            yield event
+    finally:
+        if turn["calls"]:
+            for kind in ("input_tokens", "output_tokens"):
+                TURN_TOKENS.observe(turn[kind], kind=kind.replace("_tokens", ""))
+            usage["last_turn"] = turn
+
+
+def _record(usage: Dict[str, Any], key: str, totals: Dict[str, Any], turn: Dict[str, int]) -> None:
+    # Per-call records are tracked on their own but counted under their source
+    agent = key.split(CALL_SEPARATOR, 1)[0]
+    previous = usage["seen"].get(key, {})
+    session_totals = usage["totals"].setdefault(agent, {})
+    for kind in COUNTED:
+        increment = max(0, totals.get(kind, 0) - previous.get(kind, 0))
+        if not increment:
+            continue
+        turn[kind] += increment
+        session_totals[kind] = session_totals.get(kind, 0) + increment
+        if kind == "calls":
+            AGENT_MODEL_CALLS.inc(increment, agent=agent)
+        else:
+            AGENT_TOKENS.inc(increment, agent=agent, kind=kind.replace("_tokens", ""))
+    if totals.get("calls", 0) > previous.get("calls", 0):
+        AGENT_CALL_INPUT_TOKENS.observe(totals.get("last_input_tokens", 0), agent=agent)
+    usage["seen"][key] = dict(totals)
@@ -0,0 +1,89 @@
+"""
+User Profiles
+Backend-side store for PersonalizationAgent profiles, keyed by end user.
+
+Agent sessions are pooled under one shared agent user id, so the agent's
+`user:` state cannot separate users. The agent keeps the profile in session
+state (state["personalization_profile"]) and this store owns the per-user
+copy:
+- capture() saves every profile state delta under the chat's user_id
+- seed() prefixes the first message to each agent session with
+  `[[profile:<base64 JSON>]]`, which the agent writes to state and strips
+  before the model sees it
+
+Profiles live in SQLite so every worker on a host shares them.
+"""
+
+import base64
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Optional
+
+PROFILE_KEY = "personalization_profile"
+PROFILE_MARKER = "[[profile:{encoded}]] "
+
+
+class UserProfileStore:
+    """Personalization profile per end user, synced with agent session state"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS profiles ("
+            "user_id TEXT PRIMARY KEY, profile TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+
+    def get(self, user_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT profile FROM profiles WHERE user_id = ?", (user_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save(self, user_id: str, profile: Dict[str, Any]) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO profiles (user_id, profile, updated_at) VALUES (?, ?, ?)",
+                (user_id, json.dumps(profile), time.time()),
+            )
+
+    def seed(self, session_data: Dict, message: str) -> str:
+        """The message, prefixed with the user's profile if this agent session has not seen it yet"""
+        agent_session_id = session_data["agent_session"]["id"]
+        if session_data.get("profile_seeded") == agent_session_id:
+            return message
+        session_data["profile_seeded"] = agent_session_id
+        profile = self.get(session_data["user_id"])
+        if not profile:
+            return message
+        encoded = base64.urlsafe_b64encode(json.dumps(profile, separators=(",", ":")).encode()).decode("ascii")
+        return PROFILE_MARKER.format(encoded=encoded) + message
+
+    async def capture(self, events: AsyncIterator[Dict[str, Any]], session_data: Dict) -> AsyncIterator[Dict[str, Any]]:
+        """Pass agent events through, saving profile changes for the chat's user"""
+        latest = None
+        try:
+            async for event in events:
+                state_delta = (event.get("actions") or {}).get("state_delta") or {}
+                if isinstance(state_delta.get(PROFILE_KEY), dict):
+                    latest = state_delta[PROFILE_KEY]
+                yield event
+        finally:
+            # Changes made before a disconnect are already in the agent session
+            if latest is not None:
+                self.save(session_data["user_id"], latest)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def create_user_profile_store() -> Optional[UserProfileStore]:
+    """Build the store from PROFILE_* environment variables (None when disabled)"""
+    if os.getenv("PROFILE_STORE_ENABLED", "true").lower() != "true":
+        return None
+    return UserProfileStore(os.getenv("PROFILE_DB_PATH", "profiles.db"))